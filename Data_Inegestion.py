@@ -1,8 +1,25 @@
 import streamlit as st
 import pandas as pd
 import os 
-from data_utils import generate_dummy_data 
+from instrumentation import instrumented
+from paged_table import FrameSource, display_paged_table
+from snapshot_store import SNAPSHOT_DIR, list_snapshots, save_snapshot, snapshot_partition
+from out_of_core import is_out_of_core
+from dataset_registry import (file_dataset_handle, dummy_dataset_handle, shard_dataset_handle, parquet_dataset_handle,
+                              shard_reports, quality_report,
+                              get_frame, set_active_dataset, get_active_dataset)
 
+def display_quality_report(handle):
+    """Summarizes what the cleaning stage changed in a freshly loaded dataset."""
+    report = quality_report(handle)
+    if report.empty:
+        st.caption("Data quality: no issues found.")
+        return
+    with st.expander(f"Data quality: {len(report)} cleaning rule(s) applied, {int(report['rows'].sum()):,} values changed"):
+        st.dataframe(report, use_container_width=True, hide_index=True)
+
+
+@instrumented('page.data_ingestion')
 def dispaly_data_ingestion(df):
     st.set_page_config(page_title="Data Ingestion")
    # ... (rest of your app.py code above this block) ..
@@ -15,28 +32,101 @@ def dispaly_data_ingestion(df):
     if st.button("Preview Data from Project CSV"):
         if os.path.exists(csv_file_path):
             try:
-                df_loaded = pd.read_csv(csv_file_path)
+                handle = file_dataset_handle(csv_file_path)
+                df_loaded = get_frame(handle)
                 st.success(f"Data loaded successfully from '{csv_file_path}'!")
+                display_quality_report(handle)
                 st.markdown("Here's a preview of the data loaded from your project CSV:")
-                st.dataframe(df_loaded.head(500))
-                st.session_state['employee_data'] = df_loaded 
+                display_paged_table(FrameSource(df_loaded), key="ingestion_preview")
+                set_active_dataset(handle)
             except Exception as e:
                 st.error(f"Error reading CSV file '{csv_file_path}': {e}")
                 st.markdown("Please ensure the CSV file is correctly formatted and accessible.")
-                st.session_state['employee_data'] = generate_dummy_data() # Fallback to dummy data on error
+                set_active_dataset(dummy_dataset_handle()) # Fallback to dummy data on error
         else:
             st.warning(f"CSV file not found at '{csv_file_path}'. Please ensure the file exists in your project directory.")
             st.markdown("As a fallback, here's a preview of *simulated* employee data:")
-            df_simulated = generate_dummy_data()
-            st.dataframe(df_simulated.head(10))
-            st.session_state['employee_data'] = df_simulated # Store fallback data
+            handle = dummy_dataset_handle()
+            display_paged_table(FrameSource(get_frame(handle)), key="ingestion_preview", page_size=25)
+            set_active_dataset(handle) # Store fallback data
     else:
         st.markdown("Click the button above to load and preview data from the project CSV file.")
 
+    st.markdown("---")
+    st.subheader("Load a Sharded HRIS Export")
+    st.info("Point at a directory or glob (e.g. `Data/shards/*.csv`) of per-region CSV/XLSX shards. "
+            "Shards are parsed in parallel and combined; any that fail are listed and skipped.")
+    shard_source = st.text_input("Directory or glob pattern", value="Data/shards", key="shard_source")
+    if st.button("Load Shards"):
+        try:
+            handle = shard_dataset_handle(shard_source)
+            df_loaded = get_frame(handle)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            reports = shard_reports(handle)
+            failed = [r for r in reports if r.error]
+            st.success(f"Loaded {len(df_loaded):,} rows from {len(reports) - len(failed)} of {len(reports)} shards.")
+            if failed:
+                st.warning(f"{len(failed)} shard(s) could not be loaded and were skipped.")
+            st.dataframe(pd.DataFrame({
+                'Shard': [os.path.basename(r.path) for r in reports],
+                'Rows': [r.rows for r in reports],
+                'Seconds': [round(r.seconds, 3) for r in reports],
+                'Error': [r.error or "" for r in reports],
+            }), use_container_width=True)
+            display_quality_report(handle)
+            display_paged_table(FrameSource(df_loaded), key="shard_preview")
+            set_active_dataset(handle)
+
+    st.markdown("---")
+    st.subheader("Load a Parquet Dataset or Saved Snapshot")
+    st.info(f"Point at a Parquet file or directory. For the snapshot store ('{SNAPSHOT_DIR}'), one snapshot is "
+            "loaded, the latest unless you pick another. Datasets too large for memory are analyzed out of core: "
+            "every chart is computed by scanning the files on disk, reading only the columns and row groups it needs.")
+    parquet_source = st.text_input("Parquet file or directory", key="parquet_source")
+    snapshot_dates = list_snapshots(parquet_source) if parquet_source else []
+    if snapshot_dates:
+        snapshot_date = st.selectbox("Snapshot", snapshot_dates[::-1], format_func=lambda d: str(d.date()),
+                                     key="parquet_snapshot_date")
+        parquet_source = snapshot_partition(parquet_source, snapshot_date)
+    if st.button("Load Parquet"):
+        try:
+            handle = parquet_dataset_handle(parquet_source)
+            df_loaded = get_frame(handle)
+        except (OSError, ValueError, ImportError) as e:
+            st.error(str(e))
+        else:
+            if handle.out_of_core:
+                st.success(f"Opened {len(df_loaded):,} rows from '{parquet_source}'; they are too many to hold in "
+                           "memory, so analytics run out of core.")
+                st.caption("Cleaning rules are applied as the files are scanned, but rows with a duplicate "
+                           "EmployeeID are kept: finding them would need every ID in memory.")
+                display_quality_report(handle)
+                st.markdown("The first rows of the dataset:")
+                st.dataframe(df_loaded.head(100), use_container_width=True)
+            else:
+                st.success(f"Loaded {len(df_loaded):,} rows from '{parquet_source}' into memory.")
+                display_quality_report(handle)
+                display_paged_table(FrameSource(df_loaded), key="parquet_preview")
+            set_active_dataset(handle)
+
+    st.markdown("---")
+    st.subheader("Save a Snapshot for Trend Analysis")
+    st.info("Saves the active dataset as a dated snapshot. Descriptive Analytics charts quarter-over-quarter "
+            "trends from the latest snapshot in each quarter.")
+    snapshot_date = st.date_input("Snapshot date", value=pd.Timestamp.today().date(), key="snapshot_date")
+    if st.button("Save Snapshot"):
+        if is_out_of_core(get_active_dataset()):
+            st.warning("The active dataset is analyzed out of core and cannot be saved as a snapshot.")
+        else:
+            path = save_snapshot(get_active_dataset(), snapshot_date)
+            st.success(f"Snapshot for {snapshot_date} saved to '{path}'.")
+
     st.markdown("---")
     st.subheader("Generate Analysis")
     if st.button("Generate Analysis"):
-        if st.session_state['employee_data'] is not None and not st.session_state['employee_data'].empty:
+        if not get_active_dataset().empty:
             st.success("Data is ready! Navigate to 'Descriptive Analytics', 'Diagnostic Analytics', or 'Predictive Analytics' to view the analysis.")
             st.balloons() # A little visual flair
         else:
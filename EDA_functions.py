@@ -2,40 +2,56 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 
-import numpy as np
+from enrichment import enrich_employee_data
+from figure_cache import cached_figures
+from instrumentation import instrumented
+from aggregate_store import get_aggregate_store
+from aggregate_cube import get_aggregate_cube
+from schema import UNKNOWN
+from out_of_core import is_out_of_core
+from utils import display_notes
+from trend_functions import display_quarterly_trends
+from chart_utils import histogram_summary, histogram_figure, box_summary, box_figure, compact_figure
 
+@cached_figures("descriptive")
 def get_descriptive_analytics_figures(df):
     figures = {}
 
-    if 'HireDate' in df.columns and 'TenureYears' not in df.columns:
-        df['HireDate'] = pd.to_datetime(df['HireDate'])
-        df['TenureYears'] = (pd.to_datetime('today') - df['HireDate']).dt.days / 365.25
-    elif 'TenureYears' not in df.columns:
-        df['TenureYears'] = pd.Series(np.random.rand(len(df)) * 10).round(1) 
+    df = enrich_employee_data(df)
 
-    fig_tenure = px.histogram(df, x='TenureYears', nbins=15, title='Employee Tenure Distribution',
-                              labels={'TenureYears': 'Tenure (Years)'},
-                              color_discrete_sequence=px.colors.qualitative.Pastel)
+    # Bin on the server so the figure carries bin counts rather than every employee row
+    fig_tenure = histogram_figure(histogram_summary(df, 'TenureYears', nbins=15),
+                                  title='Employee Tenure Distribution', x_label='Tenure (Years)',
+                                  colors=px.colors.qualitative.Pastel)
     figures["Employee Tenure Distribution"] = fig_tenure
 
     if 'Salary' in df.columns and 'Department' in df.columns:
-        fig_salary_dept = px.box(df, x='Department', y='Salary', title='Salary Distribution by Department',
-                                 color='Department', color_discrete_sequence=px.colors.qualitative.Pastel)
+        fig_salary_dept = box_figure(box_summary(df, 'Department', 'Salary'),
+                                     title='Salary Distribution by Department', x_label='Department',
+                                     y_label='Salary', colors=px.colors.qualitative.Pastel)
         figures["Salary Distribution by Department"] = fig_salary_dept
-    else:
-        st.warning("Cannot generate 'Salary Distribution by Department' chart: 'Salary' or 'Department' column missing.")
 
     if 'Gender' in df.columns:
-        gender_counts = df['Gender'].value_counts().reset_index()
+        headcount = get_aggregate_cube(df).rollup(by='Gender')['Headcount'].drop(UNKNOWN, errors='ignore')
+        gender_counts = headcount.sort_values(ascending=False, kind='stable').reset_index()
         gender_counts.columns = ['Gender', 'Count']
         fig_gender = px.pie(gender_counts, values='Count', names='Gender', title='Workforce Gender Distribution',
                             color_discrete_sequence=px.colors.qualitative.Pastel)
         figures["Workforce Gender Distribution"] = fig_gender
-    else:
-        st.warning("Cannot generate 'Workforce Gender Distribution' chart: 'Gender' column missing.")
 
     return figures
 
+
+def get_descriptive_analytics_notes(figures):
+    """Why charts are missing from `figures`, as (level, message) pairs for the page or CLI to show."""
+    notes = []
+    if "Salary Distribution by Department" not in figures:
+        notes.append(('warning', "Cannot generate 'Salary Distribution by Department' chart: 'Salary' or 'Department' column missing."))
+    if "Workforce Gender Distribution" not in figures:
+        notes.append(('warning', "Cannot generate 'Workforce Gender Distribution' chart: 'Gender' column missing."))
+    return notes
+
+@instrumented('page.descriptive')
 def display_descriptive_analytics_page(df):
     st.set_page_config(page_title="Descriptive Analytics")
     st.header("Descriptive Analytics: Understanding Your Workforce")
@@ -45,23 +61,31 @@ def display_descriptive_analytics_page(df):
 
     st.subheader("Employee Demographics and Distribution")
 
+    df = enrich_employee_data(df)
+    # Headline metrics come from the incremental aggregate store rather than a scan of the frame;
+    # out-of-core datasets have no frame to fold, so they roll up the cube built from their scan
+    store = None if is_out_of_core(df) else get_aggregate_store(df)
+    totals = (get_aggregate_cube(df).rollup() if store is None else store.summary()).fillna(0)
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Total Employees", df.shape[0])
-        # Ensure 'TenureYears' is calculated before displaying
-        if 'HireDate' in df.columns and 'TenureYears' not in df.columns:
-            df['HireDate'] = pd.to_datetime(df['HireDate'])
-            df['TenureYears'] = (pd.to_datetime('today') - df['HireDate']).dt.days / 365.25
-        avg_tenure = df['TenureYears'].mean() if 'TenureYears' in df.columns else 0
-        st.metric("Average Tenure", f"{avg_tenure:.1f} years")
+        st.metric("Total Employees", int(totals['Headcount']))
+        st.metric("Average Tenure", f"{totals['AvgTenureYears']:.1f} years")
     with col2:
-        avg_salary = df['Salary'].mean() if 'Salary' in df.columns else 0
-        st.metric("Average Salary", f"${avg_salary:,.0f}")
-        avg_engagement = df['EngagementScore'].mean() if 'EngagementScore' in df.columns else 0
-        st.metric("Average Engagement Score", f"{avg_engagement:.1f}")
+        st.metric("Average Salary", f"${totals['AvgSalary']:,.0f}")
+        st.metric("Average Engagement Score", f"{totals['AvgEngagementScore']:.1f}")
+    if store is not None:
+        # Read from the store's quantile sketch, within SKETCH_ALPHA (1%) of the exact median
+        median_salary = store.quantile('Salary', 0.5)
+        if pd.notna(median_salary):
+            with col2:
+                st.metric("Median Salary", f"${median_salary:,.0f}", help="Approximate, to within 1%.")
 
     st.markdown("---")
     figures = get_descriptive_analytics_figures(df)
+    display_notes(get_descriptive_analytics_notes(figures))
     for title, fig in figures.items():
         st.subheader(title)
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        st.plotly_chart(compact_figure(fig), use_container_width=True)
+
+    st.markdown("---")
+    display_quarterly_trends()
@@ -0,0 +1,185 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from figure_cache import dataset_fingerprint
+from instrumentation import instrumented
+from schema import GROUP_DIMENSIONS, HISTOGRAMS, MEASURES, UNKNOWN, measure_name
+
+DIMENSIONS = [*GROUP_DIMENSIONS, 'TenureBand']
+# Tenure bands as (lower edge in years, label); the last band is open-ended.
+TENURE_BANDS = [(0, '<1 yr'), (1, '1-3 yrs'), (3, '3-5 yrs'), (5, '5-10 yrs'), (10, '10+ yrs')]
+MAX_CUBES = 4
+
+
+def _dimension_labels(df, dim):
+    """Labels of one dimension in category order, with UNKNOWN appended if any value is missing."""
+    if dim == 'TenureBand':
+        labels = [label for _, label in TENURE_BANDS]
+        missing = 'TenureYears' not in df.columns or df['TenureYears'].isna().any()
+    elif dim in df.columns:
+        column = df[dim] if isinstance(df[dim].dtype, pd.CategoricalDtype) else df[dim].astype('category')
+        labels = [str(c) for c in column.cat.categories]
+        missing = column.isna().any()
+    else:
+        labels, missing = [], True
+    if missing and len(df) and UNKNOWN not in labels:
+        labels.append(UNKNOWN)
+    return labels
+
+
+def _dimension_codes(df, dim, labels):
+    """Integer codes of one dimension into `labels`; missing values (and labels not listed) get UNKNOWN's code."""
+    if dim == 'TenureBand':
+        tenure = (df['TenureYears'].to_numpy(dtype=float, na_value=np.nan) if 'TenureYears' in df.columns
+                  else np.full(len(df), np.nan))
+        codes = np.searchsorted([lower for lower, _ in TENURE_BANDS[1:]], tenure, side='right')
+        missing = np.isnan(tenure)
+    elif dim in df.columns:
+        column = df[dim] if isinstance(df[dim].dtype, pd.CategoricalDtype) else df[dim].astype('category')
+        # Map this frame's categories onto `labels`, which may be shared by many frames
+        lookup = pd.Index(labels).get_indexer(column.cat.categories.astype(str))
+        codes = np.append(lookup, -1)[column.cat.codes.to_numpy()]
+        missing = codes < 0
+    else:
+        codes = np.zeros(len(df), dtype=np.int64)
+        missing = np.ones(len(df), dtype=bool)
+    if missing.any():
+        codes = np.where(missing, labels.index(UNKNOWN), codes)
+    return codes.astype(np.int64)
+
+
+def merge_labels(labels, more):
+    """Union of two label lists for one dimension, in order of first appearance, UNKNOWN kept last."""
+    merged = [label for label in labels if label != UNKNOWN]
+    merged += [label for label in more if label != UNKNOWN and label not in merged]
+    if UNKNOWN in labels or UNKNOWN in more:
+        merged.append(UNKNOWN)
+    return merged
+
+
+class AggregateCube:
+    """Counts, sums and fixed-bin histograms per department x role x gender x tenure band cell."""
+
+    def __init__(self, labels, count, sums, nonnull, hist, exact):
+        self.labels = labels
+        self.count = count
+        self.sums = sums
+        self.nonnull = nonnull
+        self.hist = hist
+        # Measures whose histogram has one bin per distinct value
+        self.exact = exact
+
+    @classmethod
+    def build(cls, df):
+        return cls.from_batches([df], {dim: _dimension_labels(df, dim) for dim in DIMENSIONS})
+
+    @classmethod
+    @instrumented('cube.build', rows=lambda args, cube: int(cube.count.sum()))
+    def from_batches(cls, batches, labels):
+        """Builds the cube from frames seen one at a time, over fixed `labels`."""
+        shape = tuple(max(len(labels[dim]), 1) for dim in DIMENSIONS)
+        n_cells = int(np.prod(shape))
+        count = np.zeros(n_cells, dtype=np.int64)
+        sums = {m: np.zeros(n_cells) for m in MEASURES}
+        nonnull = {m: np.zeros(n_cells, dtype=np.int64) for m in MEASURES}
+        hist = {m: np.zeros(n_cells * spec[2], dtype=np.int64) for m, spec in HISTOGRAMS.items()}
+        exact = {m: True for m in HISTOGRAMS}
+        for df in batches:
+            cell = np.ravel_multi_index([_dimension_codes(df, dim, labels[dim]) for dim in DIMENSIONS], shape)
+            count += np.bincount(cell, minlength=n_cells)
+            for m in MEASURES:
+                values = (df[m].to_numpy(dtype=float, na_value=np.nan) if m in df.columns
+                          else np.full(len(df), np.nan))
+                present = ~np.isnan(values)
+                values, present_cell = values[present], cell[present]
+                sums[m] += np.bincount(present_cell, weights=values, minlength=n_cells)
+                nonnull[m] += np.bincount(present_cell, minlength=n_cells)
+                if m in HISTOGRAMS:
+                    start, width, n_bins = HISTOGRAMS[m]
+                    position = (values - start) / width
+                    bins = np.clip(np.floor(position), 0, n_bins - 1).astype(np.int64)
+                    exact[m] = exact[m] and bool(np.all(position == bins))
+                    hist[m] += np.bincount(present_cell * n_bins + bins, minlength=n_cells * n_bins)
+        return cls(labels, count.reshape(shape), {m: v.reshape(shape) for m, v in sums.items()},
+                   {m: v.reshape(shape) for m, v in nonnull.items()},
+                   {m: v.reshape(shape + (HISTOGRAMS[m][2],)) for m, v in hist.items()}, exact)
+
+    def _index(self, filters):
+        """Open-mesh index selecting the labels in `filters` ({dimension: value or list of values})."""
+        filters = filters or {}
+        index = []
+        for dim in DIMENSIONS:
+            labels = self.labels[dim]
+            if dim in filters:
+                wanted = {filters[dim]} if isinstance(filters[dim], str) else set(map(str, filters[dim]))
+                index.append([i for i, label in enumerate(labels) if label in wanted])
+            else:
+                index.append(list(range(len(labels))))
+        return index
+
+    def _rolled(self, array, by, index):
+        """Sums the selected part of `array` over every dimension not in `by`, leaving the `by` axes in `by` order."""
+        # Histogram arrays carry a trailing bin axis, which the open mesh leaves untouched
+        selected = array[np.ix_(*[np.asarray(i, dtype=np.intp) for i in index])]
+        rolled = selected.sum(axis=tuple(i for i, dim in enumerate(DIMENSIONS) if dim not in by))
+        kept = [dim for dim in DIMENSIONS if dim in by]
+        return np.moveaxis(rolled, [kept.index(dim) for dim in by], list(range(len(by))))
+
+    def _group_index(self, by, index):
+        labels = [[self.labels[dim][i] for i in index[DIMENSIONS.index(dim)]] for dim in by]
+        if len(by) == 1:
+            return pd.Index(labels[0], name=by[0])
+        return pd.MultiIndex.from_product(labels, names=by)
+
+    def rollup(self, by=None, filters=None):
+        """Headcount, means and attrition rate per non-empty `by` group, or the slice total as a Series."""
+        by = [by] if isinstance(by, str) else list(by or [])
+        index = self._index(filters)
+        result = {'Headcount': self._rolled(self.count, by, index).ravel()}
+        for m in MEASURES:
+            total = self._rolled(self.sums[m], by, index).ravel()
+            n = self._rolled(self.nonnull[m], by, index).ravel()
+            result[measure_name(m)] = np.divide(total, n, out=np.full(total.shape, np.nan), where=n > 0)
+        if not by:
+            return pd.Series({name: values[0] for name, values in result.items()})
+        frame = pd.DataFrame(result, index=self._group_index(by, index))
+        return frame[frame['Headcount'] > 0]
+
+    def histogram(self, measure, by=None, filters=None):
+        """(bin edges, {group: counts}) of a measure over a slice; a single None group without `by`."""
+        start, width, n_bins = HISTOGRAMS[measure]
+        index = self._index(filters)
+        edges = start + width * np.arange(n_bins + 1)
+        if by is None:
+            return edges, {None: self._rolled(self.hist[measure], [], index)}
+        counts = self._rolled(self.hist[measure], [by], index)
+        labels = [self.labels[by][i] for i in index[DIMENSIONS.index(by)]]
+        return edges, {label: c for label, c in zip(labels, counts) if c.any()}
+
+
+@st.cache_resource(show_spinner=False)
+def _cubes():
+    return OrderedDict()
+
+
+_cubes_lock = threading.Lock()
+
+
+def get_aggregate_cube(df):
+    """Returns the cube for this dataset version, building it on first use."""
+    key = (dataset_fingerprint(df), tuple(c for c in [*DIMENSIONS, *MEASURES] if c in df.columns))
+    with _cubes_lock:
+        cubes = _cubes()
+        if key in cubes:
+            cubes.move_to_end(key)
+            return cubes[key]
+    cube = AggregateCube.build(df) if isinstance(df, pd.DataFrame) else df.build_cube()
+    with _cubes_lock:
+        cubes[key] = cube
+        while len(cubes) > MAX_CUBES:
+            cubes.popitem(last=False)
+    return cube
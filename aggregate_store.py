@@ -0,0 +1,214 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from figure_cache import dataset_fingerprint
+from schema import GROUP_DIMENSIONS as DIMENSIONS, HISTOGRAMS, MEASURES, UNKNOWN, measure_name
+
+# Log-bucketed quantile sketches, accurate to SKETCH_ALPHA relative error
+SKETCH_MEASURES = ['Salary']
+SKETCH_ALPHA = 0.01
+SKETCH_BUCKETS = 1200
+_SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+
+
+def _histogram_bins(values, spec):
+    start, width, count = spec
+    return np.clip(np.floor((np.nan_to_num(values, nan=start) - start) / width), 0, count - 1).astype(np.int64)
+
+
+def _sketch_buckets(values):
+    """Bucket 0 holds values <= 1; bucket i holds (gamma^(i-1), gamma^i]."""
+    safe = np.maximum(np.nan_to_num(values, nan=1.0), 1.0)
+    return np.clip(np.ceil(np.log(safe) / math.log(_SKETCH_GAMMA)), 0, SKETCH_BUCKETS - 1).astype(np.int64)
+
+
+class AggregateStore:
+    """Running per-(department, role, gender) aggregates, updated with only new or changed rows.
+
+    Rows are matched on `id_column`; rows at or below the last `watermark_column` value are skipped.
+    """
+
+    def __init__(self, id_column='EmployeeID', watermark_column=None):
+        self.id_column = id_column
+        self.watermark_column = watermark_column
+        self.watermark = None
+        self.version = None
+        self._lock = threading.RLock()
+        self._groups = {}
+        self._count = np.zeros(0, dtype=np.int64)
+        self._sums = {m: np.zeros(0) for m in MEASURES}
+        self._nonnull = {m: np.zeros(0, dtype=np.int64) for m in MEASURES}
+        self._hist = {m: np.zeros((0, spec[2]), dtype=np.int64) for m, spec in HISTOGRAMS.items()}
+        self._sketch = {m: np.zeros((0, SKETCH_BUCKETS), dtype=np.int64) for m in SKETCH_MEASURES}
+        # Last folded state of each row, by id, to retract when it changes
+        self._rows = pd.DataFrame({'gid': pd.Series(dtype=np.int32), 'hash': pd.Series(dtype=np.uint64),
+                                   **{m: pd.Series(dtype=np.float32) for m in MEASURES}})
+
+    def _group_ids(self, df):
+        dims = pd.DataFrame({
+            dim: df[dim].astype(object).where(df[dim].notna(), UNKNOWN) if dim in df.columns else UNKNOWN
+            for dim in DIMENSIONS
+        }, index=df.index)
+        codes, uniques = pd.MultiIndex.from_frame(dims).factorize()
+        lookup = np.array([self._groups.setdefault(tuple(map(str, key)), len(self._groups)) for key in uniques],
+                          dtype=np.int32)
+        self._grow(len(self._groups))
+        return lookup[codes] if len(codes) else np.zeros(0, dtype=np.int32)
+
+    def _grow(self, n_groups):
+        extra = n_groups - self._count.size
+        if extra <= 0:
+            return
+        self._count = np.concatenate([self._count, np.zeros(extra, dtype=np.int64)])
+        for m in MEASURES:
+            self._sums[m] = np.concatenate([self._sums[m], np.zeros(extra)])
+            self._nonnull[m] = np.concatenate([self._nonnull[m], np.zeros(extra, dtype=np.int64)])
+        for m in self._hist:
+            self._hist[m] = np.vstack([self._hist[m], np.zeros((extra, self._hist[m].shape[1]), dtype=np.int64)])
+        for m in self._sketch:
+            self._sketch[m] = np.vstack([self._sketch[m], np.zeros((extra, SKETCH_BUCKETS), dtype=np.int64)])
+
+    def _apply(self, gid, values, sign):
+        """Adds (sign=1) or retracts (sign=-1) the contributions of a batch of rows."""
+        n_groups = self._count.size
+        self._count += sign * np.bincount(gid, minlength=n_groups)
+        for m in MEASURES:
+            v = values[m]
+            present = ~np.isnan(v)
+            self._sums[m] += sign * np.bincount(gid[present], weights=v[present], minlength=n_groups)
+            self._nonnull[m] += sign * np.bincount(gid[present], minlength=n_groups)
+        for m, spec in HISTOGRAMS.items():
+            present = ~np.isnan(values[m])
+            flat = gid[present].astype(np.int64) * spec[2] + _histogram_bins(values[m][present], spec)
+            self._hist[m] += sign * np.bincount(flat, minlength=n_groups * spec[2]).reshape(n_groups, spec[2])
+        for m in SKETCH_MEASURES:
+            present = ~np.isnan(values[m])
+            flat = gid[present].astype(np.int64) * SKETCH_BUCKETS + _sketch_buckets(values[m][present])
+            self._sketch[m] += sign * np.bincount(flat, minlength=n_groups * SKETCH_BUCKETS).reshape(n_groups, SKETCH_BUCKETS)
+
+    def _retract_missing(self, ids):
+        """Retracts every stored row whose id is not in `ids`. Returns how many were removed."""
+        gone = ~self._rows.index.isin(ids)
+        if not gone.any():
+            return 0
+        old = self._rows[gone]
+        self._apply(old['gid'].to_numpy(dtype=np.int32), {m: old[m].to_numpy(dtype=float) for m in MEASURES}, -1)
+        self._rows = self._rows[~gone]
+        return int(gone.sum())
+
+    def fold(self, df, full_snapshot=False):
+        """Folds a batch into the store; a `full_snapshot` also retracts ids it lacks. Returns the rows changed."""
+        with self._lock:
+            retracted = self._retract_missing(df[self.id_column].to_numpy()) if full_snapshot else 0
+            if self.watermark_column and self.watermark is not None:
+                df = df[df[self.watermark_column] > self.watermark]
+            if df.empty:
+                return retracted
+            df = df.drop_duplicates(subset=self.id_column, keep='last')
+            ids = df[self.id_column].to_numpy()
+            row_hash = pd.util.hash_pandas_object(
+                df[[c for c in [*DIMENSIONS, *MEASURES] if c in df.columns]], index=False).to_numpy()
+
+            # Not reindex: missing ids would turn the uint64 hashes into floats
+            position = self._rows.index.get_indexer(ids)
+            is_new = position < 0
+            is_changed = ~is_new
+            is_changed[is_changed] = self._rows['hash'].to_numpy()[position[is_changed]] != row_hash[is_changed]
+            touched = is_new | is_changed
+            if not touched.any():
+                return retracted
+
+            if is_changed.any():
+                old = self._rows.iloc[position[is_changed]]
+                self._apply(old['gid'].to_numpy(dtype=np.int32),
+                            {m: old[m].to_numpy(dtype=float) for m in MEASURES}, -1)
+
+            batch = df[touched]
+            gid = self._group_ids(batch)
+            # Round through float32 (the precision rows are kept at) so retractions hit the same bins
+            values = {
+                m: batch[m].to_numpy(dtype=np.float32, na_value=np.nan).astype(float) if m in batch.columns
+                else np.full(len(batch), np.nan)
+                for m in MEASURES
+            }
+            self._apply(gid, values, 1)
+
+            updates = pd.DataFrame({'gid': gid, 'hash': row_hash[touched],
+                                    **{m: values[m].astype(np.float32) for m in MEASURES}},
+                                   index=pd.Index(ids[touched], name=self.id_column))
+            self._rows = pd.concat([self._rows.drop(index=ids[is_changed]), updates])
+            if self.watermark_column:
+                batch_max = df[self.watermark_column].max()
+                self.watermark = batch_max if self.watermark is None else max(self.watermark, batch_max)
+            return int(touched.sum()) + retracted
+
+    def _selected(self, filters):
+        """Group ids matching `filters` ({dimension: value or list of values})."""
+        filters = filters or {}
+        keys = list(self._groups)
+        keep = [
+            gid for gid, key in enumerate(keys)
+            if all(key[DIMENSIONS.index(dim)] in ([v] if isinstance(v, str) else list(map(str, v)))
+                   for dim, v in filters.items())
+        ]
+        return np.array(keep, dtype=np.int64), keys
+
+    def summary(self, by=None, filters=None):
+        """Headcount, means and attrition rate, rolled up to the `by` dimensions (the total if `by` is None)."""
+        with self._lock:
+            gids, keys = self._selected(filters)
+            by = [by] if isinstance(by, str) else list(by or [])
+            frame = pd.DataFrame(
+                {**{dim: [keys[g][DIMENSIONS.index(dim)] for g in gids] for dim in by},
+                 'Headcount': self._count[gids],
+                 **{f'sum_{m}': self._sums[m][gids] for m in MEASURES},
+                 **{f'n_{m}': self._nonnull[m][gids] for m in MEASURES}})
+        rolled = frame.groupby(by, sort=True).sum() if by else frame.sum().to_frame().T
+        result = pd.DataFrame({'Headcount': rolled['Headcount']}, index=rolled.index)
+        for m in MEASURES:
+            result[measure_name(m)] = rolled[f'sum_{m}'] / rolled[f'n_{m}'].where(rolled[f'n_{m}'] > 0)
+        return result[result['Headcount'] > 0] if by else result.iloc[0]
+
+    def histogram(self, measure, filters=None):
+        """(bin edges, counts) of a fixed-bin histogram over the selected groups."""
+        start, width, count = HISTOGRAMS[measure]
+        with self._lock:
+            gids, _ = self._selected(filters)
+            counts = self._hist[measure][gids].sum(axis=0)
+        return start + width * np.arange(count + 1), counts
+
+    def quantile(self, measure, q, filters=None):
+        """Approximate quantile(s) of a sketched measure over the selected groups."""
+        with self._lock:
+            gids, _ = self._selected(filters)
+            buckets = self._sketch[measure][gids].sum(axis=0)
+        total = buckets.sum()
+        if total == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        idx = np.searchsorted(np.cumsum(buckets), np.asarray(q) * (total - 1), side='right')
+        return np.where(idx == 0, 1.0, 2 * _SKETCH_GAMMA ** idx / (_SKETCH_GAMMA + 1))
+
+
+@st.cache_resource(show_spinner=False)
+def _stores():
+    return {}
+
+
+_stores_lock = threading.Lock()
+
+
+def get_aggregate_store(df):
+    """Returns the process-wide store for `df`'s source, folding in `df` as a full snapshot if it is a new version."""
+    version = dataset_fingerprint(df)
+    source = df.attrs.get('dataset_source') or version
+    with _stores_lock:
+        store = _stores().setdefault(source, AggregateStore())
+    with store._lock:
+        if store.version != version:
+            store.fold(df, full_snapshot=True)
+            store.version = version
+    return store
@@ -1,19 +1,22 @@
-import streamlit as st
-import pandas as pd
-import base64
 import os
-from data_utils import generate_dummy_data
-from EDA_functions import display_descriptive_analytics_page, get_descriptive_analytics_figures    
-from diagnostic_functions import display_diagnostic_analytics_page, get_diagnostic_analytics_figures
-from predictive_functions import display_predictive_analytics_page, get_predictive_analytics_figures
-from report_generation import generate_full_report_pdf
-from Data_Inegestion import dispaly_data_ingestion
-from utils import display_footer
+import sys
+
+# Sessions share cached frames; copy-on-write (default from pandas 3) keeps in-place writes private
+if "pandas" in sys.modules:
+    if int(sys.modules["pandas"].__version__.split(".")[0]) < 3:
+        sys.modules["pandas"].set_option("mode.copy_on_write", True)
+else:
+    os.environ.setdefault("PANDAS_COPY_ON_WRITE", "1")
+
+import streamlit as st
+import instrumentation
+from utils import display_footer, display_notes
+from static_assets import LOGO_PATH, HERO_IMAGE_PATH, HEADER_LOGO_WIDTH, header_logo, hero_image, page_icon
 from streamlit_option_menu import option_menu
 
 st.set_page_config(
     page_title="Apexon Pulse",
-    page_icon="Images/logo.jpg",  
+    page_icon=page_icon() or "📊",
     layout="wide",
     initial_sidebar_state="expanded",
     menu_items={
@@ -30,11 +33,11 @@ st.set_page_config(
 header_col1, header_col2 = st.columns([0.15, 0.85]) 
 
 with header_col1:
-    logo_path = "Images/logo.jpg"
-    try:
-        st.image(logo_path, width=100)  # Adjust width for main header logo
-    except FileNotFoundError:
-        st.warning(f"Main logo image not found at '{logo_path}'. Please ensure 'logo.jpg' is in the same directory.")
+    logo = header_logo()
+    if logo is not None:
+        st.image(logo, width=HEADER_LOGO_WIDTH)  # Adjust width for main header logo
+    else:
+        st.warning(f"Main logo image not found at '{LOGO_PATH}'. Please ensure 'logo.jpg' is in the same directory.")
         st.image("https://placehold.co/100x30/ADD8E6/000000?text=Logo+Missing", width=100)
 
 with header_col2:
@@ -46,11 +49,18 @@ This demonstration simulates how Apexon Pulse leverages your employee data to pr
 predict future trends, and automate reporting.
 """)
 
+pages = ["Home", "Data Ingestion", "Descriptive Analytics", "Diagnostic Analytics", "Predictive Analytics", "Automated Reporting"]
+page_icons = ["house", "cloud-upload", "bar-chart", "search", "graph-up", "file-earmark-text"]
+if instrumentation.ENABLED:
+    # Hidden unless metrics are switched on with APEXON_PULSE_METRICS=1
+    pages.append("Performance")
+    page_icons.append("speedometer2")
+
 with st.sidebar:
     page = option_menu(
         menu_title="Navigation", 
-        options=["Home", "Data Ingestion", "Descriptive Analytics", "Diagnostic Analytics", "Predictive Analytics", "Automated Reporting"],  # required
-        icons=["house", "cloud-upload", "bar-chart", "search", "graph-up", "file-earmark-text"], 
+        options=pages,  # required
+        icons=page_icons, 
         menu_icon="cast",  
         default_index=0,  
         orientation="vertical",
@@ -67,16 +77,16 @@ with st.sidebar:
     """,
     unsafe_allow_html=True
     )
-    if 'employee_data' not in st.session_state or st.session_state['employee_data'] is None:
-        st.session_state['employee_data'] = generate_dummy_data()
+
+# Page modules are imported, and the dataset loaded, only when a page needs them
 
 if page == "Home":
     st.header("Transforming HR with AI-Driven Employee Analytics")
-    hero_image_path = "Images/heroimage.png"
-    try:
-        st.image(hero_image_path, caption="Apexon Pulse: AI-Driven HR Transformation", use_container_width=True)
-    except FileNotFoundError:
-        st.warning(f"Hero image not found at '{hero_image_path}'. Please ensure 'heroimage.png' is in the same directory.")
+    hero = hero_image()
+    if hero is not None:
+        st.image(hero, caption="Apexon Pulse: AI-Driven HR Transformation", use_container_width=True)
+    else:
+        st.warning(f"Hero image not found at '{HERO_IMAGE_PATH}'. Please ensure 'heroimage.png' is in the same directory.")
         st.image("https://placehold.co/1200x400/ADD8E6/000000?text=Hero+Image+Missing", caption="Placeholder Image", use_column_width=True)
 
     st.markdown("""
@@ -88,22 +98,40 @@ if page == "Home":
     display_footer()
 
 elif page == "Data Ingestion":
-    dispaly_data_ingestion(st.session_state['employee_data'])
+    from dataset_registry import get_active_dataset
+    from Data_Inegestion import dispaly_data_ingestion
+    dispaly_data_ingestion(get_active_dataset())
     display_footer()
 
 elif page == "Descriptive Analytics":
-    display_descriptive_analytics_page(st.session_state['employee_data'])
+    from dataset_registry import get_active_dataset
+    from EDA_functions import display_descriptive_analytics_page
+    display_descriptive_analytics_page(get_active_dataset())
     display_footer()
 
 elif page == "Diagnostic Analytics":
-    display_diagnostic_analytics_page(st.session_state['employee_data'])
+    from dataset_registry import get_active_dataset
+    from diagnostic_functions import display_diagnostic_analytics_page
+    display_diagnostic_analytics_page(get_active_dataset())
     display_footer()
 
 elif page == "Predictive Analytics":
-    display_predictive_analytics_page(st.session_state['employee_data'])
+    from dataset_registry import get_active_dataset
+    from predictive_functions import display_predictive_analytics_page
+    display_predictive_analytics_page(get_active_dataset())
     display_footer()
 
 elif page == "Automated Reporting":
+    from dataset_registry import get_active_dataset, get_active_handle
+    from EDA_functions import get_descriptive_analytics_figures, get_descriptive_analytics_notes
+    from diagnostic_functions import get_diagnostic_analytics_figures, get_diagnostic_analytics_notes
+    from predictive_functions import get_predictive_analytics_figures, get_predictive_analytics_notes
+    from report_jobs import get_report_queue, display_report_job
+    from chart_utils import compact_figure
+    from paged_table import FrameSource, display_paged_table
+    from out_of_core import is_out_of_core
+    employee_data = get_active_dataset()
+
     st.header("Automated Reporting & Distribution")
     st.markdown("""
     The `ReportSynthesizerAgent` compiles clear, actionable reports with integrated charts and professional formatting,
@@ -114,16 +142,18 @@ elif page == "Automated Reporting":
 
     # Display all analysis sections with charts directly on the page
     st.markdown("### 1. Descriptive Analytics")
-    desc_figs = get_descriptive_analytics_figures(st.session_state['employee_data'])
+    desc_figs = get_descriptive_analytics_figures(employee_data)
+    display_notes(get_descriptive_analytics_notes(desc_figs))
     for title, fig in desc_figs.items():
         st.subheader(title)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(compact_figure(fig), use_container_width=True)
 
     st.markdown("### 2. Diagnostic Analytics")
-    diag_figs = get_diagnostic_analytics_figures(st.session_state['employee_data'])
+    diag_figs = get_diagnostic_analytics_figures(employee_data)
+    display_notes(get_diagnostic_analytics_notes(employee_data, diag_figs))
     for title, fig in diag_figs.items():
         st.subheader(title)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(compact_figure(fig), use_container_width=True)
     st.markdown("""
     **Apexon Pulse's Recommendations for Engineering:**
     * Implement targeted retention programs for employees in their early career stages.
@@ -132,12 +162,13 @@ elif page == "Automated Reporting":
     """)
 
     st.markdown("### 3. Predictive Analytics")
-    pred_figs, top_risks_df = get_predictive_analytics_figures(st.session_state['employee_data'])
+    pred_figs, top_risks_df = get_predictive_analytics_figures(employee_data)
+    display_notes(get_predictive_analytics_notes(employee_data, pred_figs))
     for title, fig in pred_figs.items():
         st.subheader(title)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(compact_figure(fig), use_container_width=True)
     st.markdown("#### Top 20 Employees with Highest Attrition Risk:")
-    st.dataframe(top_risks_df)
+    display_paged_table(FrameSource(top_risks_df), key="report_risk_table", page_size=25)
     st.markdown("""
     **How this supports Strategic Planning:**
     * **Proactive Talent Retention:** Identify high-risk employees and intervene with targeted programs (mentorship, skill development, workload rebalancing).
@@ -148,20 +179,20 @@ elif page == "Automated Reporting":
     st.markdown("---")
     st.subheader("Generate and Download Report")
 
-    # NEW: Add the download PDF button
+    # The report is built by the background job queue; the page polls for its status instead of blocking
     if st.button("Download Full Report (PDF)"):
-        with st.spinner("Generating PDF report... This may take a moment."):
-            pdf_bytes = generate_full_report_pdf(st.session_state['employee_data'])
-            if pdf_bytes:
-                st.download_button(
-                    label="Click to Download PDF",
-                    data=pdf_bytes,
-                    file_name="HR_Quarterly_Review_Report.pdf",
-                    mime="application/pdf"
-                )
-                st.success("PDF report generated and ready for download!")
-            else:
-                st.error("Failed to generate PDF report.")
+        st.session_state["report_job_id"] = get_report_queue().submit(get_active_handle())
+    if "report_job_id" in st.session_state:
+        display_report_job(st.session_state["report_job_id"])
+
+    if is_out_of_core(employee_data):
+        # Per-department reports sort and slice the rows, so they need the dataset in memory
+        st.info("Department reports are not available for datasets analyzed out of core.")
+    elif 'Department' in employee_data.columns:
+        if st.button("Download Department Reports (ZIP)"):
+            st.session_state["department_reports_job_id"] = get_report_queue().submit(get_active_handle(), 'departments')
+        if "department_reports_job_id" in st.session_state:
+            display_report_job(st.session_state["department_reports_job_id"])
 
     st.markdown("""
     **Benefits of Automated Reporting:**
@@ -170,4 +201,9 @@ elif page == "Automated Reporting":
     * **Timely Insights:** Stakeholders receive critical information promptly.
     * **Seamless Distribution:** Reports are automatically shared through Teams channels, Outlook, and SharePoint uploads.
     """)
-    display_footer() 
\ No newline at end of file
+    display_footer() 
+
+elif page == "Performance":
+    from performance_page import display_performance_page
+    display_performance_page()
+    display_footer()
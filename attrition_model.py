@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from figure_cache import content_fingerprint, dataset_fingerprint
+from instrumentation import instrumented
+from utils import atomic_path
+
+NUMERIC_FEATURES = ['EngagementScore', 'TenureYears', 'Salary', 'PerformanceRating']
+CATEGORICAL_FEATURES = ['Department', 'Role']
+MODEL_DIR = os.environ.get("APEXON_PULSE_MODEL_DIR", "models")
+# Bump when features or training change so persisted models are retrained.
+MODEL_VERSION = "2"
+# Persisted models kept in MODEL_DIR; the least recently written beyond this are deleted
+MAX_SAVED_MODELS = 32
+
+MAX_TRAINING_ROWS = 200_000
+SCORING_CHUNK_SIZE = 250_000
+# Score vectors kept in memory (4 bytes per employee each), most recently used dataset versions first
+MAX_CACHED_SCORES = 4
+
+_models = {}
+_models_lock = threading.Lock()
+_scores = OrderedDict()
+
+
+def _design_matrix(model, df):
+    """Standardized numeric features, one-hot categoricals and an intercept column, as float64."""
+    n = len(df)
+    width = 1 + len(model['numeric']) + sum(len(cats) for cats in model['categories'].values())
+    X = np.zeros((n, width))
+    X[:, 0] = 1.0
+    col = 1
+    for name, mean, std in zip(model['numeric'], model['means'], model['stds']):
+        if name in df.columns:
+            values = df[name].to_numpy(dtype=float, na_value=np.nan)
+            # Missing values sit at the mean, i.e. contribute nothing
+            X[:, col] = np.nan_to_num((values - mean) / std)
+        col += 1
+    for name, categories in model['categories'].items():
+        if name in df.columns:
+            codes = pd.Categorical(df[name], categories=categories).codes
+            known = codes >= 0
+            X[np.flatnonzero(known), col + codes[known]] = 1.0
+        col += len(categories)
+    return X
+
+
+@instrumented('model.train')
+def train_attrition_model(df, l2=1.0, max_iter=25, seed=0):
+    """Fits an L2-regularized logistic regression of `Attrition` by IRLS, on at most MAX_TRAINING_ROWS rows."""
+    if len(df) > MAX_TRAINING_ROWS:
+        df = df.iloc[np.sort(np.random.default_rng(seed).choice(len(df), MAX_TRAINING_ROWS, replace=False))]
+    # Unlabelled rows are dropped after sampling, so both backends fit the same rows
+    df = df[df['Attrition'].notna().to_numpy()]
+    numeric = [name for name in NUMERIC_FEATURES if name in df.columns]
+    model = {
+        'numeric': numeric,
+        'means': [float(df[name].mean()) for name in numeric],
+        'stds': [float(df[name].std()) or 1.0 for name in numeric],
+        'categories': {
+            name: [str(c) for c in pd.Series(df[name]).dropna().unique()]
+            for name in CATEGORICAL_FEATURES if name in df.columns
+        },
+    }
+    X = _design_matrix(model, df)
+    y = df['Attrition'].to_numpy(dtype=float)
+
+    weights = np.zeros(X.shape[1])
+    penalty = np.full(X.shape[1], l2)
+    penalty[0] = 0.0  # don't shrink the intercept
+    for _ in range(max_iter):
+        p = 1.0 / (1.0 + np.exp(-(X @ weights)))
+        gradient = X.T @ (p - y) + penalty * weights
+        hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < 1e-6:
+            break
+    model['weights'] = weights.tolist()
+    return model
+
+
+@instrumented('model.score', rows=lambda args, scores: len(scores))
+def score_attrition_risk(model, df, chunk_size=SCORING_CHUNK_SIZE):
+    """Attrition probability (0-100) for every row, scored in vectorized chunks to bound memory."""
+    weights = np.asarray(model['weights'])
+    scores = np.empty(len(df), dtype=np.float32)
+    for start in range(0, len(df), chunk_size):
+        X = _design_matrix(model, df.iloc[start:start + chunk_size])
+        scores[start:start + chunk_size] = 100.0 / (1.0 + np.exp(-(X @ weights)))
+    return scores
+
+
+def save_model(model, path):
+    with atomic_path(path) as tmp_path, open(tmp_path, 'w') as f:
+        json.dump(model, f)
+
+
+def load_model(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def model_path(df):
+    """Keyed on the dataset's contents, not the day."""
+    version = hashlib.sha256(f"{MODEL_VERSION}/{content_fingerprint(df)}".encode()).hexdigest()[:24]
+    return os.path.join(MODEL_DIR, f"attrition_{version}.json")
+
+
+def _prune_saved_models(keep=MAX_SAVED_MODELS):
+    entries = [e for e in os.scandir(MODEL_DIR)
+               if e.is_file() and e.name.startswith('attrition_') and e.name.endswith('.json')]
+    for entry in sorted(entries, key=lambda e: e.stat().st_mtime, reverse=True)[keep:]:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def has_attrition_labels(df):
+    """Whether `df` has recorded attrition outcomes, rather than none or imputed placeholders."""
+    return 'Attrition' in df.columns and 'Attrition' not in df.attrs.get('imputed_columns', ())
+
+
+def get_attrition_model(df):
+    """Returns the model for this dataset: from memory, else from disk, else trained and saved.
+
+    Raises ValueError for datasets without attrition labels.
+    """
+    if not has_attrition_labels(df):
+        raise ValueError("The dataset has no attrition labels to train an attrition model on.")
+    path = model_path(df)
+    with _models_lock:
+        if path in _models:
+            return _models[path]
+    if os.path.exists(path):
+        model = load_model(path)
+    else:
+        model = train_attrition_model(df if isinstance(df, pd.DataFrame) else df.training_sample(MAX_TRAINING_ROWS))
+        try:
+            os.makedirs(MODEL_DIR, exist_ok=True)
+            save_model(model, path)
+            _prune_saved_models()
+        except OSError:
+            pass  # persisting is an optimization; the in-memory model still serves this process
+    with _models_lock:
+        _models[path] = model
+    return model
+
+
+def get_attrition_scores(df):
+    """Every row's attrition risk for this dataset version, scored once; read-only, as sessions share it."""
+    key = dataset_fingerprint(df)
+    with _models_lock:
+        if key in _scores:
+            _scores.move_to_end(key)
+            return _scores[key]
+    scores = score_attrition_risk(get_attrition_model(df), df)
+    scores.setflags(write=False)
+    with _models_lock:
+        _scores[key] = scores
+        while len(_scores) > MAX_CACHED_SCORES:
+            _scores.popitem(last=False)
+    return scores
@@ -0,0 +1,187 @@
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from enrichment import enrich_employee_data
+from attrition_model import get_attrition_scores, has_attrition_labels
+from aggregate_cube import DIMENSIONS as CUBE_DIMENSIONS, get_aggregate_cube
+from chart_utils import histogram_summary, histogram_figure, box_summary, box_figure
+from chart_rendering import PNG_WIDTH, PNG_HEIGHT, PNG_SCALE, get_render_pool, render_png_dict, shutdown_render_pool
+from figure_cache import cache_key, dataset_fingerprint
+from predictive_functions import risk_rows
+from report_generation import PDF
+from schema import MEASURES, measure_name
+from top_k import top_k_per_group
+from utils import atomic_path
+
+GROUP_TOP_K = 10
+
+
+def _group_summaries(df, by):
+    """Headcount, means and attrition rate for every group, in one vectorized pass."""
+    if by in CUBE_DIMENSIONS:
+        return get_aggregate_cube(df).rollup(by=by)
+    grouped = df.groupby(by, observed=True, sort=False)
+    summaries = pd.DataFrame({'Headcount': grouped.size()})
+    for m in MEASURES:
+        if m in df.columns:
+            summaries[measure_name(m)] = grouped[m].mean()
+    return summaries
+
+
+def _group_figures(part):
+    """The charts of one group's report, as plain figure dicts ready to send to a renderer process."""
+    figures = {}
+    figures["Tenure Distribution"] = histogram_figure(
+        histogram_summary(part, 'TenureYears', nbins=15), title='Tenure Distribution',
+        x_label='Tenure (Years)', colors=px.colors.qualitative.Pastel)
+    if 'Salary' in part.columns and 'Role' in part.columns:
+        figures["Salary Distribution by Role"] = box_figure(
+            box_summary(part, 'Role', 'Salary'), title='Salary Distribution by Role', x_label='Role',
+            y_label='Salary', colors=px.colors.qualitative.Pastel)
+    if 'EngagementScore' in part.columns and 'Attrition' in part.columns:
+        status = part[['EngagementScore']].assign(
+            Status=np.where(part['Attrition'].to_numpy() == 1, 'Left', 'Stayed'))
+        figures["Engagement Score: Stayed vs. Left"] = histogram_figure(
+            histogram_summary(status, 'EngagementScore', color='Status'), title='Engagement Score: Stayed vs. Left',
+            x_label='Engagement Score', color_map={'Stayed': 'blue', 'Left': 'red'}, legend_title='Status')
+    return {title: fig.to_dict() for title, fig in figures.items()}
+
+
+def build_group_payloads(df, by='Department', top_k=GROUP_TOP_K):
+    """Prepares every group's report content from a single grouping, roll-up and scoring pass."""
+    df = enrich_employee_data(df)
+    groups = df[by].astype('category').cat
+    codes = groups.codes.to_numpy()
+    order = np.argsort(codes, kind='stable')
+    order = order[codes[order] >= 0]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[order], minlength=len(groups.categories)))])
+    ordered = df.take(order)
+
+    summaries = _group_summaries(df, by)
+    overall = get_aggregate_cube(df).rollup()
+    if has_attrition_labels(df):
+        risk = get_attrition_scores(df)
+        top_risks = top_k_per_group(risk, codes, top_k, len(groups.categories))
+
+    payloads = []
+    for g, name in enumerate(groups.categories):
+        part = ordered.iloc[bounds[g]:bounds[g + 1]]
+        if part.empty:
+            continue
+        payloads.append({
+            'by': by,
+            'group': str(name),
+            'summary': summaries.loc[name].to_dict(),
+            'overall': overall.to_dict(),
+            'figures': _group_figures(part),
+            'top_risks': risk_rows(df, risk, top_risks[g]) if has_attrition_labels(df) else pd.DataFrame(),
+        })
+    return payloads
+
+
+def render_group_report(payload, width=PNG_WIDTH, height=PNG_HEIGHT, scale=PNG_SCALE):
+    """Rasterizes and lays out one group's PDF; runs inside a renderer process. Returns (group, bytes)."""
+    summary, overall = payload['summary'], payload['overall']
+    pdf = PDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    pdf.chapter_title(f"{payload['by']}: {payload['group']}")
+    rate = summary.get('AttritionRate', np.nan)
+    overview = f"""
+    * Employees: {int(summary['Headcount']):,}
+    * Average Tenure: {summary.get('AvgTenureYears', 0):.1f} years
+    * Average Salary: ${summary.get('AvgSalary', 0):,.0f}
+    * Average Engagement Score: {summary.get('AvgEngagementScore', 0):.1f}
+    """
+    if pd.notna(rate):
+        overview += f"* Attrition Rate: {rate * 100:.1f}% (company: {overall['AttritionRate'] * 100:.1f}%)\n"
+    pdf.chapter_body(overview)
+
+    for title, fig_dict in payload['figures'].items():
+        pdf.add_chart(None, title, png=render_png_dict(fig_dict, width, height, scale))
+        pdf.ln(5)
+
+    top_risks = payload['top_risks']
+    if not top_risks.empty:
+        pdf.chapter_body(f"Top {len(top_risks)} Employees with Highest Attrition Risk:")
+        pdf.set_font('Arial', '', 8)
+        available_width = pdf.w - pdf.l_margin - pdf.r_margin
+        for line in top_risks.to_string(index=False).split('\n'):
+            pdf.multi_cell(available_width, 4, line)
+        pdf.set_font('Arial', '', 10)
+
+    return payload['group'], bytes(pdf.output(dest='S'))
+
+
+def _render_all(payloads, max_workers=None):
+    """Yields (group, pdf bytes) as reports finish, one report per renderer-pool task."""
+    done = set()
+    if len(payloads) > 1 and max_workers != 1:
+        try:
+            pool = get_render_pool(max_workers)
+            futures = [pool.submit(render_group_report, payload) for payload in payloads]
+            for future in as_completed(futures):
+                group, pdf_bytes = future.result()
+                done.add(group)
+                yield group, pdf_bytes
+        except (BrokenProcessPool, OSError):
+            shutdown_render_pool()
+    for payload in payloads:
+        if payload['group'] not in done:
+            yield render_group_report(payload)
+
+
+def group_report_filename(group):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', group).strip('_') + '.pdf'
+
+
+def _write_zip(target, payloads, max_workers):
+    written = {}
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for group, pdf_bytes in _render_all(payloads, max_workers):
+            written[group] = group_report_filename(group)
+            archive.writestr(written[group], pdf_bytes)
+    return written
+
+
+def generate_group_reports(df, output_path, by='Department', max_workers=None, top_k=GROUP_TOP_K, progress=None):
+    """Writes one PDF report per `by` group into `output_path` (a .zip file or a directory). Returns {group: file name}."""
+    progress = progress or (lambda stage: None)
+    progress('figures')
+    payloads = build_group_payloads(df, by, top_k)
+    progress('rasterization')
+    if output_path.endswith('.zip'):
+        with atomic_path(output_path) as tmp_path:
+            return _write_zip(tmp_path, payloads, max_workers)
+    os.makedirs(output_path, exist_ok=True)
+    written = {}
+    for group, pdf_bytes in _render_all(payloads, max_workers):
+        written[group] = group_report_filename(group)
+        with open(os.path.join(output_path, written[group]), 'wb') as f:
+            f.write(pdf_bytes)
+    return written
+
+
+def group_reports_cache_key(df, by='Department'):
+    return cache_key('group_reports_zip', by, dataset_fingerprint(df))
+
+
+def generate_group_reports_zip(df, by='Department', max_workers=None, progress=None):
+    """The per-group reports as in-memory zip bytes, for download."""
+    progress = progress or (lambda stage: None)
+    progress('figures')
+    payloads = build_group_payloads(df, by)
+    progress('rasterization')
+    buffer = io.BytesIO()
+    _write_zip(buffer, payloads, max_workers)
+    return buffer.getvalue()
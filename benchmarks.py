@@ -0,0 +1,437 @@
+import argparse
+import contextlib
+import inspect
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from data_utils import generate_dummy_data, generate_synthetic_data
+from ingestion import parquet_cache_path, read_employee_csv, read_employee_shards
+from enrichment import derive_columns, enrich_employee_data
+from data_cleaning import clean_employee_data
+from aggregate_cube import AggregateCube
+import attrition_model
+from attrition_model import score_attrition_risk, train_attrition_model
+from EDA_functions import get_descriptive_analytics_figures
+from diagnostic_functions import get_diagnostic_analytics_figures
+from predictive_functions import get_predictive_analytics_figures
+from chart_rendering import rasterize_figures
+from chart_utils import compact_figure
+from figure_cache import get_cache
+from top_k import top_k_indices, top_k_per_group
+from report_generation import _build_full_report_pdf
+from batch_reports import generate_group_reports
+from paged_table import FrameSource, query_table
+import snapshot_store
+
+
+def _best_of(fn, repeat):
+    """Runs `fn` `repeat` times and returns the fastest wall time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _report_figures(num_employees):
+    df = enrich_employee_data(generate_dummy_data(num_employees))
+    figures = [*get_descriptive_analytics_figures(df).values(), *get_diagnostic_analytics_figures(df).values()]
+    figures.extend(get_predictive_analytics_figures(df)[0].values())
+    return figures
+
+
+def _serial_tempfile_pngs(figures):
+    """The previous report path: one figure at a time, written to and read back from a temp file."""
+    pngs = []
+    for fig in figures:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
+            img_path = tmpfile.name
+            pio.write_image(fig, img_path, format='png', width=800, height=500, scale=1)
+        with open(img_path, 'rb') as f:
+            pngs.append(f.read())
+        os.unlink(img_path)
+    return pngs
+
+
+def bench_rasterization(num_employees=1000, repeat=3, max_workers=None):
+    """Compares serial temp-file rasterization of the report charts with the in-memory pool."""
+    figures = _report_figures(num_employees)
+    # Warm up both paths so Kaleido and pool start-up are not counted against either
+    _serial_tempfile_pngs(figures[:1])
+    rasterize_figures(figures, max_workers=max_workers)
+    serial = _best_of(lambda: _serial_tempfile_pngs(figures), repeat)
+    parallel = _best_of(lambda: rasterize_figures(figures, max_workers=max_workers), repeat)
+    return {'figures': len(figures), 'serial_s': serial, 'parallel_s': parallel, 'speedup': serial / parallel}
+
+
+def bench_top_k(sizes=(1_000_000, 10_000_000), k=20, repeat=3):
+    """Compares the old project-then-sort top-K risk selection with argpartition-based selection."""
+    columns = ['Name', 'Department', 'Role', 'TenureYears', 'EngagementScore', 'AttritionRiskScore']
+    results = {}
+    for size in sizes:
+        df = generate_synthetic_data(size)
+        risk = np.random.default_rng(0).random(size).astype(np.float32) * 100
+        df = df.assign(AttritionRiskScore=risk)
+        codes = df['Department'].cat.codes.to_numpy()
+        sort = _best_of(lambda: df[columns].sort_values(by='AttritionRiskScore', ascending=False).head(k), repeat)
+        partition = _best_of(lambda: df.iloc[top_k_indices(risk, k)][columns], repeat)
+        per_group = _best_of(lambda: top_k_per_group(risk, codes, k), repeat)
+        results[size] = {'sort_s': sort, 'argpartition_s': partition, 'speedup': sort / partition,
+                         'per_department_s': per_group}
+    return results
+
+
+def bench_group_reports(num_employees=100_000, repeat=1, max_workers=None):
+    """Compares one full report per filtered department frame with the single-pass batch API."""
+    df = enrich_employee_data(generate_synthetic_data(num_employees))
+    departments = list(df['Department'].cat.categories)
+
+    def per_department():
+        for department in departments:
+            part = df[df['Department'] == department]
+            part.attrs['dataset_version'] = f"bench/{department}/{time.perf_counter_ns()}"
+            _build_full_report_pdf(part, max_workers=max_workers)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        def batch():
+            df.attrs['dataset_version'] = f"bench/{time.perf_counter_ns()}"
+            generate_group_reports(df, os.path.join(out_dir, 'reports.zip'), max_workers=max_workers)
+
+        batch()  # warm up the renderer pool
+        looped = _best_of(per_department, repeat)
+        batched = _best_of(batch, repeat)
+    return {'groups': len(departments), 'per_group_calls_s': looped, 'batch_s': batched,
+            'speedup': looped / batched, 'cpus': os.cpu_count()}
+
+
+# 10M rows needs several GB of memory, so it is opt-in: --sizes 1000 100000 1000000 10000000
+STAGE_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.25
+# Timings below this are dominated by noise and never count as regressions
+MIN_SECONDS = 0.01
+
+
+@contextlib.contextmanager
+def _scratch_model_dir():
+    """Points model persistence (here and in child processes) at a temporary directory."""
+    previous_dir, previous_env = attrition_model.MODEL_DIR, os.environ.get('APEXON_PULSE_MODEL_DIR')
+    with tempfile.TemporaryDirectory() as root:
+        attrition_model.MODEL_DIR = os.environ['APEXON_PULSE_MODEL_DIR'] = os.path.join(root, 'models')
+        try:
+            yield
+        finally:
+            attrition_model.MODEL_DIR = previous_dir
+            if previous_env is None:
+                os.environ.pop('APEXON_PULSE_MODEL_DIR', None)
+            else:
+                os.environ['APEXON_PULSE_MODEL_DIR'] = previous_env
+
+
+def _fresh(df):
+    """`df` under a new dataset version with the in-memory artifact cache emptied, so the cold path is timed."""
+    get_cache().clear()
+    df.attrs['dataset_version'] = f"bench/{len(df)}/{time.perf_counter_ns()}"
+    return df
+
+
+def bench_stages(sizes=STAGE_SIZES, repeat=3, max_workers=None):
+    """Times each pipeline stage, from CSV load to PDF generation, on synthetic workforces of every size in `sizes`."""
+    as_of = pd.Timestamp.today().normalize()
+    results = {}
+    for size in sizes:
+        raw = generate_synthetic_data(size, as_of=as_of).drop(columns=['TenureYears'])
+        timings = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'employees.csv')
+            raw.to_csv(csv_path, index=False)
+            timings['csv_load_s'] = _best_of(lambda: read_employee_csv(csv_path, use_cache=False), repeat)
+        timings['tenure_derivation_s'] = _best_of(lambda: derive_columns(raw, as_of=as_of, seed=0), repeat)
+
+        df = enrich_employee_data(raw, as_of=as_of, seed=0)
+        timings['cube_build_s'] = _best_of(lambda: AggregateCube.build(df), repeat)
+        timings['model_training_s'] = _best_of(lambda: train_attrition_model(df), repeat)
+        model = train_attrition_model(df)
+        timings['risk_scoring_s'] = _best_of(lambda: score_attrition_risk(model, df), repeat)
+        risk = score_attrition_risk(model, df)
+        timings['top_k_s'] = _best_of(lambda: top_k_indices(risk, 20), repeat)
+
+        for name, build in [('descriptive', get_descriptive_analytics_figures),
+                            ('diagnostic', get_diagnostic_analytics_figures),
+                            ('predictive', get_predictive_analytics_figures)]:
+            timings[f'{name}_figures_s'] = _best_of(lambda: build(_fresh(df)), repeat)
+
+        _build_full_report_pdf(_fresh(df), max_workers=max_workers)  # warm up Kaleido and the renderer pool
+        timings['full_pdf_s'] = _best_of(lambda: _build_full_report_pdf(_fresh(df), max_workers=max_workers), repeat)
+        results[size] = timings
+    return results
+
+
+def bench_figure_payload(sizes=(1_000_000,), repeat=3):
+    """Plotly JSON bytes each page sends to the browser, as built and after `compact_figure`."""
+    results = {}
+    for size in sizes:
+        df = _fresh(enrich_employee_data(generate_synthetic_data(size)))
+        pages = {'descriptive': get_descriptive_analytics_figures(df),
+                 'diagnostic': get_diagnostic_analytics_figures(df),
+                 'predictive': get_predictive_analytics_figures(df)[0]}
+        # The Automated Reporting page shows every figure again
+        pages['automated_reporting'] = {title: fig for figures in pages.values() for title, fig in figures.items()}
+        results[size] = {}
+        for page, figures in pages.items():
+            before = sum(len(pio.to_json(fig, validate=False)) for fig in figures.values())
+            after = sum(len(pio.to_json(compact_figure(fig), validate=False)) for fig in figures.values())
+            results[size][page] = {
+                'bytes': before, 'compact_bytes': after, 'reduction': 1 - after / before,
+                'compact_s': _best_of(lambda: [compact_figure(fig) for fig in figures.values()], repeat)}
+    return results
+
+
+def bench_paged_table(sizes=(500, 5_000_000), repeat=3):
+    """Latency of serving one 50-row table window: plain, sorted, filtered and sorted, and a deep page."""
+    results = {}
+    for size in sizes:
+        df = generate_synthetic_data(size)
+        risk = np.random.default_rng(0).random(size).astype(np.float32) * 100
+        source = FrameSource(df, ['Name', 'Department', 'Role', 'Salary'], extra={'AttritionRiskScore': risk})
+        deep = max(0, size // 2 - 50)
+        results[size] = {
+            'first_page_s': _best_of(lambda: query_table(source), repeat),
+            'sorted_page_s': _best_of(lambda: query_table(source, 'AttritionRiskScore', descending=True), repeat),
+            'filtered_sorted_page_s': _best_of(lambda: query_table(
+                source, 'Salary', filters={'Department': ['Engineering'], 'Name': 'smith'}), repeat),
+            'deep_sorted_page_s': _best_of(lambda: query_table(source, 'Salary', start=deep, stop=deep + 50), repeat),
+        }
+    return results
+
+
+def bench_sharded_ingestion(num_employees=1_000_000, shards=8, repeat=1, workers=None):
+    """Loads a CSV export split into `shards` files with one worker and with a process pool (cold caches)."""
+    workers = workers or os.cpu_count() or 1
+    df = generate_synthetic_data(num_employees).drop(columns=['TenureYears'])
+    step = -(-num_employees // shards)
+    with tempfile.TemporaryDirectory() as shard_dir:
+        paths = [os.path.join(shard_dir, f"region_{i:02d}.csv") for i in range(shards)]
+        for i, path in enumerate(paths):
+            df.iloc[i * step:(i + 1) * step].to_csv(path, index=False)
+
+        def load(n):
+            for path in paths:
+                if os.path.exists(parquet_cache_path(path)):
+                    os.unlink(parquet_cache_path(path))
+            read_employee_shards(shard_dir, workers=n, min_pool_bytes=0)
+
+        serial = _best_of(lambda: load(1), repeat)
+        parallel = _best_of(lambda: load(workers), repeat)
+    return {'shards': shards, 'workers': workers, 'serial_s': serial, 'parallel_s': parallel,
+            'speedup': serial / parallel}
+
+
+def bench_cleaning(sizes=(10_000_000,), repeat=3):
+    """Cleaning a messy extract: lower-case roles, string dates, ratings on a 100-point scale, duplicate ids."""
+    results = {}
+    for size in sizes:
+        df = generate_synthetic_data(size)
+        df['Role'] = df['Role'].cat.rename_categories(str.lower)
+        df['HireDate'] = df['HireDate'].dt.strftime('%m/%d/%Y')
+        df['PerformanceRating'] = df['PerformanceRating'] * 20
+        df.loc[::1000, 'EmployeeID'] = 1
+        _, report = clean_employee_data(df)
+        results[size] = {'clean_s': _best_of(lambda: clean_employee_data(df), repeat),
+                         'values_changed': int(report['rows'].sum())}
+    return results
+
+
+def bench_trends(num_employees=100_000, quarters=12, repeat=3):
+    """A quarter-over-quarter trend view over `quarters` saved snapshots, cold and warm."""
+    with tempfile.TemporaryDirectory() as root:
+        for i, snapshot_date in enumerate(pd.period_range(end=pd.Timestamp.today(), periods=quarters, freq='Q')):
+            df = _fresh(enrich_employee_data(generate_synthetic_data(num_employees, seed=i)))
+            snapshot_store.save_snapshot(df, snapshot_date.end_time.normalize(), root=root)
+
+        def cold():
+            snapshot_store._read_aggregates.cache_clear()
+            return snapshot_store.quarterly_trends(quarters, root=root)
+
+        return {'quarters': quarters, 'rows_per_snapshot': num_employees,
+                'cold_trends_s': _best_of(cold, repeat),
+                'warm_trends_s': _best_of(lambda: snapshot_store.quarterly_trends(quarters, root=root), repeat)}
+
+
+# Runs the analytics pipeline on one backend in a fresh interpreter, so peak RSS is that backend's alone
+_PIPELINE_SCRIPT = """
+import json, resource, sys, time
+from streamlit import logger
+logger.set_log_level('ERROR')
+from data_cleaning import clean_employee_data
+from enrichment import enrich_employee_data
+from out_of_core import ParquetDataset, read_parquet_frame
+from EDA_functions import get_descriptive_analytics_figures
+from diagnostic_functions import get_diagnostic_analytics_figures
+from predictive_functions import get_predictive_analytics_figures
+path, backend = sys.argv[1:]
+stages, start = {}, time.perf_counter()
+def timed(name, fn, *args):
+    global start
+    result = fn(*args)
+    stages[name + '_s'] = time.perf_counter() - start
+    start = time.perf_counter()
+    return result
+# Loaded like the registry does; out of core, cleaning happens batch by batch during the scans
+df = timed('load', lambda: ParquetDataset(path) if backend == 'out-of-core'
+           else enrich_employee_data(clean_employee_data(read_parquet_frame(path))[0]))
+df.attrs.update(dataset_key=path, dataset_version=f'bench/{backend}')
+timed('descriptive', get_descriptive_analytics_figures, df)
+timed('diagnostic', get_diagnostic_analytics_figures, df)
+timed('predictive', get_predictive_analytics_figures, df)
+stages['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(stages))
+"""
+
+
+def _write_synthetic_parquet(path, num_employees, chunk=1_000_000):
+    """Writes a synthetic workforce chunk by chunk, so this process's peak RSS stays low for its children."""
+    writer = None
+    try:
+        for i, start in enumerate(range(0, num_employees, chunk)):
+            table = snapshot_store.pa.Table.from_pandas(
+                generate_synthetic_data(min(chunk, num_employees - start), seed=i), preserve_index=False)
+            writer = writer or snapshot_store.pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def bench_out_of_core(sizes=(1_000_000,), repeat=1):
+    """Every figure builder plus top risks on a Parquet dataset, in memory vs. out of core, each in a fresh interpreter."""
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'employees.parquet')
+            _write_synthetic_parquet(path, size)
+            env = {**os.environ, 'APEXON_PULSE_MODEL_DIR': os.path.join(root, 'models')}
+            results[size] = {}
+            for backend in ['memory', 'out-of-core']:
+                runs = []
+                for _ in range(repeat):
+                    shutil.rmtree(env['APEXON_PULSE_MODEL_DIR'], ignore_errors=True)
+                    result = subprocess.run([sys.executable, '-c', _PIPELINE_SCRIPT, path, backend], env=env,
+                                            capture_output=True, text=True, check=True,
+                                            cwd=os.path.dirname(os.path.abspath(__file__)))
+                    runs.append(json.loads(result.stdout.splitlines()[-1]))
+                results[size][backend] = {name: min(run[name] for run in runs) for name in runs[0]}
+    return results
+
+
+# Each timed in a fresh interpreter; importing `app` measures the Home page cold start
+STARTUP_MODULES = ['streamlit', 'pandas', 'plotly.express', 'fpdf', 'pyarrow', 'dataset_registry', 'Data_Inegestion',
+                   'EDA_functions', 'diagnostic_functions', 'predictive_functions', 'report_jobs', 'app']
+
+
+def _import_time(module):
+    """Cumulative import time of `module` in seconds, as reported by `python -X importtime`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2] == f' {module}':
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"Could not time import of {module!r}: {result.stderr[-500:]}")
+
+
+def bench_startup(repeat=3, modules=STARTUP_MODULES):
+    """Cold-start import cost per module (best of `repeat` fresh interpreters)."""
+    return {module: min(_import_time(module) for _ in range(repeat)) for module in modules}
+
+
+BENCHMARKS = {
+    'rasterization': bench_rasterization,
+    'top_k': bench_top_k,
+    'group_reports': bench_group_reports,
+    'startup': bench_startup,
+    'stages': bench_stages,
+    'figure_payload': bench_figure_payload,
+    'paged_table': bench_paged_table,
+    'sharded_ingestion': bench_sharded_ingestion,
+    'cleaning': bench_cleaning,
+    'trends': bench_trends,
+    'out_of_core': bench_out_of_core,
+}
+
+
+def _timings(results, prefix=''):
+    """Flattens nested results into {'benchmark/size/stage_s': seconds}, keeping only wall times."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_timings(value, f"{path}/"))
+        elif str(key).endswith('_s') and isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD, min_seconds=MIN_SECONDS):
+    """{path: {'baseline_s', 'current_s', 'change'}} for timings more than `threshold` slower than `baseline`."""
+    current, previous = _timings(results), _timings(baseline)
+    regressions = {}
+    for path, seconds in current.items():
+        before = previous.get(path)
+        if before is None or max(seconds, before) < min_seconds:
+            continue
+        change = seconds / before - 1 if before > 0 else float('inf')
+        if change > threshold:
+            regressions[path] = {'baseline_s': before, 'current_s': seconds, 'change': change}
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apexon Pulse performance benchmarks")
+    parser.add_argument('names', nargs='*', default=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sizes', type=int, nargs='+', help="dataset sizes for the size-parameterized benchmarks")
+    parser.add_argument('--save-baseline', metavar='PATH', help="write the results to PATH as the new baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a saved baseline; exit 1 on regression")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = {}
+    with _scratch_model_dir():
+        for name in args.names:
+            kwargs = {'repeat': args.repeat}
+            if args.sizes and 'sizes' in inspect.signature(BENCHMARKS[name]).parameters:
+                kwargs['sizes'] = tuple(args.sizes)
+            results[name] = BENCHMARKS[name](**kwargs)
+    # Round-trip through JSON so sizes are string keys, exactly as they appear in a saved baseline
+    results = json.loads(json.dumps(results))
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'cpus': os.cpu_count(),
+                       'results': results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for path, r in regressions.items():
+            print(f"REGRESSION {path}: {r['baseline_s']:.4f}s -> {r['current_s']:.4f}s (+{r['change']:.0%})",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No stage regressed by more than {args.threshold:.0%}.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import plotly.io as pio
+
+from figure_cache import cache_key, get_cache
+from instrumentation import instrumented, mark_cache
+
+PNG_WIDTH = 800
+PNG_HEIGHT = 500
+PNG_SCALE = 1
+
+_pool = None
+_pool_size = 0
+
+
+def render_png_dict(fig_dict, width=PNG_WIDTH, height=PNG_HEIGHT, scale=PNG_SCALE):
+    """Rasterizes a figure given as `fig.to_dict()`; each worker keeps its Kaleido renderer alive."""
+    return pio.to_image(fig_dict, format='png', width=width, height=height, scale=scale, validate=False)
+
+
+def shutdown_render_pool():
+    """Stops the renderer pool, e.g. after it broke; the next `get_render_pool` call starts a new one."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def get_render_pool(max_workers=None):
+    """Returns the persistent (spawned) renderer pool, creating it on first use."""
+    global _pool, _pool_size
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    if _pool is None or _pool_size != max_workers:
+        shutdown_render_pool()
+        _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        _pool_size = max_workers
+    return _pool
+
+
+atexit.register(shutdown_render_pool)
+
+
+def render_png(fig, width=PNG_WIDTH, height=PNG_HEIGHT, scale=PNG_SCALE):
+    """Rasterizes one figure to PNG bytes in the current process."""
+    return render_png_dict(fig.to_dict(), width, height, scale)
+
+
+@instrumented('charts.rasterize', rows=lambda args, pngs: len(pngs))
+def rasterize_figures(figures, width=PNG_WIDTH, height=PNG_HEIGHT, scale=PNG_SCALE, max_workers=None):
+    """Rasterizes figures concurrently into PNG bytes, in input order; cached figures skip the pool."""
+    figures = list(figures)
+    cache = get_cache()
+    keys = [cache_key('png', fig.to_json(), width, height, scale) for fig in figures]
+    pngs = [cache.get(key) for key in keys]
+    missing = [i for i, png in enumerate(pngs) if png is None]
+    mark_cache(not missing)
+
+    if len(missing) <= 1 or max_workers == 1:
+        rendered = [render_png(figures[i], width, height, scale) for i in missing]
+    else:
+        try:
+            pool = get_render_pool(max_workers)
+            futures = [pool.submit(render_png_dict, figures[i].to_dict(), width, height, scale) for i in missing]
+            rendered = [future.result() for future in futures]
+        except (BrokenProcessPool, OSError):
+            shutdown_render_pool()
+            rendered = [render_png(figures[i], width, height, scale) for i in missing]
+
+    for i, png in zip(missing, rendered):
+        cache.put(keys[i], png)
+        pngs[i] = png
+    return pngs
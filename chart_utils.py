@@ -0,0 +1,302 @@
+import base64
+import math
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Tolerance used by plotly.js when assigning values that sit on a bin edge.
+_FP_ERROR_ROUNDING = 1e-9
+
+
+def _round_up(val, steps, reverse=False):
+    """Port of plotly.js `Lib.roundUp`: next step above `val` (or below it when `reverse`)."""
+    if reverse:
+        candidates = [s for s in steps if s < val]
+        return candidates[-1] if candidates else steps[0]
+    for step in steps:
+        if step > val:
+            return step
+    return steps[-1]
+
+
+def _nice_bin_size(rough_size):
+    """Rounds a raw bin width up to a 'nice' 2/5/10 value, the same way plotly.js picks tick spacing."""
+    base = 10 ** math.floor(math.log10(rough_size))
+    return base * _round_up(rough_size / base, [2, 5, 10])
+
+
+def _shift_numeric_bins(bin_start, values, size, data_min, weights=None):
+    """Port of plotly.js `autoShiftNumericBins` so edges land where the browser would have put them."""
+    def near_edge(v):
+        return (1 + (v - bin_start) * 100 / size) % 100 < 2
+
+    def weighted_count(mask):
+        return np.count_nonzero(mask) if weights is None else weights[mask].sum()
+
+    count = values.size if weights is None else weights.sum()
+    if np.all(np.mod(values, 1) == 0):
+        if size < 1:
+            return data_min - 0.5 * size
+        bin_start -= 0.5
+        if bin_start + size < data_min:
+            bin_start += size
+        return bin_start
+
+    mid_count = weighted_count(near_edge(values + size / 2))
+    if mid_count < count * 0.1:
+        edge_count = weighted_count(near_edge(values))
+        if edge_count > count * 0.3 or near_edge(values.min()) or near_edge(values.max()):
+            shift = size / 2
+            bin_start += shift if bin_start + shift < data_min else -shift
+    return bin_start
+
+
+def auto_bin_edges(values, nbins=None, weights=None):
+    """Computes (start, size, count) for a histogram the way plotly.js autobins it, optionally from value `weights`."""
+    values = np.asarray(values, dtype=float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        keep = ~np.isnan(values) & (weights > 0)
+        values, weights = values[keep], weights[keep]
+    else:
+        values = values[~np.isnan(values)]
+    if values.size == 0:
+        return 0.0, 1.0, 0
+
+    data_min, data_max = values.min(), values.max()
+    if data_min == data_max:
+        return data_min - 0.5, 1.0, 1
+
+    if nbins:
+        rough_size = (data_max - data_min) / nbins
+    else:
+        distinct = np.unique(values)
+        min_diff = np.diff(distinct).min() if distinct.size > 1 else 1.0
+        exp = 10 ** math.floor(math.log10(min_diff))
+        min_size = exp * _round_up(min_diff / exp, [0.9, 1.9, 4.9, 9.9], reverse=True)
+        if weights is None:
+            n, std = values.size, values.std()
+        else:
+            n = weights.sum()
+            std = math.sqrt(np.average((values - np.average(values, weights=weights)) ** 2, weights=weights))
+        rough_size = max(min_size, 2 * std / n ** 0.4)
+
+    size = _nice_bin_size(rough_size)
+    range_start = data_min * 1.0001 - data_max * 0.0001
+    bin_start = math.ceil(range_start / size) * size - size
+    bin_start = _shift_numeric_bins(bin_start, values, size, data_min, weights)
+    count = 1 + int(math.floor((data_max - bin_start) / size))
+    return bin_start, size, count
+
+
+def histogram_counts(values, start, size, count, weights=None):
+    """Counts values (each `weights` times, if given) into `count` equal-width bins starting at `start`."""
+    values = np.asarray(values, dtype=float)
+    weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=float)
+    keep = ~np.isnan(values)
+    values, weights = values[keep], weights[keep]
+    idx = np.floor((values - start) / size + _FP_ERROR_ROUNDING).astype(np.int64)
+    in_range = (idx >= 0) & (idx < count)
+    return np.bincount(idx[in_range], weights=weights[in_range], minlength=count).astype(np.int64)
+
+
+def histogram_summary(df, x, nbins=None, color=None):
+    """Bins `df[x]` server-side, optionally split by `color`. Returns the bin edges and {group: counts}."""
+    if not isinstance(df, pd.DataFrame):  # out-of-core datasets bin from value counts scanned on disk
+        return df.histogram_summary(x, nbins=nbins, color=color)
+    start, size, count = auto_bin_edges(df[x].to_numpy(dtype=float, na_value=np.nan), nbins)
+    edges = start + size * np.arange(count + 1)
+    if color is None:
+        groups = {None: histogram_counts(df[x].to_numpy(dtype=float, na_value=np.nan), start, size, count)}
+    else:
+        groups = {
+            name: histogram_counts(group.to_numpy(dtype=float, na_value=np.nan), start, size, count)
+            for name, group in df.groupby(color, sort=False, observed=True)[x]
+        }
+    return {'edges': edges, 'size': size, 'counts': groups}
+
+
+def histogram_summary_from_counts(values, counts, nbins=None):
+    """Like `histogram_summary`, but from distinct `values` and {group: counts per value}."""
+    total = np.sum(list(counts.values()), axis=0) if counts else np.zeros(len(values))
+    start, size, count = auto_bin_edges(values, nbins, weights=total)
+    edges = start + size * np.arange(count + 1)
+    groups = {name: histogram_counts(values, start, size, count, weights=c) for name, c in counts.items()}
+    return {'edges': edges, 'size': size, 'counts': groups}
+
+
+def _box_stats(values, max_outliers):
+    """Quartiles, whiskers and outliers for one group, matching plotly.js box statistics."""
+    values = np.sort(values[~np.isnan(values)])
+    q1, median, q3 = np.percentile(values, [25, 50, 75], method='hazen')
+    iqr = q3 - q1
+    lower_fence = min(q1, values[np.searchsorted(values, q1 - 1.5 * iqr, side='left')])
+    upper_fence = max(q3, values[np.searchsorted(values, q3 + 1.5 * iqr, side='right') - 1])
+    outliers = np.concatenate([values[values < lower_fence], values[values > upper_fence]])
+    if max_outliers is not None and outliers.size > max_outliers:
+        # Keep the most extreme points; the rest are visually hidden behind them anyway.
+        distance = np.maximum(lower_fence - outliers, outliers - upper_fence)
+        outliers = outliers[np.argpartition(distance, -max_outliers)[-max_outliers:]]
+    return {
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': lower_fence, 'upperfence': upper_fence,
+        'outliers': outliers,
+    }
+
+
+def box_summary(df, x, y, max_outliers=500):
+    """Per-group box-plot statistics for `df[y]` grouped by `df[x]`, in order of first appearance."""
+    if not isinstance(df, pd.DataFrame):
+        return df.box_summary(x, y, max_outliers=max_outliers)
+    return {
+        name: _box_stats(group.to_numpy(dtype=float, na_value=np.nan), max_outliers)
+        for name, group in df.groupby(x, sort=False, observed=True)[y]
+        if group.notna().any()
+    }
+
+
+def _weighted_percentile(values, cumulative, q):
+    """Hazen percentile of the rows that sorted distinct `values` with running row counts `cumulative` stand for."""
+    n = cumulative[-1]
+    rank = min(max(n * q / 100 - 0.5, 0), n - 1)
+    lower = math.floor(rank)
+    low, high = values[np.searchsorted(cumulative, [lower, min(lower + 1, n - 1)], side='right')]
+    return low + (rank - lower) * (high - low)
+
+
+def box_stats_from_counts(values, counts, max_outliers=500):
+    """Like `_box_stats`, from sorted distinct `values` and how many rows hold each (e.g. merged value counts)."""
+    values = np.asarray(values, dtype=float)
+    counts = np.asarray(counts, dtype=np.int64)
+    keep = ~np.isnan(values) & (counts > 0)
+    values, counts = values[keep], counts[keep]
+    cumulative = np.cumsum(counts)
+    q1, median, q3 = (_weighted_percentile(values, cumulative, q) for q in (25, 50, 75))
+    iqr = q3 - q1
+    lower_fence = min(q1, values[np.searchsorted(values, q1 - 1.5 * iqr, side='left')])
+    upper_fence = max(q3, values[np.searchsorted(values, q3 + 1.5 * iqr, side='right') - 1])
+    outlying = (values < lower_fence) | (values > upper_fence)
+    values, counts = values[outlying], counts[outlying]
+    if max_outliers is not None and counts.sum() > max_outliers:
+        # Keep the most extreme points, expanding only as many repeats as are kept
+        distance = np.maximum(lower_fence - values, values - upper_fence)
+        order = np.argsort(-distance, kind='stable')
+        values, counts = values[order], counts[order]
+        counts = np.minimum(counts, np.maximum(max_outliers - (np.cumsum(counts) - counts), 0))
+    return {
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': lower_fence, 'upperfence': upper_fence,
+        'outliers': np.repeat(values, counts),
+    }
+
+
+def histogram_figure(summary, title, x_label, colors=None, color_map=None, legend_title=None):
+    """Builds a histogram-looking `go.Bar` figure from a `histogram_summary` result."""
+    edges = summary['edges']
+    centers = (edges[:-1] + edges[1:]) / 2
+    colors = colors or []
+    fig = go.Figure()
+    for i, (name, counts) in enumerate(summary['counts'].items()):
+        color = (color_map or {}).get(name) or (colors[i % len(colors)] if colors else None)
+        fig.add_trace(go.Bar(
+            x=centers, y=counts, width=summary['size'], name=name,
+            showlegend=name is not None, marker_color=color,
+            customdata=np.column_stack([edges[:-1], edges[1:]]),
+            hovertemplate=f"{x_label}=%{{customdata[0]:.4g}} - %{{customdata[1]:.4g}}<br>count=%{{y}}<extra>{name or ''}</extra>",
+        ))
+    fig.update_layout(title=title, barmode='relative', bargap=0,
+                      xaxis_title=x_label, yaxis_title='count', legend_title_text=legend_title)
+    return fig
+
+
+def box_figure(summary, title, x_label, y_label, colors=None):
+    """Builds a `go.Box` figure (plus an outlier marker trace per group) from a `box_summary` result."""
+    colors = colors or []
+    fig = go.Figure()
+    for i, (name, stats) in enumerate(summary.items()):
+        color = colors[i % len(colors)] if colors else None
+        fig.add_trace(go.Box(
+            x=[name], q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+            lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']],
+            name=name, legendgroup=name, marker_color=color, boxpoints=False,
+        ))
+        if stats['outliers'].size:
+            fig.add_trace(go.Scatter(
+                x=[name] * stats['outliers'].size, y=stats['outliers'], mode='markers',
+                name=name, legendgroup=name, showlegend=False, marker_color=color,
+            ))
+    fig.update_layout(title=title, boxmode='overlay', xaxis_title=x_label,
+                      yaxis_title=y_label, legend_title_text=x_label)
+    return fig
+
+
+# Point traces with more points than this are drawn with WebGL in the browser
+WEBGL_POINT_THRESHOLD = 1000
+# Shorter arrays stay as JSON lists; base64 only pays off once there are a few values
+_MIN_COMPACT_LENGTH = 8
+# Integer types plotly.js can decode from base64, smallest first (it has no 64-bit integers)
+_INT_DTYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+
+
+def _compact_array(values):
+    """Returns `values` in the smallest dtype plotly.js decodes without visible loss."""
+    if isinstance(values, (list, tuple)):
+        if len(values) < _MIN_COMPACT_LENGTH or not all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            return values
+        values = np.asarray(values)
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in 'iuf' or values.size < _MIN_COMPACT_LENGTH:
+        return values
+    finite = values[np.isfinite(values)] if values.dtype.kind == 'f' else values
+    if finite.size == values.size and np.array_equal(finite, np.round(finite)):
+        low, high = (finite.min(), finite.max()) if finite.size else (0, 0)
+        for dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return values.astype(dtype)
+    return values.astype(np.float32)
+
+
+def _decode_typed_array(spec):
+    """Decodes Plotly's base64 array spec ({'dtype', 'bdata', 'shape'}), as found in `Figure.to_dict()`."""
+    array = np.frombuffer(base64.b64decode(spec['bdata']), dtype=np.dtype(spec['dtype']))
+    if spec.get('shape'):
+        array = array.reshape([int(n) for n in str(spec['shape']).split(',')])
+    return array
+
+
+def _compact_trace(trace):
+    compact = {}
+    for key, value in trace.items():
+        if isinstance(value, dict) and 'bdata' in value and 'dtype' in value:
+            value = _compact_array(_decode_typed_array(value))
+        elif isinstance(value, dict):
+            value = _compact_trace(value)
+        else:
+            value = _compact_array(value)
+        compact[key] = value
+    return compact
+
+
+def _point_count(trace):
+    return max((len(trace[axis]) for axis in ('x', 'y') if trace.get(axis) is not None), default=0)
+
+
+def compact_figure(fig, webgl_threshold=WEBGL_POINT_THRESHOLD):
+    """A copy of `fig` trimmed for sending to the browser; renders the same as `fig`.
+
+    Not for figures rasterized to PDFs: large scatters become WebGL, which Kaleido renders unreliably.
+    """
+    spec = fig.to_dict()
+    data = []
+    for trace in spec.get('data', []):
+        trace = _compact_trace(trace)
+        if trace.get('type') == 'scatter' and _point_count(trace) > webgl_threshold:
+            trace['type'] = 'scattergl'
+        data.append(trace)
+    layout = spec.get('layout', {})
+    template = layout.get('template')
+    if template and 'data' in template:
+        used = {trace.get('type', 'scatter') for trace in data}
+        layout = {**layout, 'template': {**template, 'data': {t: v for t, v in template['data'].items() if t in used}}}
+    return go.Figure({'data': data, 'layout': layout}, skip_invalid=True)
@@ -0,0 +1,239 @@
+"""Headless report builds, without a browser session or Streamlit server.
+
+    python cli.py --csv Data/employee_data.csv --output reports/ --workers 4
+    python cli.py --shards "Data/shards/*.csv" --output reports/ --department-reports
+    python cli.py --synthetic 1000000 --output reports/ --png
+    python cli.py --csv Data/employee_data.csv --output reports/ --snapshot
+    python cli.py --parquet Data/snapshots --output reports/ --backend out-of-core
+
+Writes the PDF report, figures, top risks, quality report and a summary to the output directory,
+and prints the per-stage timings as JSON on stdout.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+# Standard library only at module level: spawned pool workers re-import this module
+
+REPORT_FILE = "HR_Quarterly_Review_Report.pdf"
+DEPARTMENT_REPORTS_FILE = "Department_Reports.zip"
+# Mirrors out_of_core.BACKENDS, which imports pandas
+BACKENDS = ['auto', 'memory', 'out-of-core']
+
+
+class _Timings:
+    """Wall time per pipeline stage, in the order the stages ran."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        _log(f"{name}...")
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[f"{name}_s"] = round(time.perf_counter() - start, 4)
+        return result
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def _slug(title):
+    return re.sub(r'[^A-Za-z0-9]+', '_', title).strip('_')
+
+
+def _load(args):
+    """(dataset handle, raw frame or `ParquetDataset`, per-shard reports) for the dataset named on the command line."""
+    from data_utils import generate_synthetic_data
+    from dataset_registry import dummy_dataset_handle, file_dataset_handle, parquet_dataset_handle, shard_dataset_handle
+    from ingestion import read_employee_csv, read_employee_shards
+    from out_of_core import ParquetDataset, read_parquet_frame
+    from snapshot_store import snapshot_partition
+
+    if args.parquet:
+        handle = parquet_dataset_handle(snapshot_partition(args.parquet, args.snapshot_date), args.backend)
+        if handle.out_of_core:
+            return handle, ParquetDataset(handle.source), []
+        return handle, read_parquet_frame(handle.source), []
+    if args.shards:
+        frame, shard_reports = read_employee_shards(args.shards, workers=args.workers)
+        return shard_dataset_handle(args.shards), frame, shard_reports
+    if args.csv:
+        return file_dataset_handle(args.csv), read_employee_csv(args.csv), []
+    # Same seed as the app's simulated dataset, so the numbers match what the UI shows
+    frame = generate_synthetic_data(args.synthetic, seed=42, workers=args.workers or 1)
+    return dummy_dataset_handle(args.synthetic), frame, []
+
+
+def _write_figures(output, section, figures, outputs):
+    import plotly.io as pio
+
+    directory = os.path.join(output, "figures", section)
+    os.makedirs(directory, exist_ok=True)
+    for title, fig in figures.items():
+        path = os.path.join(directory, f"{_slug(title)}.json")
+        pio.write_json(fig, path)
+        outputs.append(path)
+
+
+def _write_pngs(output, sections, max_workers, outputs):
+    from chart_rendering import rasterize_figures
+
+    items = [(section, title, fig) for section, figures in sections.items() for title, fig in figures.items()]
+    # The PDF build already rendered these, so this is normally served from the PNG cache
+    pngs = rasterize_figures([fig for _, _, fig in items], max_workers=max_workers)
+    for (section, title, _), png in zip(items, pngs):
+        path = os.path.join(output, "figures", section, f"{_slug(title)}.png")
+        with open(path, 'wb') as f:
+            f.write(png)
+        outputs.append(path)
+
+
+def _write_bytes(path, data, outputs):
+    with open(path, 'wb') as f:
+        f.write(data)
+    outputs.append(path)
+
+
+def run(args):
+    """Runs the whole pipeline and writes its outputs. Returns the timing document."""
+    from streamlit import logger
+    # The cached loaders and builders run without a Streamlit runtime; silence its warnings about that
+    logger.set_log_level('ERROR')
+
+    import instrumentation
+    from aggregate_cube import get_aggregate_cube
+    from batch_reports import generate_group_reports
+    from data_cleaning import clean_employee_data
+    from dataset_registry import enrich_frame
+    from EDA_functions import get_descriptive_analytics_figures, get_descriptive_analytics_notes
+    from diagnostic_functions import get_diagnostic_analytics_figures, get_diagnostic_analytics_notes
+    from predictive_functions import get_predictive_analytics_figures, get_predictive_analytics_notes
+    from report_generation import generate_full_report_pdf
+    from snapshot_store import save_snapshot
+
+    timings = _Timings()
+    started = time.perf_counter()
+    os.makedirs(args.output, exist_ok=True)
+    outputs = []
+
+    handle, frame, shard_reports = timings.run("load", _load, args)
+    if handle.out_of_core:
+        if args.snapshot or args.department_reports:
+            raise ValueError("--snapshot and --department-reports need the dataset in memory; use --backend memory")
+        _log(f"out-of-core backend: {handle.source} is analyzed from disk")
+    if handle.out_of_core:
+        # Batches are cleaned as they are scanned; this only adds up what the rules change
+        quality = timings.run("clean", frame.quality_report)
+    elif args.csv or args.shards or args.parquet:
+        frame, quality = timings.run("clean", clean_employee_data, frame)
+    else:
+        quality = None
+    # Versioned like the app's frames, so a shared APEXON_PULSE_CACHE_DIR serves both the same artifacts
+    df = timings.run("enrich", enrich_frame, handle, frame)
+
+    desc_figs = timings.run("descriptive", get_descriptive_analytics_figures, df)
+    diag_figs = timings.run("diagnostic", get_diagnostic_analytics_figures, df)
+    pred_figs, top_risks_df = timings.run("predictive", get_predictive_analytics_figures, df)
+    notes = [*get_descriptive_analytics_notes(desc_figs), *get_diagnostic_analytics_notes(df, diag_figs),
+             *get_predictive_analytics_notes(df, pred_figs)]
+    for level, message in notes:
+        _log(f"{level}: {message}")
+
+    pdf = timings.run("report_pdf", generate_full_report_pdf, df, max_workers=args.workers)
+    _write_bytes(os.path.join(args.output, REPORT_FILE), pdf, outputs)
+    if args.department_reports and 'Department' in df.columns:
+        path = os.path.join(args.output, DEPARTMENT_REPORTS_FILE)
+        timings.run("department_reports", generate_group_reports, df, path, max_workers=args.workers)
+        outputs.append(path)
+
+    if args.snapshot:
+        outputs.append(timings.run("snapshot", save_snapshot, df))
+
+    sections = {'descriptive': desc_figs, 'diagnostic': diag_figs, 'predictive': pred_figs}
+    for section, figures in sections.items():
+        _write_figures(args.output, section, figures, outputs)
+    if args.png:
+        timings.run("figure_png", _write_pngs, args.output, sections, args.workers, outputs)
+
+    path = os.path.join(args.output, "top_risks.csv")
+    top_risks_df.to_csv(path, index=False)
+    outputs.append(path)
+    if quality is not None and not quality.empty:
+        path = os.path.join(args.output, "quality_report.csv")
+        quality.to_csv(path, index=False)
+        outputs.append(path)
+
+    totals = get_aggregate_cube(df).rollup()
+    summary = {
+        'dataset': handle.key,
+        'dataset_version': df.attrs["dataset_version"],
+        'rows': len(df),
+        'backend': 'out-of-core' if handle.out_of_core else 'memory',
+        'totals': {name: (None if value != value else float(value)) for name, value in totals.items()},
+        'shards': [{'path': r.path, 'rows': r.rows, 'seconds': round(r.seconds, 4), 'error': r.error}
+                   for r in shard_reports],
+        'notes': [{'level': level, 'message': message} for level, message in notes],
+    }
+    path = os.path.join(args.output, "summary.json")
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    outputs.append(path)
+
+    result = {
+        'dataset': handle.key,
+        'rows': len(df),
+        'workers': args.workers,
+        'stages': timings.stages,
+        'total_s': round(time.perf_counter() - started, 4),
+        'outputs': outputs + [os.path.join(args.output, "timings.json")],
+    }
+    if instrumentation.ENABLED:
+        result['instrumentation'] = json.loads(instrumentation.export_json())['totals']
+    with open(os.path.join(args.output, "timings.json"), 'w') as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Apexon Pulse reports without the web app.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="employee CSV extract")
+    source.add_argument('--shards', help="directory or glob of CSV/XLSX shards, loaded in parallel")
+    source.add_argument('--synthetic', type=int, metavar='N', help="simulated workforce of N employees")
+    source.add_argument('--parquet', help="Parquet file or directory of Parquet files, e.g. the snapshot store")
+    parser.add_argument('--snapshot-date', metavar='YYYY-MM-DD',
+                        help="for --parquet pointing at the snapshot store: the snapshot to load (default: latest)")
+    parser.add_argument('--output', default="reports", help="output directory (default: reports)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for shard loading, data generation and rasterization")
+    parser.add_argument('--png', action='store_true', help="also write every figure as a PNG")
+    parser.add_argument('--department-reports', action='store_true',
+                        help=f"also write one PDF per department into {DEPARTMENT_REPORTS_FILE}")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="also save the dataset as today's partition in the snapshot store (trend history)")
+    parser.add_argument('--backend', choices=BACKENDS, default=None,
+                        help="for --parquet: analyze in memory, out of core, or pick by size (default: auto)")
+    args = parser.parse_args(argv)
+    if args.backend and not args.parquet:
+        parser.error("--backend only applies to --parquet datasets")
+    if args.snapshot_date and not args.parquet:
+        parser.error("--snapshot-date only applies to --parquet datasets")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    try:
+        result = run(args)
+    except (OSError, ValueError) as exc:
+        _log(f"error: {exc}")
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+from schema import CATEGORY_LABELS, DATE_COLUMNS, apply_schema, parse_dates
+
+# Canonical labels and known aliases, keyed by case-folded spelling
+CATEGORY_ALIASES = {
+    'Department': {**{d.casefold(): d for d in CATEGORY_LABELS['Department']},
+                   'information technology': 'IT', 'eng': 'Engineering',
+                   'human resources': 'HR', 'ops': 'Operations'},
+    'Role': {**{r.casefold(): r for r in CATEGORY_LABELS['Role']}, 'sr associate': 'Senior Associate', 'sr. associate': 'Senior Associate'},
+    'Gender': {**{g.casefold(): g for g in CATEGORY_LABELS['Gender']}, 'm': 'Male', 'f': 'Female', 'nonbinary': 'Non-binary',
+               'non binary': 'Non-binary', 'nb': 'Non-binary'},
+}
+MISSING_TOKENS = {'', 'na', 'n/a', 'nan', 'null', 'none', '-'}
+# Whitespace and missing-token cleanup only
+TEXT_COLUMNS = ['Name']
+# column -> (lowest valid, highest valid, 'clamp' | 'flag' (blank) | 'rescale' from another rating scale)
+RANGE_RULES = {
+    'PerformanceRating': (1, 5, 'rescale'),
+    'EngagementScore': (0, 100, 'clamp'),
+    'Salary': (1, None, 'flag'),
+    'TenureYears': (0, 60, 'flag'),
+}
+RATING_SCALE_TOPS = [10, 100]
+# None means today
+DATE_WINDOW = ('1950-01-01', None)
+ID_COLUMN = 'EmployeeID'
+CLEANED_COLUMNS = [*CATEGORY_ALIASES, *TEXT_COLUMNS, *RANGE_RULES, *DATE_COLUMNS]
+REPORT_COLUMNS = ['check', 'column', 'rows', 'action']
+
+
+def _canonical_labels(labels, aliases, fold_case):
+    """Canonical spelling of each distinct label (None for missing-value tokens), with vectorized string ops."""
+    key = pd.Index(labels).astype(str).str.split().str.join(" ")
+    folded = key.str.casefold()
+    if fold_case:
+        # Short all-caps labels are taken for acronyms
+        shout = key.str.isupper() & (key.str.len() > 3)
+        key = key.where(~(key.str.islower() | shout), key.str.title())
+    clean = pd.Series(folded.map(aliases), dtype=object)
+    clean = clean.where(clean.notna(), pd.Series(key, dtype=object))
+    return clean.where(~folded.isin(MISSING_TOKENS), None)
+
+
+def _normalize_labels(series, aliases, fold_case=True):
+    """Normalizes each distinct label once. Returns (categorical series, rows changed)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, labels = pd.factorize(series)
+    clean = _canonical_labels(labels, aliases, fold_case)
+    new_codes_by_label, categories = pd.factorize(clean)  # missing tokens get code -1
+    mapping = np.append(new_codes_by_label, -1)  # rows with code -1 (already missing) stay missing
+    changed = np.append((clean != pd.Index(labels).astype(str)).to_numpy(), False)
+    cleaned = pd.Series(pd.Categorical.from_codes(mapping[codes], categories=categories),
+                        index=series.index, name=series.name)
+    return cleaned, int(np.count_nonzero(changed[codes]))
+
+
+def _check_range(values, low, high, action):
+    """Returns (cleaned float array, rows out of range) for one range rule."""
+    out = np.zeros(values.shape, dtype=bool)
+    if low is not None:
+        out |= values < low
+    if high is not None:
+        out |= values > high
+    if action == 'clamp':
+        values = np.clip(values, low if low is not None else -np.inf, high if high is not None else np.inf)
+    else:
+        values = np.where(out, np.nan, values)
+    return values, int(np.count_nonzero(out))
+
+
+def rating_scale(lowest, highest, low, high):
+    """The smallest (bottom, top) rating scale holding `lowest`..`highest`, or None."""
+    if np.isnan(lowest) or (lowest >= low and highest <= high):
+        return low, high
+    if lowest < 0:
+        return None
+    bottom = 0 if lowest < low else low
+    for top in (high, *RATING_SCALE_TOPS):
+        if highest <= top:
+            return bottom, top
+    return None
+
+
+def apply_range_rule(values, low, high, action, scale=None):
+    """Returns (cleaned float array, rows changed, report action) for one RANGE_RULES entry."""
+    if action == 'rescale':
+        if scale is None:
+            present = values[~np.isnan(values)]
+            scale = rating_scale(present.min(), present.max(), low, high) if present.size else (low, high)
+        if scale is not None and scale != (low, high):
+            bottom, top = scale
+            rescaled = np.clip(np.round(low + (values - bottom) * (high - low) / (top - bottom)), low, high)
+            return rescaled, int(np.count_nonzero(~np.isnan(values))), f"rescaled from [{bottom}, {top}] to [{low}, {high}]"
+        action = 'flag'
+    values, out = _check_range(values, low, high, action)
+    bounds = f"[{low if low is not None else '-inf'}, {high if high is not None else 'inf'}]"
+    return values, out, f"{'clamped to' if action == 'clamp' else 'blanked outside'} {bounds}"
+
+
+def clean_columns(df, scales=None):
+    """Applies the per-column rules. Returns ({column: cleaned values}, report rows).
+
+    `scales` ({column: (bottom, top)}) fixes the rating scales when cleaning batch by batch.
+    """
+    columns, report = {}, []
+
+    for col, aliases in CATEGORY_ALIASES.items():
+        if col in df.columns:
+            columns[col], changed = _normalize_labels(df[col], aliases)
+            if changed:
+                report.append(('labels', col, changed, 'case-folded / mapped to canonical labels'))
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            columns[col], changed = _normalize_labels(df[col], {}, fold_case=False)
+            if changed:
+                report.append(('labels', col, changed, 'whitespace normalized / missing tokens blanked'))
+
+    for col, (low, high, action) in RANGE_RULES.items():
+        if col in df.columns:
+            values, out, note = apply_range_rule(df[col].to_numpy(dtype=float, na_value=np.nan), low, high, action,
+                                                 (scales or {}).get(col))
+            if out:
+                columns[col] = values
+                report.append(('range', col, out, note))
+
+    earliest = pd.Timestamp(DATE_WINDOW[0])
+    latest = pd.Timestamp(DATE_WINDOW[1]) if DATE_WINDOW[1] else pd.Timestamp.today().normalize()
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            raw = df[col]
+            dates = raw if pd.api.types.is_datetime64_any_dtype(raw) else parse_dates(raw)
+            unparsed = int(np.count_nonzero(dates.isna().to_numpy() & raw.notna().to_numpy()))
+            implausible = ((dates < earliest) | (dates > latest)).to_numpy()
+            if unparsed:
+                report.append(('dates', col, unparsed, 'unparseable, blanked'))
+            if implausible.any():
+                dates = dates.mask(implausible)
+                report.append(('dates', col, int(np.count_nonzero(implausible)),
+                               f"outside {earliest.date()} - {latest.date()}, blanked"))
+            columns[col] = dates
+    return columns, report
+
+
+@instrumented('cleaning.clean')
+def clean_employee_data(df):
+    """Applies the cleaning rules to an extract and returns (clean frame, quality report)."""
+    columns, report = clean_columns(df)
+
+    cleaned = df.assign(**columns) if columns else df.copy(deep=False)
+    if ID_COLUMN in cleaned.columns:
+        ids = cleaned[ID_COLUMN]
+        duplicate = ids.duplicated(keep='first').to_numpy() & ids.notna().to_numpy()
+        if duplicate.any():
+            cleaned = cleaned[~duplicate].reset_index(drop=True)
+            report.append(('duplicates', ID_COLUMN, int(np.count_nonzero(duplicate)), 'later duplicates dropped'))
+
+    cleaned = apply_schema(cleaned)
+    cleaned.attrs = dict(df.attrs)
+    return cleaned, pd.DataFrame(report, columns=REPORT_COLUMNS)
@@ -1,36 +1,112 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEPARTMENTS = ['Engineering', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations']
+ROLES = ['Manager', 'Senior Associate', 'Associate', 'Analyst', 'Specialist']
+GENDERS = ['Male', 'Female', 'Non-binary']
+FIRST_NAMES = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+               "Kevin", "Linda", "Mike", "Nancy", "Oscar", "Pamela", "Quinn", "Rachel", "Steve", "Tina"]
+LAST_NAMES = ["Smith", "Jones", "Williams", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor", "Anderson",
+              "Thomas", "Jackson", "White", "Harris", "Martin", "Thompson", "Garcia", "Martinez", "Robinson", "Clark"]
+FULL_NAMES = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+
+# Rows per seeded RNG stream; output doesn't depend on chunk size or worker count
+BLOCK_SIZE = 65_536
+
+
+def _generate_block(seed, block_index, num_rows, as_of):
+    """Generates one block of employees from its own RNG stream, fully vectorized."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block_index,)))
+    start_id = block_index * BLOCK_SIZE + 1
+
+    department = rng.integers(0, len(DEPARTMENTS), num_rows, dtype=np.int8)
+    is_engineering = department == DEPARTMENTS.index('Engineering')
+    # Introduce some patterns for diagnostic/predictive simulation:
+    # higher attrition in Engineering, and lower engagement for those who leave
+    attrition = (rng.random(num_rows) < np.where(is_engineering, 0.3, 0.1)).astype(np.int8)
+    engagement = np.where(attrition == 1,
+                          rng.integers(40, 70, num_rows, dtype=np.uint8),
+                          rng.integers(60, 100, num_rows, dtype=np.uint8))
+    hire_date = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 365 * 7, num_rows), unit='D')
+
+    return pd.DataFrame({
+        'EmployeeID': np.arange(start_id, start_id + num_rows, dtype=np.int32),
+        'Name': pd.Categorical.from_codes(
+            rng.integers(0, len(FIRST_NAMES), num_rows) * len(LAST_NAMES) + rng.integers(0, len(LAST_NAMES), num_rows),
+            FULL_NAMES),
+        'Department': pd.Categorical.from_codes(department, DEPARTMENTS),
+        'Role': pd.Categorical.from_codes(rng.integers(0, len(ROLES), num_rows), ROLES),
+        'HireDate': hire_date,
+        'Salary': rng.normal(70000, 20000, num_rows).astype(np.int32),
+        'PerformanceRating': rng.integers(1, 6, num_rows, dtype=np.int8),  # 1-5 scale
+        'EngagementScore': engagement,  # 0-100 scale
+        'Attrition': attrition,
+        'Gender': pd.Categorical.from_codes(rng.choice(len(GENDERS), num_rows, p=[0.48, 0.48, 0.04]), GENDERS),
+        'TenureYears': ((as_of - hire_date).days / 365.25).astype(np.float32),
+    })
+
+
+def _generate_range(seed, first_block, last_block, num_employees, as_of):
+    """Generates blocks [first_block, last_block) as one frame; used as the multiprocess work unit."""
+    blocks = [
+        _generate_block(seed, i, min(BLOCK_SIZE, num_employees - i * BLOCK_SIZE), as_of)
+        for i in range(first_block, last_block)
+    ]
+    return pd.concat(blocks, ignore_index=True) if len(blocks) > 1 else blocks[0]
+
+
+def generate_synthetic_chunks(num_employees, seed=42, chunk_size=1_000_000, workers=1, as_of=None):
+    """Yields the synthetic workforce in order, as frames of about `chunk_size` rows.
+
+    `chunk_size` is rounded up to a whole number of RNG blocks. With `workers` > 1 chunks are
+    generated in a process pool; the rows are the same either way.
+    """
+    as_of = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+    num_blocks = -(-num_employees // BLOCK_SIZE)
+    blocks_per_chunk = max(1, -(-chunk_size // BLOCK_SIZE))
+    ranges = [(start, min(start + blocks_per_chunk, num_blocks)) for start in range(0, num_blocks, blocks_per_chunk)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        for first, last in ranges:
+            yield _generate_range(seed, first, last, num_employees, as_of)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(_generate_range, seed, first, last, num_employees, as_of) for first, last in ranges]
+        for future in futures:
+            yield future.result()
+
+
+def generate_synthetic_data(num_employees, seed=42, chunk_size=1_000_000, workers=1, as_of=None):
+    """Generates a synthetic workforce of any size as a single compact frame."""
+    if num_employees <= 0:
+        return _generate_block(seed, 0, 0, pd.Timestamp.today().normalize())
+    chunks = list(generate_synthetic_chunks(num_employees, seed, chunk_size, workers, as_of))
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def write_synthetic_parquet(path, num_employees, seed=42, chunk_size=1_000_000, workers=1, as_of=None):
+    """Streams a synthetic workforce straight to a Parquet file, one row group per chunk."""
+    writer = None
+    try:
+        for chunk in generate_synthetic_chunks(num_employees, seed, chunk_size, workers, as_of):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
 
 @st.cache_data
 def generate_dummy_data(num_employees=1000):
     """Generates a dummy dataset for employee analytics with random names."""
-    np.random.seed(42)  # for reproducibility
-
-    first_names = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy",
-                   "Kevin", "Linda", "Mike", "Nancy", "Oscar", "Pamela", "Quinn", "Rachel", "Steve", "Tina"]
-    last_names = ["Smith", "Jones", "Williams", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor", "Anderson",
-                  "Thomas", "Jackson", "White", "Harris", "Martin", "Thompson", "Garcia", "Martinez", "Robinson", "Clark"]
-
-    data = {
-        'EmployeeID': range(1, num_employees + 1),
-        'Name': [f"{np.random.choice(first_names)} {np.random.choice(last_names)}" for _ in range(num_employees)],
-        'Department': np.random.choice(['Engineering', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations'], num_employees),
-        'Role': np.random.choice(['Manager', 'Senior Associate', 'Associate', 'Analyst', 'Specialist'], num_employees),
-        'HireDate': pd.to_datetime('2015-01-01') + pd.to_timedelta(np.random.randint(0, 365 * 7, num_employees), unit='D'),
-        'Salary': np.random.normal(70000, 20000, num_employees).astype(int),
-        'PerformanceRating': np.random.randint(1, 6, num_employees),  # 1-5 scale
-        'EngagementScore': np.random.randint(60, 100, num_employees),  # 0-100 scale
-        'Attrition': np.random.choice([0, 1], num_employees, p=[0.9, 0.1]),  # 10% attrition rate
-        'Gender': np.random.choice(['Male', 'Female', 'Non-binary'], num_employees, p=[0.48, 0.48, 0.04]),
-    }
-    df = pd.DataFrame(data)
-
-    # Introduce some patterns for diagnostic/predictive simulation
-    # Higher attrition in Engineering for demo purposes
-    df.loc[df['Department'] == 'Engineering', 'Attrition'] = np.random.choice([0, 1], df[df['Department'] == 'Engineering'].shape[0], p=[0.7, 0.3])
-    # Lower engagement for some attrition cases
-    df.loc[df['Attrition'] == 1, 'EngagementScore'] = np.random.randint(40, 70, df[df['Attrition'] == 1].shape[0])
-
-    df['TenureYears'] = (pd.to_datetime('today') - df['HireDate']).dt.days / 365.25
-    return df
\ No newline at end of file
+    return generate_synthetic_data(num_employees, seed=42)
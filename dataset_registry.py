@@ -0,0 +1,211 @@
+import functools
+import hashlib
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+import streamlit as st
+
+from data_utils import generate_dummy_data
+from enrichment import derive_columns, enrich_employee_data, imputed_columns
+from data_cleaning import clean_employee_data
+from ingestion import read_employee_csv, read_employee_shards, resolve_shards
+from instrumentation import instrumented
+from out_of_core import ParquetDataset, choose_backend, parquet_files, read_parquet_frame
+
+DUMMY_SOURCE = "<dummy>"
+
+
+@dataclass(frozen=True)
+class DatasetHandle:
+    """Identifies one immutable version of a dataset. This is all a session keeps in its state."""
+    source: str
+    mtime_ns: int = 0
+    content_hash: str = ""
+    num_employees: int = 0
+    # For a sharded export: the directory or glob the shards were resolved from
+    shards: bool = False
+    # For a Parquet file or directory (e.g. the snapshot store), and whether it is analyzed on disk
+    parquet: bool = False
+    out_of_core: bool = False
+
+    @property
+    def source_key(self):
+        """What stays the same across versions of one dataset: its path, or the simulated data's size."""
+        return self.key if self.source == DUMMY_SOURCE else self.source
+
+    @property
+    def key(self):
+        if self.source == DUMMY_SOURCE:
+            return f"{self.source}@{self.num_employees}"
+        return f"{self.source}@{self.content_hash[:16]}"
+
+
+@functools.lru_cache(maxsize=64)
+def _content_hash(path, size, mtime_ns):
+    """Hashes a file's bytes; memoized on (path, size, mtime) so unchanged files are hashed once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_dataset_handle(path):
+    """Returns the handle for the current version of the file at `path`."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return DatasetHandle(path, stat.st_mtime_ns, _content_hash(path, stat.st_size, stat.st_mtime_ns))
+
+
+def shard_dataset_handle(source):
+    """Returns the handle for the current set of shards under a directory or glob, versioned by path, size and mtime."""
+    digest = hashlib.sha256()
+    for path in resolve_shards(source):
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}\x1f{stat.st_size}\x1f{stat.st_mtime_ns}\n".encode())
+    return DatasetHandle(source, content_hash=digest.hexdigest(), shards=True)
+
+
+def parquet_dataset_handle(path, backend=None):
+    """Returns the handle for the current version of a Parquet file or directory, with its backend chosen."""
+    digest = hashlib.sha256()
+    for file in parquet_files(path):
+        stat = os.stat(file)
+        digest.update(f"{os.path.abspath(file)}\x1f{stat.st_size}\x1f{stat.st_mtime_ns}\n".encode())
+    return DatasetHandle(os.path.abspath(path), content_hash=digest.hexdigest(), parquet=True,
+                         out_of_core=choose_backend(path, backend) == 'out-of-core')
+
+
+def dummy_dataset_handle(num_employees=1000):
+    """Returns the handle for the built-in simulated dataset."""
+    return DatasetHandle(DUMMY_SOURCE, num_employees=num_employees)
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _load_csv(path, mtime_ns, content_hash):
+    """(clean frame, quality report) for one version of a CSV extract."""
+    return clean_employee_data(read_employee_csv(path))
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_shards(source, content_hash):
+    """(clean frame, per-shard reports, quality report) for one version of a sharded export."""
+    frame, reports = read_employee_shards(source)
+    return (*clean_employee_data(frame), reports)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_parquet(path, content_hash):
+    """(clean frame, quality report) for one version of a Parquet dataset small enough for memory."""
+    return clean_employee_data(read_parquet_frame(path))
+
+
+def version_frame(frame, handle, as_of):
+    """Tags `frame` with the dataset key, source and version (as of `as_of`) that caches and models key on."""
+    frame.attrs["dataset_key"] = handle.key
+    frame.attrs["dataset_source"] = handle.source_key
+    frame.attrs["dataset_version"] = f"{handle.key}/{as_of.date()}"
+    return frame
+
+
+def enrich_frame(handle, frame, as_of=None):
+    """Versions and enriches a frame loaded outside the registry (e.g. by the CLI) exactly like `get_frame`."""
+    as_of = as_of or pd.Timestamp.today().normalize()
+    if isinstance(frame, pd.DataFrame):
+        frame = frame.copy(deep=False)
+    # Tagged first: the dataset key seeds the imputed columns
+    return enrich_employee_data(version_frame(frame, handle, as_of), as_of=as_of)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _open_parquet(_handle, key, as_of):
+    """The out-of-core view of one version of a Parquet dataset; only its schema and metadata are read."""
+    return version_frame(ParquetDataset(_handle.source, as_of=as_of), _handle, as_of)
+
+
+def shard_reports(handle):
+    """Per-shard timings and errors from loading a sharded dataset (empty for other datasets)."""
+    return _load_shards(handle.source, handle.content_hash)[2] if handle.shards else []
+
+
+def quality_report(handle):
+    """What cleaning changed in a loaded dataset: one row per rule that fired (empty for simulated data)."""
+    if handle.source == DUMMY_SOURCE:
+        return pd.DataFrame(columns=['check', 'column', 'rows', 'action'])
+    if handle.shards:
+        return _load_shards(handle.source, handle.content_hash)[1]
+    if handle.out_of_core:
+        # Cleaned batch by batch as they are scanned; the report takes one more scan, once per version
+        return _open_parquet(handle, handle.key, pd.Timestamp.today().normalize()).quality_report()
+    if handle.parquet:
+        return _load_parquet(handle.source, handle.content_hash)[1]
+    return _load_csv(handle.source, handle.mtime_ns, handle.content_hash)[1]
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_dummy(num_employees):
+    return generate_dummy_data(num_employees)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _overlay(key):
+    """Per-dataset store of derived columns, shared by every session viewing that dataset."""
+    return {}
+
+
+def _base_frame(handle):
+    if handle.source == DUMMY_SOURCE:
+        return _load_dummy(handle.num_employees)
+    if handle.shards:
+        return _load_shards(handle.source, handle.content_hash)[0]
+    if handle.parquet:
+        return _load_parquet(handle.source, handle.content_hash)[0]
+    return _load_csv(handle.source, handle.mtime_ns, handle.content_hash)[0]
+
+
+def add_derived_columns(handle, columns):
+    """Registers derived columns for a dataset version so every session sees them without recomputing."""
+    _overlay(handle.key).update(columns)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _enrich(_handle, key, as_of):
+    """Runs the enrichment stage once per dataset version and day (tenure is relative to today)."""
+    base = version_frame(_base_frame(_handle).copy(deep=False), _handle, as_of)
+    add_derived_columns(_handle, derive_columns(base, as_of=as_of))
+    return True
+
+
+@instrumented('dataset.get_frame')
+def get_frame(handle):
+    """Returns a read-only, enriched view of the dataset (a `ParquetDataset` when out of core).
+
+    The result is a shallow copy of the shared base frame: replace columns, never write into them in place.
+    """
+    as_of = pd.Timestamp.today().normalize()
+    if handle.out_of_core:
+        return _open_parquet(handle, handle.key, as_of)
+    _enrich(handle, handle.key, as_of)
+    base = _base_frame(handle)
+    frame = base.copy(deep=False)
+    for name, values in _overlay(handle.key).items():
+        frame[name] = values
+    frame.attrs["imputed_columns"] = imputed_columns(base.columns)
+    return version_frame(frame, handle, as_of)
+
+
+def set_active_dataset(handle):
+    st.session_state["dataset_handle"] = handle
+
+
+def get_active_handle():
+    """Returns the current session's dataset handle, defaulting to the simulated dataset."""
+    if st.session_state.get("dataset_handle") is None:
+        set_active_dataset(dummy_dataset_handle())
+    return st.session_state["dataset_handle"]
+
+
+def get_active_dataset():
+    """Returns the current session's dataset, defaulting to the simulated one."""
+    return get_frame(get_active_handle())
@@ -1,50 +1,70 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-import numpy as np
-
+from enrichment import enrich_employee_data
+from schema import category_mask
+from figure_cache import cached_figures
+from instrumentation import instrumented
+from aggregate_cube import DIMENSIONS, get_aggregate_cube
+from out_of_core import is_out_of_core
+from utils import display_notes
+from chart_utils import histogram_summary, histogram_summary_from_counts, histogram_figure, compact_figure
+
+@cached_figures("diagnostic")
 def get_diagnostic_analytics_figures(df):
     figures = {}
 
 
-    # Ensure 'TenureYears' and 'EngagementScore' are available
-    if 'HireDate' in df.columns and 'TenureYears' not in df.columns:
-        df['HireDate'] = pd.to_datetime(df['HireDate'])
-        df['TenureYears'] = (pd.to_datetime('today') - df['HireDate']).dt.days / 365.25
-    if 'EngagementScore' not in df.columns:
-        df['EngagementScore'] = np.random.randint(60, 100, len(df)) 
-
-    if 'Attrition' not in df.columns:
-        df['Attrition'] = np.random.choice([0, 1], len(df), p=[0.9, 0.1]) 
-
-    if 'Department' not in df.columns:
-        df['Department'] = np.random.choice(['Engineering', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations'], len(df)) 
+    # Ensure 'TenureYears', 'EngagementScore', 'Attrition' and 'Department' are available
+    df = enrich_employee_data(df)
 
     if 'EngagementScore' in df.columns and 'Department' in df.columns:
-        fig_engagement = px.histogram(df, x='EngagementScore', color='Department',
-                                      title='Engagement Score Distribution',
-                                      labels={'EngagementScore': 'Engagement Score'},
-                                      color_discrete_map={'Engineering': 'red', 'Sales': 'blue', 'Marketing': 'green', 'HR': 'purple', 'Finance': 'orange', 'Operations': 'brown'})
+        cube = get_aggregate_cube(df)
+        if cube.exact['EngagementScore']:
+            # Integer scores: re-bin the cube's per-value counts instead of rescanning the rows
+            edges, counts = cube.histogram('EngagementScore', by='Department')
+            engagement_summary = histogram_summary_from_counts(edges[:-1], counts)
+        else:
+            engagement_summary = histogram_summary(df, 'EngagementScore', color='Department')
+        fig_engagement = histogram_figure(engagement_summary,
+                                          title='Engagement Score Distribution', x_label='Engagement Score',
+                                          colors=px.colors.qualitative.Plotly, legend_title='Department',
+                                          color_map={'Engineering': 'red', 'IT': 'teal', 'Sales': 'blue', 'Marketing': 'green', 'HR': 'purple', 'Finance': 'orange', 'Operations': 'brown'})
         figures["Engagement Score Distribution (Engineering vs. Others)"] = fig_engagement
-    else:
-        st.warning("Cannot generate 'Engagement Score Distribution' chart: 'EngagementScore' or 'Department' column missing.")
 
     if 'TenureYears' in df.columns and 'Attrition' in df.columns and 'Department' in df.columns:
-        engineering_df = df[df['Department'] == 'Engineering']
-        eng_attrition_df = engineering_df[engineering_df['Attrition'] == 1]
-        if not eng_attrition_df.empty:
-            fig_tenure_attrition = px.histogram(eng_attrition_df, x='TenureYears', nbins=10,
-                                                title='Tenure of Employees with Attrition (Engineering)',
-                                                labels={'TenureYears': 'Tenure (Years)'},
-                                                color_discrete_sequence=px.colors.qualitative.Set1)
-            figures["Tenure of Employees with Attrition (Engineering)"] = fig_tenure_attrition
+        if is_out_of_core(df):
+            # Pushed down to the Parquet reader, so only matching row groups are decoded
+            tenure_summary = df.histogram_summary('TenureYears', nbins=10,
+                                                  filters={'Department': 'Engineering', 'Attrition': 1})
+            has_cases = any(counts.any() for counts in tenure_summary['counts'].values())
         else:
-            st.info("No attrition cases in Engineering department to plot tenure distribution.")
-    else:
-        st.warning("Cannot generate 'Tenure for Attrition Cases' chart: Required columns missing.")
+            eng_attrition_df = df[category_mask(df['Department'], 'Engineering') & (df['Attrition'] == 1).to_numpy()]
+            has_cases = not eng_attrition_df.empty
+            tenure_summary = histogram_summary(eng_attrition_df, 'TenureYears', nbins=10) if has_cases else None
+        if has_cases:
+            fig_tenure_attrition = histogram_figure(tenure_summary,
+                                                    title='Tenure of Employees with Attrition (Engineering)',
+                                                    x_label='Tenure (Years)',
+                                                    colors=px.colors.qualitative.Set1)
+            figures["Tenure of Employees with Attrition (Engineering)"] = fig_tenure_attrition
 
     return figures
 
+
+def get_diagnostic_analytics_notes(df, figures):
+    """Why charts are missing from `figures`, as (level, message) pairs for the page or CLI to show."""
+    notes = []
+    if "Engagement Score Distribution (Engineering vs. Others)" not in figures:
+        notes.append(('warning', "Cannot generate 'Engagement Score Distribution' chart: 'EngagementScore' or 'Department' column missing."))
+    if "Tenure of Employees with Attrition (Engineering)" not in figures:
+        if all(col in df.columns for col in ['TenureYears', 'Attrition', 'Department']):
+            notes.append(('info', "No attrition cases in Engineering department to plot tenure distribution."))
+        else:
+            notes.append(('warning', "Cannot generate 'Tenure for Attrition Cases' chart: Required columns missing."))
+    return notes
+
+@instrumented('page.diagnostic')
 def display_diagnostic_analytics_page(df):
     st.set_page_config(page_title="Diagnostic Analytics")
     st.header("Diagnostic Analytics: Identifying Root Causes")
@@ -56,15 +76,17 @@ def display_diagnostic_analytics_page(df):
     st.subheader("Case Study: High Attrition in Engineering Department")
     st.info("Apexon Pulse detects an anomaly: The Engineering department shows a significantly higher attrition rate.")
 
+    df = enrich_employee_data(df)
     if 'Department' in df.columns and 'Attrition' in df.columns:
-        engineering_df = df[df['Department'] == 'Engineering']
-        total_eng = engineering_df.shape[0]
-        attrition_eng = engineering_df['Attrition'].sum()
-        attrition_rate_eng = (attrition_eng / total_eng) * 100 if total_eng > 0 else 0
+        # Rates are slices of the aggregate cube rather than scans of the frame
+        cube = get_aggregate_cube(df)
+        attrition_rate_eng = cube.rollup(filters={'Department': 'Engineering'})['AttritionRate']
+        attrition_rate_eng = attrition_rate_eng * 100 if pd.notna(attrition_rate_eng) else 0
+        overall_attrition_rate = cube.rollup()['AttritionRate'] * 100
 
         st.markdown(f"""
         * **Engineering Department Attrition Rate:** **{attrition_rate_eng:.1f}%**
-        * **Overall Company Attrition Rate:** **{(df['Attrition'].sum() / df.shape[0]) * 100:.1f}%**
+        * **Overall Company Attrition Rate:** **{overall_attrition_rate:.1f}%**
         """)
     else:
         st.warning("Cannot calculate attrition rates: 'Department' or 'Attrition' column missing.")
@@ -76,25 +98,56 @@ def display_diagnostic_analytics_page(df):
 
     # Get and display figures
     figures = get_diagnostic_analytics_figures(df)
+    display_notes(get_diagnostic_analytics_notes(df, figures))
     col1, col2 = st.columns(2)
     with col1:
         if "Engagement Score Distribution (Engineering vs. Others)" in figures:
             st.subheader("Engagement Score Distribution (Engineering vs. Others)")
-            st.plotly_chart(figures["Engagement Score Distribution (Engineering vs. Others)"], use_container_width=True)
+            st.plotly_chart(compact_figure(figures["Engagement Score Distribution (Engineering vs. Others)"]), use_container_width=True)
             st.markdown("""
             * **Insight:** Engineering employees with attrition often show lower engagement scores.
             """)
     with col2:
         if "Tenure of Employees with Attrition (Engineering)" in figures:
             st.subheader("Tenure for Attrition Cases (Engineering)")
-            st.plotly_chart(figures["Tenure of Employees with Attrition (Engineering)"], use_container_width=True)
+            st.plotly_chart(compact_figure(figures["Tenure of Employees with Attrition (Engineering)"]), use_container_width=True)
             st.markdown("""
             * **Insight:** A significant portion of attrition in Engineering occurs within the 1-3 year tenure range.
             """)
 
+    display_slice_and_dice(df)
+
     st.markdown("""
     **Apexon Pulse's Recommendations for Engineering:**
     * Implement targeted retention programs for employees in their early career stages.
     * Conduct deeper surveys to understand specific pain points affecting engagement in Engineering.
     * Review workload and career development opportunities within the department.
-    """)
\ No newline at end of file
+    """)
+
+
+def display_slice_and_dice(df):
+    """Interactive department x role x gender x tenure band filters, answered from the aggregate cube."""
+    st.subheader("Slice and Dice")
+    cube = get_aggregate_cube(df)
+    filters = {}
+    columns = st.columns(len(DIMENSIONS))
+    for column, dim in zip(columns, DIMENSIONS):
+        with column:
+            selected = st.multiselect(dim, cube.labels[dim], key=f"slice_{dim}")
+        if selected:
+            filters[dim] = selected
+
+    totals = cube.rollup(filters=filters)
+    if totals['Headcount'] == 0:
+        st.info("No employees match the selected filters.")
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Employees", f"{int(totals['Headcount']):,}")
+    col2.metric("Attrition Rate", f"{totals['AttritionRate'] * 100:.1f}%" if pd.notna(totals['AttritionRate']) else "n/a")
+    col3.metric("Average Salary", f"${totals['AvgSalary']:,.0f}" if pd.notna(totals['AvgSalary']) else "n/a")
+    col4.metric("Average Engagement", f"{totals['AvgEngagementScore']:.1f}" if pd.notna(totals['AvgEngagementScore']) else "n/a")
+
+    breakdown = st.selectbox("Break down by", DIMENSIONS, key="slice_breakdown")
+    table = cube.rollup(by=breakdown, filters=filters)
+    table['AttritionRate'] = table['AttritionRate'] * 100
+    st.dataframe(table.rename(columns={'AttritionRate': 'AttritionRate (%)'}).round(1), use_container_width=True)
@@ -0,0 +1,66 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+DEPARTMENTS = ['Engineering', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations']
+
+
+def dataset_seed(df):
+    """Stable RNG seed for a dataset, so imputed values are identical on every page and rerun."""
+    key = df.attrs.get('dataset_key', '')
+    return int(hashlib.sha256(key.encode()).hexdigest()[:8], 16)
+
+
+@instrumented('enrichment.derive_columns')
+def derive_columns(df, as_of=None, seed=None):
+    """Computes the derived and placeholder columns `df` is missing, as {column name: array}."""
+    n = len(df)
+    rng = np.random.default_rng(dataset_seed(df) if seed is None else seed)
+    as_of = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+    columns = {}
+
+    hire_date = None
+    if 'HireDate' in df.columns:
+        hire_date = df['HireDate']
+        if not pd.api.types.is_datetime64_any_dtype(hire_date):
+            hire_date = pd.to_datetime(hire_date, errors='coerce')
+            columns['HireDate'] = hire_date
+
+    if 'TenureYears' not in df.columns:
+        if hire_date is not None:
+            columns['TenureYears'] = ((as_of - hire_date).dt.days / 365.25).astype('float32')
+        else:
+            columns['TenureYears'] = np.round(rng.random(n) * 10, 1).astype('float32')
+    # Imputed columns use the same compact dtypes as `schema` declares for real data
+    if 'EngagementScore' not in df.columns:
+        columns['EngagementScore'] = rng.integers(60, 100, n, dtype=np.uint8)
+    if 'Attrition' not in df.columns:
+        columns['Attrition'] = rng.choice(np.array([0, 1], dtype=np.int8), n, p=[0.9, 0.1])
+    if 'Department' not in df.columns:
+        columns['Department'] = pd.Categorical.from_codes(rng.integers(0, len(DEPARTMENTS), n), DEPARTMENTS)
+    return columns
+
+
+def imputed_columns(columns):
+    """The columns `derive_columns` fills with random placeholders for a dataset that has `columns`."""
+    imputed = [name for name in ['EngagementScore', 'Attrition', 'Department'] if name not in columns]
+    if 'TenureYears' not in columns and 'HireDate' not in columns:
+        imputed.append('TenureYears')
+    return imputed
+
+
+def enrich_employee_data(df, as_of=None, seed=None):
+    """Returns `df` with all derived columns present, listing placeholders in `attrs['imputed_columns']`.
+
+    Registry frames and out-of-core datasets are returned as they are.
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df
+    columns = derive_columns(df, as_of=as_of, seed=seed)
+    if not columns:
+        return df
+    enriched = df.assign(**columns)
+    enriched.attrs = dict(df.attrs, imputed_columns=imputed_columns(df.columns))
+    return enriched
@@ -0,0 +1,212 @@
+import base64
+import functools
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from instrumentation import mark_cache, stage
+from utils import atomic_path
+
+# Bump when chart code changes in a way that should invalidate cached artifacts.
+CACHE_VERSION = "4"
+
+
+class ArtifactCache:
+    """Thread-safe LRU cache of byte blobs, bounded by entry count and total size, with an optional disk tier."""
+
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024, disk_dir=None, disk_max_bytes=1024 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._disk_size = None
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    value = f.read()
+            except FileNotFoundError:
+                value = None
+            if value is not None:
+                self._put_memory(key, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._put_memory(key, value)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            with atomic_path(path) as tmp_path, open(tmp_path, 'wb') as f:
+                f.write(value)
+            with self._lock:
+                if self._disk_size is None:
+                    self._disk_size = self._scan_disk()[1]
+                else:
+                    self._disk_size += len(value) - replaced
+                over = self._disk_size > self.disk_max_bytes
+            if over:
+                self._trim_disk()
+
+    def _put_memory(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _scan_disk(self):
+        """(entries, total bytes) of the disk tier; other processes may have written to it too."""
+        entries = [e for e in os.scandir(self.disk_dir) if e.is_file() and not e.name.endswith('.tmp')]
+        return entries, sum(e.stat().st_size for e in entries)
+
+    def _trim_disk(self):
+        """Deletes the least recently written entries until the disk tier fits in `disk_max_bytes`."""
+        entries, total = self._scan_disk()
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            if total <= self.disk_max_bytes:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._disk_size = total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide artifact cache. Set APEXON_PULSE_CACHE_DIR to enable the disk tier."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArtifactCache(disk_dir=os.environ.get("APEXON_PULSE_CACHE_DIR") or None)
+        return _cache
+
+
+def content_fingerprint(df):
+    """Identifies a dataset's contents regardless of the day: the registry's dataset key if present, else a hash."""
+    key = df.attrs.get('dataset_key')
+    if key:
+        return key
+    digest = hashlib.sha256(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(df):
+    """Identifies a dataset version: the registry's version tag if present, else a hash of the contents."""
+    version = df.attrs.get('dataset_version')
+    if version:
+        return version
+    # Derived columns such as TenureYears are relative to today, so raw frames are versioned per day
+    return f"{content_fingerprint(df)}/{pd.Timestamp.today().date()}"
+
+
+def cache_key(*parts):
+    return hashlib.sha256("\x1f".join([CACHE_VERSION, *map(str, parts)]).encode()).hexdigest()
+
+
+def _dump(result):
+    """Serializes builder results to JSON, never pickle: the disk tier may be shared between users."""
+    with stage('figures.serialize'):
+        parts = [_part_to_json(part) for part in (result if isinstance(result, tuple) else (result,))]
+        return json.dumps({'tuple': isinstance(result, tuple), 'parts': parts}).encode()
+
+
+def _load(blob):
+    with stage('figures.deserialize'):
+        document = json.loads(blob)
+        parts = tuple(_part_from_json(part) for part in document['parts'])
+        return parts if document['tuple'] else parts[0]
+
+
+def _part_to_json(part):
+    if isinstance(part, dict) and all(isinstance(fig, go.Figure) for fig in part.values()):
+        return {'figures': {title: fig.to_json() for title, fig in part.items()}}
+    if isinstance(part, pd.DataFrame):
+        # Parquet keeps the index and dtypes (categoricals, float32) that JSON would lose
+        buffer = io.BytesIO()
+        part.to_parquet(buffer)
+        return {'frame': base64.b64encode(buffer.getvalue()).decode('ascii')}
+    raise TypeError(f"Cannot cache a {type(part).__name__}; builders return figure dicts and frames.")
+
+
+def _part_from_json(part):
+    if 'figures' in part:
+        return {title: pio.from_json(fig_json, skip_invalid=True) for title, fig_json in part['figures'].items()}
+    return pd.read_parquet(io.BytesIO(base64.b64decode(part['frame'])))
+
+
+def cached_figures(spec):
+    """Decorator for `get_*_figures(df)` builders: results are cached by dataset fingerprint and `spec`."""
+    def decorator(build):
+        @functools.wraps(build)
+        def wrapper(df, *args, **kwargs):
+            with stage(f'figures.{spec}', rows=len(df)):
+                key = cache_key('figures', spec, dataset_fingerprint(df), args, sorted(kwargs.items()))
+                blob = get_cache().get(key)
+                mark_cache(blob is not None)
+                if blob is not None:
+                    return _load(blob)
+                result = build(df, *args, **kwargs)
+                get_cache().put(key, _dump(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def cached_bytes(key, build):
+    """Returns the cached bytes for `key`, calling `build()` and caching its result on a miss."""
+    value = get_cache().get(key)
+    mark_cache(value is not None)
+    if value is None:
+        value = build()
+        if value:
+            get_cache().put(key, value)
+    return value
@@ -0,0 +1,176 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+from instrumentation import instrumented, mark_cache
+from schema import CATEGORICAL_COLUMNS, CSV_DTYPES, INTEGER_COLUMNS, apply_schema, compact_frame
+from utils import atomic_path
+
+# Bump when the schema or cache layout changes so stale caches are rebuilt.
+CACHE_FORMAT_VERSION = "1"
+# Parquet caches of CSV sources; a subdirectory, so the artifact cache's disk tier never trims them
+CACHE_DIR = os.path.join(os.environ.get("APEXON_PULSE_CACHE_DIR") or "cache", "ingestion")
+DEFAULT_CHUNKSIZE = 250_000
+SHARD_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+# Starting a worker process costs a few hundred ms, so smaller exports are parsed in-process
+SHARD_POOL_MIN_BYTES = 128 * 1024 * 1024
+
+
+def parquet_cache_path(csv_path):
+    """The cache file for `csv_path` in CACHE_DIR, named after the source's absolute path."""
+    source = os.path.abspath(csv_path)
+    digest = hashlib.sha256(source.encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(source)}.{digest}.parquet")
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': CACHE_FORMAT_VERSION}
+
+
+def _read_cache(cache_path, signature):
+    """Returns the cached frame if it was built from this exact version of the source, else None."""
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return None
+    if json.loads(metadata.get(b'apexon_source', b'{}')) != signature:
+        return None
+    return compact_frame(pq.read_table(cache_path, memory_map=True).to_pandas())
+
+
+def _arrow_schema(chunk, signature):
+    """Arrow schema for the cache: fixed dictionary index width so every chunk fits the same schema."""
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, field in enumerate(schema):
+        if field.name in CATEGORICAL_COLUMNS:
+            schema = schema.set(i, pa.field(field.name, pa.dictionary(pa.int32(), pa.string())))
+        elif field.name in INTEGER_COLUMNS and chunk[field.name].dtype == 'float32':
+            # A narrow integer column with gaps; arrow can keep it narrow with nulls
+            schema = schema.set(i, pa.field(field.name, pa.from_numpy_dtype(np.dtype(INTEGER_COLUMNS[field.name]))))
+    return schema.with_metadata({**schema.metadata, b'apexon_source': json.dumps(signature).encode()})
+
+
+def _write_cache(cache_path, chunks, signature):
+    schema = _arrow_schema(chunks[0], signature)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with atomic_path(cache_path) as tmp_path, pq.ParquetWriter(tmp_path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _concat_chunks(chunks):
+    """Concatenates typed chunks, unifying categories so categorical columns stay categorical."""
+    if len(chunks) == 1:
+        return chunks[0]
+    for col in CATEGORICAL_COLUMNS:
+        if col in chunks[0].columns:
+            categories = union_categoricals([chunk[col] for chunk in chunks]).categories
+            chunks = [chunk.assign(**{col: chunk[col].cat.set_categories(categories)}) for chunk in chunks]
+    return pd.concat(chunks, ignore_index=True)
+
+
+@instrumented('ingestion.read_csv')
+def read_employee_csv(csv_path, chunksize=DEFAULT_CHUNKSIZE, use_cache=True):
+    """Loads an employee CSV with the declared schema, via a Parquet cache in CACHE_DIR while the source is unchanged."""
+    cache_path = parquet_cache_path(csv_path)
+    caching = use_cache
+    if caching:
+        signature = _source_signature(csv_path)
+        cached = _read_cache(cache_path, signature)
+        mark_cache(cached is not None)
+        if cached is not None:
+            return cached
+
+    chunks = [apply_schema(chunk) for chunk in pd.read_csv(csv_path, dtype=CSV_DTYPES, chunksize=chunksize)]
+    if caching and chunks:
+        try:
+            _write_cache(cache_path, chunks, signature)
+        except (OSError, pa.ArrowException):
+            pass  # Caching is best effort: a read-only directory or an odd chunk shouldn't fail the load
+
+    if not chunks:
+        return compact_frame(pd.read_csv(csv_path, dtype=CSV_DTYPES))
+    return compact_frame(_concat_chunks(chunks))
+
+
+@dataclass
+class ShardReport:
+    """How one shard of a multi-file load went."""
+    path: str
+    rows: int = 0
+    seconds: float = 0.0
+    error: str = None
+
+
+def resolve_shards(source):
+    """The CSV/XLSX files a directory or glob pattern refers to, sorted so the row order is stable."""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source)
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(SHARD_EXTENSIONS))
+
+
+def _read_shard(path):
+    """Worker entry point: parses and types one shard. Returns (Arrow table or frame, ShardReport), never raises."""
+    start = time.perf_counter()
+    try:
+        if path.lower().endswith(('.xlsx', '.xls')):
+            frame = compact_frame(pd.read_excel(path, dtype=CSV_DTYPES))
+        else:
+            frame = read_employee_csv(path)
+        # Arrow tables cross the process boundary as raw buffers rather than pickled objects
+        table = pa.Table.from_pandas(frame, preserve_index=False) if pa is not None else frame
+        return table, ShardReport(path, len(frame), time.perf_counter() - start)
+    except Exception as e:  # any parse failure is that shard's error, not the load's
+        return None, ShardReport(path, 0, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+
+def _read_shards_parallel(paths, workers, min_pool_bytes=SHARD_POOL_MIN_BYTES):
+    """(table, report) per shard in `paths` order, parsed in a process pool; in-process if no pool can start."""
+    results = {}
+    if workers > 1 and len(paths) > 1 and sum(os.path.getsize(p) for p in paths) >= min_pool_bytes:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                for path, result in zip(paths, pool.map(_read_shard, paths)):
+                    results[path] = result
+        except (BrokenProcessPool, OSError):
+            pass  # e.g. a sandbox without process support; whatever is missing is read below
+    return [results[path] if path in results else _read_shard(path) for path in paths]
+
+
+def _concat_tables(tables):
+    """Concatenates typed shards into one frame, widening types and merging category dictionaries."""
+    table = pa.concat_tables(tables, promote_options='permissive')
+    return table.unify_dictionaries().to_pandas()
+
+
+@instrumented('ingestion.read_shards')
+def read_employee_shards(source, workers=None, min_pool_bytes=SHARD_POOL_MIN_BYTES):
+    """Loads every CSV/XLSX shard under a directory or glob as one typed frame, in parallel.
+
+    Returns (frame, [ShardReport]); failed shards are skipped. Raises ValueError if none loaded.
+    """
+    paths = resolve_shards(source)
+    if not paths:
+        raise ValueError(f"No CSV or XLSX files found for '{source}'.")
+    results = _read_shards_parallel(paths, workers or os.cpu_count() or 1, min_pool_bytes)
+    reports = [report for _, report in results]
+    tables = [table for table, report in results if report.error is None and report.rows]
+    if not tables:
+        raise ValueError(f"None of the {len(paths)} shards for '{source}' could be loaded.")
+    return compact_frame(_concat_tables(tables)), reports
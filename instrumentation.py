@@ -0,0 +1,238 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Off unless APEXON_PULSE_METRICS is set; when off, nothing is wrapped
+ENABLED = os.environ.get("APEXON_PULSE_METRICS", "").lower() in ("1", "true", "yes", "on")
+# tracemalloc slows allocation-heavy code
+TRACK_MEMORY = ENABLED and os.environ.get("APEXON_PULSE_METRICS_MEMORY", "1") != "0"
+BUFFER_SIZE = int(os.environ.get("APEXON_PULSE_METRICS_BUFFER", "2000"))
+# numpy and pandas are only imported by the reporting functions, so importing this module stays cheap.
+
+_records = deque(maxlen=BUFFER_SIZE)
+# Cumulative per-stage totals since start-up (never evicted), for Prometheus counters
+_totals = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+if TRACK_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def _active_stages():
+    stack = getattr(_local, 'active', None)
+    if stack is None:
+        stack = _local.active = []
+    return stack
+
+
+def _memory_stack():
+    stack = getattr(_local, 'memory', None)
+    if stack is None:
+        stack = _local.memory = []
+    return stack
+
+
+def _enter_memory():
+    """Starts a peak-memory window, folding the peak so far into the enclosing stage's window."""
+    current, peak = tracemalloc.get_traced_memory()
+    stack = _memory_stack()
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    tracemalloc.reset_peak()
+    stack.append(0)
+    return current
+
+
+def _exit_memory(start_current):
+    """Peak bytes allocated above the level at stage entry (approximate when threads overlap)."""
+    _, peak = tracemalloc.get_traced_memory()
+    stack = _memory_stack()
+    stage_peak = max(stack.pop(), peak)
+    if stack:
+        stack[-1] = max(stack[-1], stage_peak)
+    return max(0, stage_peak - start_current)
+
+
+def _record(record):
+    _records.append(record)
+    with _lock:
+        totals = _totals.setdefault(record['stage'], {
+            'count': 0, 'seconds': 0.0, 'rows': 0, 'errors': 0, 'cache_hits': 0, 'cache_misses': 0,
+            'peak_bytes_max': 0})
+        totals['count'] += 1
+        totals['seconds'] += record['wall_s']
+        totals['rows'] += record['rows'] or 0
+        totals['errors'] += record['error'] is not None
+        totals['cache_hits'] += record['cache'] == 'hit'
+        totals['cache_misses'] += record['cache'] == 'miss'
+        totals['peak_bytes_max'] = max(totals['peak_bytes_max'], record['peak_bytes'] or 0)
+
+
+class _Stage:
+    """Times one stage. The record it yields can be annotated with `rows` and `cache` ('hit'/'miss')."""
+
+    __slots__ = ('record', '_start', '_memory_start')
+
+    def __init__(self, name, rows):
+        self.record = {'stage': name, 'started_at': time.time(), 'wall_s': 0.0, 'rows': rows,
+                       'peak_bytes': None, 'cache': None, 'error': None}
+
+    def __enter__(self):
+        _active_stages().append(self.record)
+        self._memory_start = _enter_memory() if TRACK_MEMORY else None
+        self._start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record['wall_s'] = time.perf_counter() - self._start
+        _active_stages().pop()
+        if self._memory_start is not None:
+            self.record['peak_bytes'] = _exit_memory(self._memory_start)
+        if exc_type is not None:
+            self.record['error'] = exc_type.__name__
+        _record(self.record)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+    _record = {}
+
+    def __enter__(self):
+        return self._record
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, rows=None):
+    """Context manager timing a block as stage `name`; yields a record dict the block may annotate."""
+    return _Stage(name, rows) if ENABLED else _NULL_STAGE
+
+
+def mark_cache(hit):
+    """Notes a cache hit or miss on the innermost running stage of this thread, if any."""
+    if ENABLED:
+        stack = _active_stages()
+        if stack:
+            stack[-1]['cache'] = 'hit' if hit else 'miss'
+
+
+def _default_rows(args, result):
+    """Rows processed: the first DataFrame argument's length, else the result's if it is a DataFrame."""
+    for value in (*args, result):
+        if hasattr(value, 'columns') and hasattr(value, 'iloc'):
+            return len(value)
+    return None
+
+
+def instrumented(name=None, rows=_default_rows):
+    """Decorator recording each call as a stage, with `rows(args, result)` rows processed; a no-op when metrics are off."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        stage_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                record['rows'] = rows(args, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def records():
+    """The buffered stage records, oldest first."""
+    return list(_records)
+
+
+def clear():
+    _records.clear()
+    with _lock:
+        _totals.clear()
+
+
+def summary():
+    """Per-stage statistics over the buffered records, slowest total time first."""
+    import pandas as pd
+    frame = pd.DataFrame(records(), columns=['stage', 'started_at', 'wall_s', 'rows', 'peak_bytes', 'cache', 'error'])
+    if frame.empty:
+        return pd.DataFrame(columns=['calls', 'total_ms', 'mean_ms', 'p95_ms', 'max_ms', 'rows', 'peak_mb',
+                                     'cache_hit_rate', 'errors'])
+    grouped = frame.groupby('stage')
+    wall_ms = grouped['wall_s']
+    cache_calls = grouped['cache'].count()
+    result = pd.DataFrame({
+        'calls': grouped.size(),
+        'total_ms': wall_ms.sum() * 1e3,
+        'mean_ms': wall_ms.mean() * 1e3,
+        'p95_ms': wall_ms.quantile(0.95) * 1e3,
+        'max_ms': wall_ms.max() * 1e3,
+        'rows': grouped['rows'].max(),
+        'peak_mb': grouped['peak_bytes'].max() / 2 ** 20,
+        'cache_hit_rate': (frame['cache'] == 'hit').groupby(frame['stage']).sum() / cache_calls.where(cache_calls > 0),
+        'errors': grouped['error'].count(),
+    })
+    return result.sort_values('total_ms', ascending=False)
+
+
+def export_json():
+    """Buffered records plus cumulative per-stage totals, as a JSON document."""
+    with _lock:
+        totals = {name: dict(values) for name, values in _totals.items()}
+    return json.dumps({'enabled': ENABLED, 'records': records(), 'totals': totals}, indent=2)
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def export_prometheus():
+    """Cumulative stage metrics in the Prometheus text exposition format."""
+    import numpy as np
+    with _lock:
+        totals = {name: dict(values) for name, values in _totals.items()}
+    recent = {}
+    for record in records():
+        recent.setdefault(record['stage'], []).append(record['wall_s'])
+
+    lines = ["# HELP apexon_pulse_stage_seconds Wall time per instrumented stage.",
+             "# TYPE apexon_pulse_stage_seconds summary"]
+    for name, values in sorted(totals.items()):
+        if name in recent:
+            for q in (0.5, 0.95):
+                lines.append(f"apexon_pulse_stage_seconds{{{_labels(stage=name, quantile=q)}}} "
+                             f"{np.quantile(recent[name], q):.6f}")
+        lines.append(f"apexon_pulse_stage_seconds_sum{{{_labels(stage=name)}}} {values['seconds']:.6f}")
+        lines.append(f"apexon_pulse_stage_seconds_count{{{_labels(stage=name)}}} {values['count']}")
+    lines += ["# HELP apexon_pulse_stage_rows_total Rows processed per stage.",
+              "# TYPE apexon_pulse_stage_rows_total counter"]
+    lines += [f"apexon_pulse_stage_rows_total{{{_labels(stage=name)}}} {values['rows']}"
+              for name, values in sorted(totals.items())]
+    lines += ["# HELP apexon_pulse_stage_errors_total Stage calls that raised.",
+              "# TYPE apexon_pulse_stage_errors_total counter"]
+    lines += [f"apexon_pulse_stage_errors_total{{{_labels(stage=name)}}} {values['errors']}"
+              for name, values in sorted(totals.items())]
+    lines += ["# HELP apexon_pulse_cache_requests_total Cache lookups per stage by result.",
+              "# TYPE apexon_pulse_cache_requests_total counter"]
+    for name, values in sorted(totals.items()):
+        if values['cache_hits'] or values['cache_misses']:
+            lines.append(f"apexon_pulse_cache_requests_total{{{_labels(stage=name, result='hit')}}} {values['cache_hits']}")
+            lines.append(f"apexon_pulse_cache_requests_total{{{_labels(stage=name, result='miss')}}} {values['cache_misses']}")
+    lines += ["# HELP apexon_pulse_stage_peak_bytes Largest peak traced allocation seen per stage.",
+              "# TYPE apexon_pulse_stage_peak_bytes gauge"]
+    lines += [f"apexon_pulse_stage_peak_bytes{{{_labels(stage=name)}}} {values['peak_bytes_max']}"
+              for name, values in sorted(totals.items()) if TRACK_MEMORY]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,335 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+
+from aggregate_cube import DIMENSIONS, AggregateCube, _dimension_labels, merge_labels
+from attrition_model import CATEGORICAL_FEATURES, NUMERIC_FEATURES, score_attrition_risk
+from chart_utils import box_stats_from_counts, histogram_summary_from_counts
+from data_cleaning import CLEANED_COLUMNS, RANGE_RULES, REPORT_COLUMNS, clean_columns, rating_scale
+from enrichment import dataset_seed, derive_columns
+from instrumentation import instrumented
+from schema import MEASURES
+from top_k import top_k_indices, top_k_per_group
+
+BATCH_ROWS = 1_000_000
+READAHEAD = 1
+# Read along with derived columns so imputed values don't depend on the query
+DERIVATION_INPUTS = ['HireDate', 'TenureYears', 'EngagementScore', 'Attrition', 'Department']
+BACKEND = os.environ.get("APEXON_PULSE_BACKEND", "auto")
+BACKENDS = ['auto', 'memory', 'out-of-core']
+
+
+def _default_budget():
+    """A quarter of physical memory."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 4
+    except (AttributeError, OSError, ValueError):
+        return 2 * 1024 ** 3
+
+
+OUT_OF_CORE_BYTES = int(os.environ.get("APEXON_PULSE_OUT_OF_CORE_BYTES") or _default_budget())
+
+
+def parquet_files(path):
+    """The data files of a Parquet file or directory, in a stable order, without snapshot aggregates."""
+    if os.path.isfile(path):
+        return [path]
+    from snapshot_store import AGGREGATES_FILE
+    files = []
+    for directory, subdirectories, names in os.walk(path):
+        subdirectories.sort()
+        files += [os.path.join(directory, name) for name in sorted(names)
+                  if name.endswith('.parquet') and name != AGGREGATES_FILE]
+    if not files:
+        raise ValueError(f"No Parquet files found at '{path}'.")
+    return files
+
+
+def _open_dataset(path):
+    files = parquet_files(path)
+    if os.path.isfile(path):
+        return pads.dataset(files, format='parquet')
+    # Hive-style directories (e.g. snapshot_date=2025-06-30) become a column
+    return pads.dataset(files, format='parquet', partitioning='hive', partition_base_dir=path)
+
+
+def estimated_frame_bytes(path):
+    """Decoded size of a Parquet dataset, from its footer metadata."""
+    total = 0
+    for fragment in _open_dataset(path).get_fragments():
+        metadata = fragment.metadata
+        total += sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+    return total
+
+
+def read_parquet_frame(path):
+    """The whole Parquet dataset at `path` as one frame."""
+    return _open_dataset(path).to_table().to_pandas()
+
+
+def choose_backend(path, backend=None):
+    """'memory' or 'out-of-core' for the Parquet dataset at `path`."""
+    backend = backend or BACKEND
+    if backend != 'auto':
+        return backend
+    return 'out-of-core' if estimated_frame_bytes(path) > OUT_OF_CORE_BYTES else 'memory'
+
+
+def _filter_expression(filters):
+    expression = None
+    for name, value in filters.items():
+        term = pc.field(name).isin(list(value)) if isinstance(value, (list, tuple)) else pc.field(name) == value
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _filter_mask(frame, filters):
+    mask = np.ones(len(frame), dtype=bool)
+    for name, value in filters.items():
+        mask &= frame[name].isin(list(value) if isinstance(value, (list, tuple)) else [value]).to_numpy()
+    return mask
+
+
+class ParquetDataset:
+    """An employee dataset scanned from Parquet in record batches, for workforces too large for a frame.
+
+    Batches are cleaned and enriched as they are read; duplicate ids are not dropped. Pickles by path.
+    """
+
+    def __init__(self, path, as_of=None):
+        self.path = path
+        self.as_of = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+        self.attrs = {}
+        self._open()
+
+    def _open(self):
+        self.dataset = _open_dataset(self.path)
+        stored = list(self.dataset.schema.names)
+        derived = derive_columns(self.dataset.schema.empty_table().to_pandas(), as_of=self.as_of)
+        self._stored = stored
+        self._derived = [name for name in derived if name not in stored]
+        # Everything but tenure from hire dates is random imputation, which filters must not reorder
+        deterministic = {'HireDate', 'TenureYears'} if 'HireDate' in stored else {'HireDate'}
+        self._imputed = {name for name in self._derived if name not in deterministic}
+        self.attrs['imputed_columns'] = sorted(self._imputed)
+        self.columns = pd.Index(stored + self._derived)
+        self._num_rows = None
+        self._scales = None
+        self._quality = None
+
+    def __getstate__(self):
+        return {'path': self.path, 'as_of': self.as_of, 'attrs': self.attrs}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self):
+        if self._num_rows is None:
+            self._num_rows = self.dataset.count_rows()
+        return self._num_rows
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def head(self, n=100):
+        frame = self.dataset.head(n).to_pandas()
+        return frame.assign(**clean_columns(frame, self.rating_scales())[0])
+
+    def _scanner(self, columns, filter=None):
+        # Arrow's read-ahead defaults keep row groups resident well past their batch
+        return self.dataset.scanner(columns=columns, filter=filter,
+                                    batch_size=BATCH_ROWS, batch_readahead=READAHEAD, fragment_readahead=READAHEAD,
+                                    use_threads=False,
+                                    fragment_scan_options=pads.ParquetFragmentScanOptions(pre_buffer=False))
+
+    def rating_scales(self):
+        """The scale of every stored 'rescale' column over the whole dataset."""
+        if self._scales is None:
+            scales = {}
+            for name, (low, high, action) in RANGE_RULES.items():
+                if action != 'rescale' or name not in self._stored:
+                    continue
+                lowest, highest = np.inf, -np.inf
+                for batch in self._scanner([name]).to_batches():
+                    bounds = pc.min_max(pc.cast(batch.column(0), pa.float64()))
+                    if bounds['min'].is_valid:
+                        lowest, highest = min(lowest, bounds['min'].as_py()), max(highest, bounds['max'].as_py())
+                scales[name] = rating_scale(lowest, highest, low, high) if lowest <= highest else (low, high)
+            self._scales = scales
+        return self._scales
+
+    @instrumented('out_of_core.quality_report')
+    def quality_report(self):
+        """`clean_employee_data`'s report, summed over one scan (without duplicates)."""
+        if self._quality is None:
+            totals = {}
+            cleaned = [name for name in CLEANED_COLUMNS if name in self._stored]
+            for batch in self._scanner(cleaned).to_batches() if cleaned else []:
+                for check, column, rows, action in clean_columns(batch.to_pandas(), self.rating_scales())[1]:
+                    totals[check, column, action] = totals.get((check, column, action), 0) + rows
+            self._quality = pd.DataFrame([(check, column, rows, action) for (check, column, action), rows in totals.items()],
+                                         columns=REPORT_COLUMNS)
+        return self._quality
+
+    def batches(self, columns, filters=None):
+        """Yields (row offset, frame) per cleaned batch of `columns`; offsets are None when filtered.
+
+        `filters` ({column: value or values}) go to the reader only where cleaning and imputation can't change them.
+        """
+        columns = [name for name in columns if name in self.columns]
+        filters = filters or {}
+        derive = [name for name in [*columns, *filters] if name in self._derived]
+        pushed = {} if self._imputed.intersection(derive) else {
+            name: value for name, value in filters.items() if name in self._stored and name not in CLEANED_COLUMNS}
+        applied = {name: value for name, value in filters.items() if name not in pushed}
+        read = [name for name in columns if name in self._stored]
+        if derive:
+            read += [name for name in DERIVATION_INPUTS if name in self._stored and name not in read]
+        read += [name for name in applied if name in self._stored and name not in read]
+
+        scanner = self._scanner(read, _filter_expression(pushed) if pushed else None)
+        scales = self.rating_scales()
+        seed = dataset_seed(self)
+        offset = 0
+        for index, batch in enumerate(scanner.to_batches()):
+            if batch.num_rows == 0:
+                continue
+            frame = batch.to_pandas()
+            cleaned = clean_columns(frame, scales)[0]
+            if cleaned:
+                frame = frame.assign(**cleaned)
+            if derive:
+                derived = derive_columns(frame, as_of=self.as_of, seed=seed + index)
+                frame = frame.assign(**{name: derived[name] for name in derive if name in derived})
+            if applied:
+                frame = frame[_filter_mask(frame, applied)]
+            yield (None if filters else offset), frame[columns]
+            offset += batch.num_rows
+
+    @instrumented('out_of_core.cube')
+    def build_cube(self):
+        """The aggregate cube, in two scans: labels, then statistics."""
+        labels = {dim: [] for dim in DIMENSIONS}
+        for _, frame in self.batches([name for name in [*DIMENSIONS, 'TenureYears'] if name in self.columns]):
+            for dim in DIMENSIONS:
+                labels[dim] = merge_labels(labels[dim], _dimension_labels(frame, dim))
+        columns = [name for name in [*DIMENSIONS, *MEASURES] if name in self.columns]
+        return AggregateCube.from_batches((frame for _, frame in self.batches(columns)), labels)
+
+    @instrumented('out_of_core.value_counts')
+    def value_counts(self, column, by=None, filters=None):
+        """(distinct values, {group: counts}) of a numeric column; a single None group without `by`."""
+        groups = {None: 0} if by is None else {}
+        merged = pd.Series(dtype=np.int64)
+        for _, frame in self.batches([name for name in [column, by] if name], filters):
+            values = frame[column].to_numpy(dtype=float, na_value=np.nan)
+            if by is None:
+                gid = np.zeros(len(frame), dtype=np.int64)
+            else:
+                grouping = frame[by] if isinstance(frame[by].dtype, pd.CategoricalDtype) else frame[by].astype('category')
+                codes = grouping.cat.codes.to_numpy()
+                labels = grouping.cat.categories
+                # Groups in order of first appearance, as in a groupby
+                for code in pd.unique(codes[codes >= 0]):
+                    groups.setdefault(labels[code], len(groups))
+                lookup = np.array([groups.get(label, -1) for label in labels] + [-1], dtype=np.int64)
+                gid = lookup[codes]
+            keep = (gid >= 0) & ~np.isnan(values)
+            counts = pd.DataFrame({'group': gid[keep], 'value': values[keep]}).value_counts(sort=False)
+            merged = counts if merged.empty else pd.concat([merged, counts]).groupby(level=[0, 1]).sum()
+        values = np.unique(merged.index.get_level_values(1).to_numpy(dtype=float)) if len(merged) else np.empty(0)
+        counts = {}
+        for name, gid in groups.items():
+            part = merged[merged.index.get_level_values(0) == gid] if len(merged) else merged
+            counts[name] = np.bincount(np.searchsorted(values, part.index.get_level_values(1).to_numpy(dtype=float)),
+                                       weights=part.to_numpy(dtype=float), minlength=values.size).astype(np.int64)
+        return values, counts
+
+    def histogram_summary(self, x, nbins=None, color=None, filters=None):
+        """`chart_utils.histogram_summary` from value counts."""
+        values, counts = self.value_counts(x, by=color, filters=filters)
+        return histogram_summary_from_counts(values, counts, nbins)
+
+    def box_summary(self, x, y, max_outliers=500):
+        """`chart_utils.box_summary` from value counts, with exact quartiles."""
+        values, counts = self.value_counts(y, by=x)
+        return {name: box_stats_from_counts(values, c, max_outliers) for name, c in counts.items() if c.any()}
+
+    def training_sample(self, max_rows, seed=0):
+        """The rows `train_attrition_model` would sample from the whole frame."""
+        columns = [name for name in [*NUMERIC_FEATURES, *CATEGORICAL_FEATURES, 'Attrition'] if name in self.columns]
+        n = len(self)
+        positions = np.sort(np.random.default_rng(seed).choice(n, max_rows, replace=False)) if n > max_rows else None
+        parts = []
+        for offset, frame in self.batches(columns):
+            if positions is not None:
+                low, high = np.searchsorted(positions, [offset, offset + len(frame)])
+                frame = frame.iloc[positions[low:high] - offset]
+            parts.append(frame)
+        return _concat(parts, columns)
+
+    @instrumented('out_of_core.top_risks')
+    def top_risks(self, model, k, columns, by=None):
+        """The `k` highest-risk rows (a {group: frame} dict with `by`), indexed by row number, in one scan."""
+        features = [name for name in [*model['numeric'], *model['categories']] if name in self.columns]
+        carried = [name for name in columns if name in features or name in self._derived]
+        fetched = [name for name in columns if name in self._stored and name not in carried]
+        scan = [*features, *[name for name in carried if name not in features]]
+        if by is not None and by not in scan:
+            scan.append(by)
+
+        leaders, order = {}, []
+        for offset, frame in self.batches(scan):
+            scores = score_attrition_risk(model, frame)
+            if by is None:
+                picks = {None: top_k_indices(scores, k)}
+            else:
+                grouping = frame[by].astype('category')
+                labels = [str(c) for c in grouping.cat.categories]
+                order = merge_labels(order, labels)
+                per_group = top_k_per_group(scores, grouping.cat.codes.to_numpy(), k, len(labels))
+                picks = {label: positions for label, positions in zip(labels, per_group) if positions.size}
+            for group, positions in picks.items():
+                positions = np.sort(positions)
+                part = frame.iloc[positions][carried].assign(AttritionRiskScore=scores[positions],
+                                                            Position=offset + positions)
+                # Keep the pool in row order so ties go to the earlier row
+                pool = part if group not in leaders else pd.concat([leaders[group], part], ignore_index=True)
+                leaders[group] = pool.iloc[np.sort(top_k_indices(pool['AttritionRiskScore'].to_numpy(dtype=float), k))]
+
+        results = {}
+        for group, pool in leaders.items():
+            ranked = pool.iloc[top_k_indices(pool['AttritionRiskScore'].to_numpy(dtype=float), k)]
+            if fetched:
+                rows = self.dataset.take(pa.array(ranked['Position'].to_numpy(), type=pa.int64()), columns=fetched)
+                rows = rows.to_pandas()
+                rows = rows.assign(**clean_columns(rows, self.rating_scales())[0])
+                ranked = ranked.assign(**{name: rows[name].to_numpy() for name in fetched})
+            results[group] = ranked[[*[name for name in columns if name in ranked.columns], 'AttritionRiskScore']].set_axis(
+                pd.Index(ranked['Position'].to_numpy()), axis=0)
+        if by is None:
+            if None not in results:
+                return pd.DataFrame(columns=[*[name for name in columns if name in self.columns], 'AttritionRiskScore'])
+            return results[None]
+        return {group: results[group] for group in order if group in results}
+
+
+def _concat(parts, columns):
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    frame = pd.concat(parts, ignore_index=True)
+    for name in CATEGORICAL_FEATURES:
+        if name in frame.columns and not isinstance(frame[name].dtype, pd.CategoricalDtype):
+            frame[name] = frame[name].astype('category')
+    return frame
+
+
+def is_out_of_core(df):
+    return isinstance(df, ParquetDataset)
+
@@ -0,0 +1,162 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 200]
+DEFAULT_PAGE_SIZE = 50
+# Categorical filters offer a pick list up to this many categories, and a text search beyond it
+MAX_FILTER_CHOICES = 50
+
+
+class FrameSource:
+    """Table rows served from an in-memory frame, plus `extra` columns given as arrays."""
+
+    def __init__(self, frame, columns=None, extra=None):
+        self.frame = frame
+        self.extra = {name: np.asarray(values) for name, values in (extra or {}).items()}
+        self.columns = [c for c in (columns or frame.columns) if c in frame.columns] + list(self.extra)
+
+    @property
+    def num_rows(self):
+        return len(self.frame)
+
+    def column(self, name):
+        if name in self.extra:
+            return pd.Series(self.extra[name], copy=False)
+        return self.frame[name]
+
+    def take(self, positions):
+        window = self.frame.iloc[positions][[c for c in self.columns if c not in self.extra]]
+        return window.assign(**{name: values[positions] for name, values in self.extra.items()})[self.columns]
+
+
+def _sort_key(column, descending):
+    """A float key per row whose ascending order is the requested order; missing values always sort last."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Order categories by label, not by declaration order
+        rank = np.empty(len(column.cat.categories), dtype=np.float64)
+        rank[np.argsort(column.cat.categories.astype(str))] = np.arange(len(rank))
+        codes = column.cat.codes.to_numpy()
+        key = np.where(codes >= 0, rank[codes], np.nan)
+    elif pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+        key = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    elif pd.api.types.is_datetime64_any_dtype(column):
+        key = np.where(column.isna().to_numpy(), np.nan, column.to_numpy().astype('datetime64[ns]').astype(np.int64))
+        key = key.astype(np.float64)
+    else:
+        codes, _ = pd.factorize(column, sort=True)
+        key = np.where(codes >= 0, codes, np.nan).astype(np.float64)
+    if descending:
+        key = -key
+    return np.where(np.isnan(key), np.inf, key)
+
+
+def _ordered_window(key, candidates, start, stop):
+    """Positions start..stop of `candidates` in stable `key` order, without sorting the whole table."""
+    key = key[candidates]
+    if stop - start < candidates.size:
+        kth = [start, stop - 1] if start else [stop - 1]
+        bounds = np.partition(key, kth)[kth]
+        low, high = (bounds[0], bounds[-1]) if start else (-np.inf, bounds[0])
+        before = int(np.count_nonzero(key < low))
+        keep = np.flatnonzero((key >= low) & (key <= high))
+        candidates, key = candidates[keep], key[keep]
+        start, stop = start - before, stop - before
+    order = np.lexsort((candidates, key))
+    return candidates[order][start:stop]
+
+
+def _filter_mask(source, filters):
+    """Rows matching every filter. A filter is a list of values, a (low, high) range, or a text search."""
+    mask = np.ones(source.num_rows, dtype=bool)
+    for name, condition in (filters or {}).items():
+        column = source.column(name)
+        if isinstance(condition, tuple):
+            low, high = condition
+            values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        elif isinstance(condition, str):
+            if not condition:
+                continue
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Match against the categories once, then select rows by code
+                matches = column.cat.categories.astype(str).str.contains(condition, case=False, regex=False)
+                mask &= np.isin(column.cat.codes.to_numpy(), np.flatnonzero(matches))
+            else:
+                mask &= column.astype(str).str.contains(condition, case=False, regex=False).to_numpy()
+        else:
+            mask &= column.isin(list(condition)).to_numpy()
+    return mask
+
+
+def query_table(source, sort_by=None, descending=False, filters=None, start=0, stop=DEFAULT_PAGE_SIZE):
+    """Rows start..stop of the filtered, sorted table, and the number of rows matching the filters."""
+    mask = _filter_mask(source, filters) if filters else None
+    matched = source.num_rows if mask is None else int(np.count_nonzero(mask))
+    stop = min(stop, matched)
+    if start >= stop:
+        return source.take(np.array([], dtype=np.int64)), matched
+    if sort_by is None:
+        positions = np.arange(start, stop) if mask is None else np.flatnonzero(mask)[start:stop]
+    else:
+        candidates = np.arange(source.num_rows) if mask is None else np.flatnonzero(mask)
+        positions = _ordered_window(_sort_key(source.column(sort_by), descending), candidates, start, stop)
+    return source.take(positions), matched
+
+
+def _filter_controls(source, key):
+    """Widgets for one optional column filter; returns the filters dict for `query_table`."""
+    name = st.selectbox("Filter column", ["(none)", *source.columns], key=f"{key}_filter_column")
+    if name == "(none)":
+        return {}
+    column = source.column(name)
+    if isinstance(column.dtype, pd.CategoricalDtype) and len(column.cat.categories) <= MAX_FILTER_CHOICES:
+        chosen = st.multiselect(f"{name} is any of", list(column.cat.categories), key=f"{key}_filter_values_{name}")
+        return {name: chosen} if chosen else {}
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        low_col, high_col = st.columns(2)
+        low = low_col.number_input(f"{name} from", value=None, key=f"{key}_filter_low_{name}")
+        high = high_col.number_input(f"{name} to", value=None, key=f"{key}_filter_high_{name}")
+        return {name: (low, high)} if low is not None or high is not None else {}
+    text = st.text_input(f"{name} contains", key=f"{key}_filter_text_{name}")
+    return {name: text} if text else {}
+
+
+def display_paged_table(source, key, sort_by=None, descending=False, page_size=DEFAULT_PAGE_SIZE, column_config=None):
+    """Shows `source` one page at a time, with server-side sorting and filtering."""
+    @st.fragment
+    def table():
+        sort_col, order_col, size_col = st.columns([3, 2, 1])
+        sort_options = ["(none)", *source.columns]
+        sort_name = sort_col.selectbox("Sort by", sort_options, key=f"{key}_sort",
+                                       index=sort_options.index(sort_by) if sort_by in source.columns else 0)
+        order = order_col.radio("Order", ["Ascending", "Descending"], horizontal=True, key=f"{key}_order",
+                                index=1 if descending else 0)
+        size = size_col.selectbox("Rows", PAGE_SIZES, key=f"{key}_page_size",
+                                  index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 0)
+        filters = _filter_controls(source, key)
+
+        # The page box sits under the table but is read first; clamp it in case filtering shrank the table
+        page_key = f"{key}_page"
+        page = max(1, int(st.session_state.get(page_key) or 1))
+        window, matched = query_table(source, sort_by=None if sort_name == "(none)" else sort_name,
+                                      descending=order == "Descending", filters=filters,
+                                      start=(page - 1) * size, stop=page * size)
+        pages = max(1, math.ceil(matched / size))
+        if page > pages:
+            page = pages
+            window, matched = query_table(source, sort_by=None if sort_name == "(none)" else sort_name,
+                                          descending=order == "Descending", filters=filters,
+                                          start=(page - 1) * size, stop=page * size)
+        st.session_state[page_key] = page
+        st.dataframe(window, use_container_width=True, column_config=column_config)
+        first = (page - 1) * size + 1 if matched else 0
+        st.caption(f"Rows {first:,}-{(page - 1) * size + len(window):,} of {matched:,}")
+        st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=page_key)
+
+    table()
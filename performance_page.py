@@ -0,0 +1,42 @@
+import pandas as pd
+import streamlit as st
+
+import instrumentation
+
+
+def display_performance_page():
+    st.header("Performance")
+    st.markdown("""
+    Per-stage timings recorded by the `instrumentation` module: wall time, rows processed, peak traced
+    memory and cache hits, for ingestion, enrichment, figure building, rasterization and report generation.
+    """)
+    if not instrumentation.ENABLED:
+        st.info("Instrumentation is disabled. Set `APEXON_PULSE_METRICS=1` and restart the app to record metrics.")
+        return
+
+    summary = instrumentation.summary()
+    if summary.empty:
+        st.info("No stages recorded yet. Visit the analytics pages to generate some metrics.")
+        return
+
+    st.subheader("Stages")
+    st.dataframe(summary.round(2), use_container_width=True)
+    st.bar_chart(summary['total_ms'], horizontal=True)
+
+    st.subheader("Recent Calls")
+    recent = pd.DataFrame(instrumentation.records()[-200:][::-1])
+    recent['started_at'] = pd.to_datetime(recent['started_at'], unit='s')
+    recent['wall_ms'] = recent.pop('wall_s') * 1e3
+    st.dataframe(recent.round({'wall_ms': 2}), use_container_width=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Export JSON", instrumentation.export_json(), file_name="apexon_pulse_metrics.json",
+                           mime="application/json")
+    with col2:
+        st.download_button("Export Prometheus", instrumentation.export_prometheus(),
+                           file_name="apexon_pulse_metrics.prom", mime="text/plain")
+    with col3:
+        if st.button("Clear Metrics"):
+            instrumentation.clear()
+            st.rerun()
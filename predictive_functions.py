@@ -1,27 +1,63 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px 
+from enrichment import enrich_employee_data
+from attrition_model import get_attrition_model, get_attrition_scores, has_attrition_labels
+from figure_cache import cached_figures
+from instrumentation import instrumented
+from top_k import top_k_indices, top_k_per_group
+from utils import display_notes
+from chart_utils import compact_figure
+from paged_table import FrameSource, display_paged_table
+from out_of_core import is_out_of_core
 
-def get_predictive_analytics_figures(df):
+RISK_TABLE_COLUMNS = ['Name', 'Department', 'Role', 'TenureYears', 'EngagementScore']
+# Out-of-core datasets list this many top risks instead of paging through every employee's score
+OUT_OF_CORE_RISK_ROWS = 1000
+NO_ATTRITION_LABELS = "This dataset has no attrition labels, so attrition risk is not modelled."
+
+
+def risk_rows(df, risk, positions):
+    """The rows of `df` at `positions` (risk table columns only), with their scores from `risk` attached."""
+    columns = [col for col in RISK_TABLE_COLUMNS if col in df.columns]
+    return df.iloc[positions][columns].assign(AttritionRiskScore=risk[positions].astype(float).round(1))
+
+
+def _rounded(risks):
+    return risks.assign(AttritionRiskScore=risks['AttritionRiskScore'].astype(float).round(1))
+
+
+def get_top_risks(df, k=20):
+    """The `k` employees with the highest attrition risk, highest first."""
+    df = enrich_employee_data(df)
+    if is_out_of_core(df):
+        return _rounded(df.top_risks(get_attrition_model(df), k, RISK_TABLE_COLUMNS))
+    risk = get_attrition_scores(df)
+    return risk_rows(df, risk, top_k_indices(risk, k))
+
+
+def get_top_risks_by_department(df, k=5, risk=None):
+    """The `k` highest-risk employees of every department, selected in a single pass over the scores."""
+    df = enrich_employee_data(df)
+    if is_out_of_core(df):
+        by_department = df.top_risks(get_attrition_model(df), k, RISK_TABLE_COLUMNS, by='Department')
+        return {department: _rounded(risks) for department, risks in by_department.items()}
+    if risk is None:
+        risk = get_attrition_scores(df)
+    departments = df['Department'].astype('category').cat
+    per_department = top_k_per_group(risk, departments.codes.to_numpy(), k, len(departments.categories))
+    return {department: risk_rows(df, risk, positions)
+            for department, positions in zip(departments.categories, per_department) if positions.size}
+
+
+@cached_figures("predictive")
+def get_predictive_analytics_figures(df, top_k=20):
     figures = {}
-    if 'EngagementScore' not in df.columns:
-        df['EngagementScore'] = np.random.randint(60, 100, len(df))
-    if 'TenureYears' not in df.columns:
-        if 'HireDate' in df.columns:
-            df['HireDate'] = pd.to_datetime(df['HireDate'])
-            df['TenureYears'] = (pd.to_datetime('today') - df['HireDate']).dt.days / 365.25
-        else:
-            df['TenureYears'] = pd.Series(np.random.rand(len(df)) * 10).round(1)
-    if 'Department' not in df.columns:
-        df['Department'] = np.random.choice(['Engineering', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations'], len(df))
-
-    df['AttritionRiskScore'] = np.random.rand(df.shape[0]) * 100
-    df.loc[(df['EngagementScore'] < 70) | (df['TenureYears'] < 2) | (df['Department'] == 'Engineering'), 'AttritionRiskScore'] += np.random.rand(df[(df['EngagementScore'] < 70) | (df['TenureYears'] < 2) | (df['Department'] == 'Engineering')].shape[0]) * 30
-    df['AttritionRiskScore'] = df['AttritionRiskScore'].clip(0, 100).round(1)
-
-    # Get top 20 employees with highest risk
-    top_risks_df = df[['Name', 'Department', 'Role', 'TenureYears', 'EngagementScore', 'AttritionRiskScore']].sort_values(by='AttritionRiskScore', ascending=False).head(20)
+    df = enrich_employee_data(df)
+    if not has_attrition_labels(df):
+        return figures, pd.DataFrame(columns=[*[col for col in RISK_TABLE_COLUMNS if col in df.columns], 'AttritionRiskScore'])
+    # Scores come from the attrition model fitted to this dataset version (trained once, then reused)
+    top_risks_df = get_top_risks(df, top_k)
 
     # Generate a bar chart for top N attrition risks (e.g., top 10)
     if not top_risks_df.empty:
@@ -32,11 +68,19 @@ def get_predictive_analytics_figures(df):
                                color_continuous_scale=px.colors.sequential.Reds)
         fig_top_risks.update_layout(xaxis_tickangle=-45)
         figures["Top 10 Employees by Attrition Risk Score"] = fig_top_risks
-    else:
-        st.info("No employees found to plot attrition risk.")
 
     return figures, top_risks_df
 
+
+def get_predictive_analytics_notes(df, figures):
+    """Why charts are missing from `figures`, as (level, message) pairs for the page or CLI to show."""
+    if not has_attrition_labels(enrich_employee_data(df)):
+        return [('info', NO_ATTRITION_LABELS)]
+    if "Top 10 Employees by Attrition Risk Score" not in figures:
+        return [('info', "No employees found to plot attrition risk.")]
+    return []
+
+@instrumented('page.predictive')
 def display_predictive_analytics_page(df):
     st.set_page_config(page_title="Predictive Analytics")
     st.header("Predictive Analytics: Forecasting Future Outcomes")
@@ -45,16 +89,36 @@ def display_predictive_analytics_page(df):
     such as attrition risk. This enables proactive strategic planning.
     """)
 
-    st.subheader("Simulated Attrition Risk Forecast")
-    st.info("Apexon Pulse uses advanced algorithms (e.g., Logistic Regression, Random Forest) to predict attrition risk.")
+    st.subheader("Attrition Risk Forecast")
+    st.info("Apexon Pulse fits a logistic regression on engagement, tenure, department, role, salary and performance rating to predict attrition risk.")
 
-    figures, top_risks_df = get_predictive_analytics_figures(df)
+    figures, _ = get_predictive_analytics_figures(df)
+    display_notes(get_predictive_analytics_notes(df, figures))
 
-    
-    st.dataframe(top_risks_df)
+    # Every employee's score, served a page at a time; the first page is the highest-risk employees
+    df = enrich_employee_data(df)
+    if not has_attrition_labels(df):
+        return
+    if is_out_of_core(df):
+        # Scoring every row would need them all in memory; keep only the leaders from one streaming pass
+        risk = None
+        st.caption(f"Dataset analyzed out of core: showing the {OUT_OF_CORE_RISK_ROWS:,} highest-risk employees.")
+        source = FrameSource(get_top_risks(df, OUT_OF_CORE_RISK_ROWS))
+    else:
+        risk = get_attrition_scores(df)
+        source = FrameSource(df, RISK_TABLE_COLUMNS, extra={'AttritionRiskScore': risk})
+    display_paged_table(source,
+                        key="risk_table", sort_by='AttritionRiskScore', descending=True, page_size=25,
+                        column_config={'AttritionRiskScore': st.column_config.NumberColumn(format="%.1f")})
 
     if "Top 10 Employees by Attrition Risk Score" in figures:
-        st.plotly_chart(figures["Top 10 Employees by Attrition Risk Score"], use_container_width=True)
+        st.plotly_chart(compact_figure(figures["Top 10 Employees by Attrition Risk Score"]), use_container_width=True)
+
+    if 'Department' in df.columns:
+        with st.expander("Highest-risk employees by department"):
+            for department, department_risks in get_top_risks_by_department(df, risk=risk).items():
+                st.markdown(f"**{department}**")
+                st.dataframe(department_risks)
 
     st.markdown("""
     **How this supports Strategic Planning:**
@@ -1,12 +1,16 @@
 from fpdf import FPDF 
 import io
-import os
-import tempfile
-import plotly.io as pio 
+
+import pandas as pd
 
 from EDA_functions import get_descriptive_analytics_figures
 from diagnostic_functions import get_diagnostic_analytics_figures
-from predictive_functions import get_predictive_analytics_figures
+from predictive_functions import get_predictive_analytics_figures, get_predictive_analytics_notes
+from enrichment import enrich_employee_data
+from aggregate_cube import get_aggregate_cube
+from chart_rendering import rasterize_figures, render_png
+from figure_cache import cache_key, cached_bytes, dataset_fingerprint
+from instrumentation import instrumented
 
 
 def generate_mock_report():
@@ -67,23 +71,45 @@ class PDF(FPDF):
         self.multi_cell(0, 5, body)
         self.ln(5)
 
-    def add_chart(self, fig, title, width=180):
-        """Adds a Plotly figure to the PDF."""
+    def add_chart(self, fig, title, width=180, png=None):
+        """Adds a Plotly figure to the PDF, using pre-rendered PNG bytes when given."""
         self.chapter_title(title)
-        # Save Plotly figure to a temporary image file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
-            img_path = tmpfile.name
-            pio.write_image(fig, img_path, format='png', width=800, height=500, scale=1) # Adjust width/height/scale as needed
+        if png is None:
+            png = render_png(fig)
 
-        # Add image to PDF
-        self.image(img_path, x=self.get_x() + 10, w=width) # Adjust x to center, w for width
+        # Add image to PDF straight from memory
+        self.image(io.BytesIO(png), x=self.get_x() + 10, w=width) # Adjust x to center, w for width
         self.ln(5) # Add some space after the image
 
-        # Clean up temporary image file
-        os.unlink(img_path)
 
+def report_cache_key(df):
+    return cache_key('report_pdf', dataset_fingerprint(df))
+
+
+@instrumented('report.full_pdf')
+def generate_full_report_pdf(df, max_workers=None, progress=None):
+    """Builds the full PDF report, returning cached bytes when this dataset version was already rendered.
+
+    `progress`, if given, is called with each stage name ('figures', 'rasterization', 'layout') as it starts.
+    """
+    return cached_bytes(report_cache_key(df), lambda: _build_full_report_pdf(df, max_workers, progress))
+
+
+def _build_full_report_pdf(df, max_workers=None, progress=None):
+    progress = progress or (lambda stage: None)
+    df = enrich_employee_data(df)
 
-def generate_full_report_pdf(df):
+    # Build every figure up front and rasterize them concurrently before the layout pass
+    progress('figures')
+    desc_figs = get_descriptive_analytics_figures(df)
+    diag_figs = get_diagnostic_analytics_figures(df)
+    pred_figs, top_risks_df = get_predictive_analytics_figures(df)
+    all_figs = [*desc_figs.items(), *diag_figs.items(), *pred_figs.items()]
+    progress('rasterization')
+    pngs = dict(zip([title for title, _ in all_figs],
+                    rasterize_figures([fig for _, fig in all_figs], max_workers=max_workers)))
+
+    progress('layout')
     pdf = PDF()
     pdf.alias_nb_pages()
     pdf.add_page()
@@ -97,10 +123,12 @@ def generate_full_report_pdf(df):
 
     # --- Workforce Overview ---
     pdf.chapter_title("Workforce Overview")
-    total_employees = df.shape[0]
-    avg_tenure = df['TenureYears'].mean() if 'TenureYears' in df.columns else 0
-    avg_salary = df['Salary'].mean() if 'Salary' in df.columns else 0
-    avg_engagement = df['EngagementScore'].mean() if 'EngagementScore' in df.columns else 0
+    cube = get_aggregate_cube(df)
+    totals = cube.rollup().fillna(0)
+    total_employees = int(totals['Headcount'])
+    avg_tenure = totals['AvgTenureYears']
+    avg_salary = totals['AvgSalary']
+    avg_engagement = totals['AvgEngagementScore']
 
     workforce_overview_text = f"""
     * Total Employees: {total_employees:,}
@@ -113,22 +141,18 @@ def generate_full_report_pdf(df):
 
     # --- Descriptive Analytics ---
     pdf.chapter_title("1. Descriptive Analytics")
-    desc_figs = get_descriptive_analytics_figures(df)
     for title, fig in desc_figs.items():
-        pdf.add_chart(fig, title)
+        pdf.add_chart(fig, title, png=pngs[title])
         pdf.ln(5) # Add some space between charts
 
     # --- Diagnostic Analytics ---
     pdf.chapter_title("2. Diagnostic Analytics")
-    diag_figs = get_diagnostic_analytics_figures(df)
 
     # Attrition rates text
     if 'Department' in df.columns and 'Attrition' in df.columns:
-        engineering_df = df[df['Department'] == 'Engineering']
-        total_eng = engineering_df.shape[0]
-        attrition_eng = engineering_df['Attrition'].sum()
-        attrition_rate_eng = (attrition_eng / total_eng) * 100 if total_eng > 0 else 0
-        overall_attrition_rate = (df['Attrition'].sum() / df.shape[0]) * 100 if df.shape[0] > 0 else 0
+        attrition_rate_eng = cube.rollup(filters={'Department': 'Engineering'})['AttritionRate']
+        attrition_rate_eng = attrition_rate_eng * 100 if pd.notna(attrition_rate_eng) else 0
+        overall_attrition_rate = totals['AttritionRate'] * 100
 
         pdf.chapter_body(f"""
         Apexon Pulse detects an anomaly: The Engineering department shows a significantly higher attrition rate.
@@ -141,7 +165,7 @@ def generate_full_report_pdf(df):
 
 
     for title, fig in diag_figs.items():
-        pdf.add_chart(fig, title)
+        pdf.add_chart(fig, title, png=pngs[title])
         pdf.ln(5)
 
     pdf.chapter_body("""
@@ -153,7 +177,6 @@ def generate_full_report_pdf(df):
 
     # --- Predictive Analytics ---
     pdf.chapter_title("3. Predictive Analytics")
-    pred_figs, top_risks_df = get_predictive_analytics_figures(df)
 
     pdf.chapter_body("""
     The `FuturePredictorAgent` builds and deploys machine learning models to forecast employee outcomes,
@@ -173,9 +196,11 @@ def generate_full_report_pdf(df):
             pdf.multi_cell(available_width, 4, line)
         pdf.ln(5)
         pdf.set_font('Arial', '', 10) # Reset font to default for subsequent content
+    for _, message in get_predictive_analytics_notes(df, pred_figs):
+        pdf.chapter_body(message)
 
     for title, fig in pred_figs.items():
-        pdf.add_chart(fig, title)
+        pdf.add_chart(fig, title, png=pngs[title])
         pdf.ln(5)
 
     pdf.chapter_body("""
@@ -0,0 +1,214 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from dataset_registry import get_frame
+from figure_cache import dataset_fingerprint, get_cache
+from report_generation import generate_full_report_pdf, report_cache_key
+from batch_reports import generate_group_reports_zip, group_reports_cache_key
+
+# Reports rendered at once across all sessions, one core each
+REPORT_WORKERS = int(os.environ.get("APEXON_PULSE_REPORT_WORKERS", str(min(2, os.cpu_count() or 1))))
+MAX_FINISHED_JOBS = 32
+POLL_INTERVAL = 1.0  # seconds
+STAGES = ['queued', 'figures', 'rasterization', 'layout', 'done']
+
+# report type -> (build(df, max_workers=, progress=), cache key(df), download file name, MIME type)
+REPORT_TYPES = {
+    'full': (generate_full_report_pdf, report_cache_key, "HR_Quarterly_Review_Report.pdf", "application/pdf"),
+    'departments': (generate_group_reports_zip, group_reports_cache_key, "Department_Reports.zip", "application/zip"),
+}
+
+_progress_queue = None
+
+
+@dataclass
+class ReportJob:
+    job_id: str
+    report_type: str
+    dataset_version: str
+    stage: str = 'queued'
+    result: bytes = None
+    error: str = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: float = None
+
+    @property
+    def done(self):
+        return self.stage in ('done', 'failed')
+
+    @property
+    def progress(self):
+        """Fraction of stages completed, for a progress bar."""
+        return 1.0 if self.done else STAGES.index(self.stage) / (len(STAGES) - 1)
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+    from streamlit import logger
+    # Workers use the registry's caches without a Streamlit runtime; don't warn about it on every load
+    logger.set_log_level('ERROR')
+
+
+def _run_report(job_id, report_type, handle):
+    """Worker entry point: loads the dataset from its handle and builds one report, posting progress."""
+    build = REPORT_TYPES[report_type][0]
+    return build(get_frame(handle), max_workers=1, progress=lambda stage: _progress_queue.put((job_id, stage)))
+
+
+class ReportJobQueue:
+    """Runs report builds in a bounded pool of worker processes; identical in-flight requests share a job."""
+
+    def __init__(self, max_workers=REPORT_WORKERS):
+        context = multiprocessing.get_context('spawn')
+        self._progress = context.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(self._progress,))
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self._broken = False
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                message = self._progress.get()
+            except (EOFError, OSError, TypeError, ValueError):
+                return  # the queue was closed under us at interpreter shutdown
+            if message is None:
+                return
+            self._set_stage(*message)
+
+    def _set_stage(self, job_id, stage):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.done:
+                job.stage = stage
+
+    def _dispatch(self, job, key, handle, df):
+        """Starts `job` on the process pool, or on a local thread if worker processes are unavailable."""
+        future = None
+        if not self._broken:
+            try:
+                future = self._executor.submit(_run_report, job.job_id, job.report_type, handle)
+            except (BrokenProcessPool, RuntimeError, OSError):
+                self._broken = True
+        if future is None:
+            build = REPORT_TYPES[job.report_type][0]
+            future = _fallback_executor().submit(build, df, progress=lambda stage: self._set_stage(job.job_id, stage))
+        future.add_done_callback(lambda f: self._finish(job, key, handle, df, f))
+
+    def _finish(self, job, key, handle, df, future):
+        try:
+            result = future.result()
+            error = None if result else "The report came back empty."
+        except BrokenProcessPool:
+            # Worker processes could not start (e.g. a restricted environment); build on a thread instead
+            self._broken = True
+            self._dispatch(job, key, handle, df)
+            return
+        except Exception as e:  # surface any build failure on the job rather than in a pool thread
+            result, error = None, f"{type(e).__name__}: {e}"
+        if result:
+            get_cache().put(key, result)
+        with self._lock:
+            job.result, job.error = result, error
+            job.stage = 'failed' if error else 'done'
+            job.finished_at = time.time()
+            self._in_flight.pop((job.report_type, job.dataset_version), None)
+            self._evict()
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def submit(self, handle, report_type='full'):
+        """Queues a report for the dataset `handle` and returns its job id, reusing an in-flight or finished result."""
+        report_key = REPORT_TYPES[report_type][1]
+        df = get_frame(handle)
+        version = dataset_fingerprint(df)
+        key = report_key(df)
+        with self._lock:
+            existing = self._in_flight.get((report_type, version))
+            if existing is not None:
+                return existing
+            job = ReportJob(uuid.uuid4().hex[:12], report_type, version)
+            self._jobs[job.job_id] = job
+            cached = get_cache().get(key)
+            if cached is not None:
+                job.result, job.stage, job.finished_at = cached, 'done', time.time()
+                self._evict()
+                return job.job_id
+            self._in_flight[(report_type, version)] = job.job_id
+
+        self._dispatch(job, key, handle, df)
+        return job.job_id
+
+    def status(self, job_id):
+        """The job, or None if the id is unknown or has been evicted."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            self._progress.put(None)
+        except (OSError, ValueError):
+            pass
+
+
+_fallback = None
+
+
+def _fallback_executor():
+    global _fallback
+    if _fallback is None:
+        _fallback = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='report')
+    return _fallback
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_queue():
+    """The process-wide report job queue, shared by every session."""
+    job_queue = ReportJobQueue()
+    atexit.register(job_queue.shutdown)
+    return job_queue
+
+
+def display_report_job(job_id):
+    """Shows a report job's progress, polling while it runs, then its download button."""
+    job = get_report_queue().status(job_id)
+    if job is None:
+        return
+    if job.done:
+        if job.error:
+            st.error(f"Failed to generate report: {job.error}")
+        else:
+            _, _, file_name, mime = REPORT_TYPES[job.report_type]
+            st.download_button(label=f"Click to Download {file_name}", data=job.result,
+                               file_name=file_name, mime=mime, key=f"download_{job_id}")
+            st.success("Report generated and ready for download!")
+        return
+
+    # Only this fragment reruns while polling; once the job finishes, a full rerun shows the result
+    @st.fragment(run_every=POLL_INTERVAL)
+    def poll():
+        current = get_report_queue().status(job_id)
+        if current is None or current.done:
+            st.rerun()
+        st.progress(current.progress, text=f"Generating report ({current.stage})... This may take a moment.")
+
+    poll()
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# Declared dtypes for the employee extract; columns that don't fit fall back to a wider type
+CATEGORICAL_COLUMNS = ['Department', 'Role', 'Gender']
+# Canonical labels of the categorical columns, which cleaning maps extract spellings onto
+CATEGORY_LABELS = {
+    'Department': ['Engineering', 'IT', 'Sales', 'Marketing', 'HR', 'Finance', 'Operations'],
+    'Role': ['Manager', 'Senior Associate', 'Associate', 'Analyst', 'Specialist'],
+    'Gender': ['Male', 'Female', 'Non-binary'],
+}
+INTEGER_COLUMNS = {
+    'EmployeeID': 'int32',
+    'Salary': 'int32',
+    'PerformanceRating': 'int8',
+    'EngagementScore': 'uint8',
+    'Attrition': 'int8',
+}
+FLOAT_COLUMNS = {'TenureYears': 'float32'}
+DATE_COLUMNS = ['HireDate']
+# Tried in order for each distinct date string; anything left over gets pandas' per-value inference.
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%Y/%m/%d', '%d-%b-%Y', '%Y-%m-%d %H:%M:%S']
+
+# What the aggregates group by and add up; histograms are (first edge, bin width, number of bins)
+GROUP_DIMENSIONS = ['Department', 'Role', 'Gender']
+MEASURES = ['Salary', 'EngagementScore', 'TenureYears', 'Attrition']
+HISTOGRAMS = {
+    'EngagementScore': (0.0, 1.0, 101),
+    'TenureYears': (0.0, 0.5, 100),
+}
+# The group label of a missing dimension value
+UNKNOWN = 'Unknown'
+
+
+def measure_name(measure):
+    """The name a measure's per-group mean goes by: `AttritionRate` for attrition, `Avg<measure>` otherwise."""
+    return 'AttritionRate' if measure == 'Attrition' else f'Avg{measure}'
+
+
+SUMMARY_COLUMNS = ['Headcount', *map(measure_name, MEASURES)]
+
+# dtypes handed to `pd.read_csv` so nothing is parsed into Python objects it doesn't need to be.
+CSV_DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **{col: 'float64' for col in INTEGER_COLUMNS},
+    **FLOAT_COLUMNS,
+}
+
+
+def _narrow_integer(series, dtype):
+    """Casts to `dtype` when every value is present and in range, else to float32 (or float64 if too wide)."""
+    if series.isna().any():
+        return series.astype('float32') if np.dtype(dtype).itemsize < 4 else series.astype('float64')
+    info = np.iinfo(dtype)
+    if len(series) and (series.min() < info.min or series.max() > info.max or (series % 1 != 0).any()):
+        return series.astype('float64')
+    return series.astype(dtype)
+
+
+def parse_dates(series):
+    """Parses date strings in any of DATE_FORMATS, each distinct string once; unparseable values become NaT."""
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[us]')
+    for fmt in DATE_FORMATS:
+        pending = parsed.isna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(uniques[pending], format=fmt, errors='coerce')
+    pending = parsed.isna()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(uniques[pending], format='mixed', errors='coerce')
+    values = parsed.to_numpy()
+    dates = np.where(codes >= 0, values[np.maximum(codes, 0)], np.datetime64('NaT', 'us'))
+    return pd.Series(dates, index=series.index, name=series.name)
+
+
+def apply_schema(df):
+    """Returns `df` cast to the declared schema. Columns not in the schema are left alone."""
+    columns = {}
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            columns[col] = df[col].astype('category')
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns and df[col].dtype != dtype:
+            columns[col] = _narrow_integer(pd.to_numeric(df[col], errors='coerce'), dtype)
+    for col, dtype in FLOAT_COLUMNS.items():
+        if col in df.columns and df[col].dtype != dtype:
+            columns[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            columns[col] = parse_dates(df[col])
+    if not columns:
+        return df
+    typed = df.assign(**columns)
+    typed.attrs = dict(df.attrs)
+    return typed
+
+
+# Free-text columns that are worth dictionary-encoding when values repeat a lot (e.g. simulated names).
+COMPACTABLE_STRING_COLUMNS = ['Name']
+
+
+def compact_frame(df):
+    """Canonical compact representation: the declared schema plus categoricals for repetitive text."""
+    df = apply_schema(df)
+    columns = {}
+    for col in COMPACTABLE_STRING_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            if len(df) and df[col].nunique() <= len(df) // 2:
+                columns[col] = df[col].astype('category')
+    if not columns:
+        return df
+    compact = df.assign(**columns)
+    compact.attrs = dict(df.attrs)
+    return compact
+
+
+def memory_usage_report(before, after):
+    """Per-column memory (bytes) of two versions of a frame, with a total row and the reduction factor."""
+    report = pd.DataFrame({
+        'before_bytes': before.memory_usage(index=False, deep=True),
+        'after_bytes': after.memory_usage(index=False, deep=True),
+        'before_dtype': before.dtypes.astype(str),
+        'after_dtype': after.dtypes.astype(str),
+    })
+    report.loc['Total', ['before_bytes', 'after_bytes']] = report[['before_bytes', 'after_bytes']].sum()
+    report['reduction'] = (report['before_bytes'] / report['after_bytes']).round(2)
+    return report
+
+
+def category_mask(series, value):
+    """Boolean mask for `series == value` that compares integer category codes when `series` is categorical."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if value not in categories:
+            return np.zeros(len(series), dtype=bool)
+        return series.cat.codes.to_numpy() == categories.get_loc(value)
+    return (series == value).to_numpy()
@@ -0,0 +1,131 @@
+import functools
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from aggregate_cube import DIMENSIONS, get_aggregate_cube
+from enrichment import enrich_employee_data
+from instrumentation import instrumented
+from schema import MEASURES, SUMMARY_COLUMNS, measure_name
+from utils import atomic_path
+
+SNAPSHOT_DIR = os.environ.get("APEXON_PULSE_SNAPSHOT_DIR", "Data/snapshots")
+# Hive-style partition directories, so the whole history also reads as one Arrow dataset
+PARTITION_PREFIX = "snapshot_date="
+DATA_FILE = "data.parquet"
+# Written last: a partition without it is incomplete and ignored
+AGGREGATES_FILE = "aggregates.parquet"
+TREND_DIMENSION = 'Department'
+ALL_DEPARTMENTS = 'All'
+DEFAULT_TREND_QUARTERS = 12
+
+_PARTITION_RE = re.compile(rf"^{re.escape(PARTITION_PREFIX)}(\d{{4}}-\d{{2}}-\d{{2}})$")
+
+
+def partition_path(snapshot_date, root=SNAPSHOT_DIR):
+    return os.path.join(root, f"{PARTITION_PREFIX}{pd.Timestamp(snapshot_date).date()}")
+
+
+def snapshot_aggregates(df):
+    """Per-department headcount, and a sum and non-null count per measure, for one snapshot."""
+    cube = get_aggregate_cube(df)
+    axis = DIMENSIONS.index(TREND_DIMENSION)
+    others = tuple(i for i in range(len(DIMENSIONS)) if i != axis)
+    columns = {TREND_DIMENSION: cube.labels[TREND_DIMENSION], 'Headcount': cube.count.sum(axis=others)}
+    for m in MEASURES:
+        columns[f'sum_{m}'] = cube.sums[m].sum(axis=others)
+        columns[f'n_{m}'] = cube.nonnull[m].sum(axis=others)
+    frame = pd.DataFrame(columns)
+    return frame[frame['Headcount'] > 0].reset_index(drop=True)
+
+
+def _write_parquet(table, path):
+    with atomic_path(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+
+def _as_of(df, snapshot_date):
+    """`df` as of `snapshot_date`: later hires dropped and tenure re-derived from `HireDate`."""
+    if 'HireDate' not in df.columns:
+        return df
+    hire_date = pd.to_datetime(df['HireDate'], errors='coerce')
+    hired = ~(hire_date > snapshot_date).to_numpy()
+    base = df[hired] if not hired.all() else df
+    return enrich_employee_data(base.drop(columns=['TenureYears'], errors='ignore'), as_of=snapshot_date)
+
+
+@instrumented('snapshots.save')
+def save_snapshot(df, snapshot_date=None, root=SNAPSHOT_DIR):
+    """Saves `df`, as of `snapshot_date` (default today), with its aggregates. Returns the partition directory."""
+    today = pd.Timestamp.today().normalize()
+    snapshot_date = today if snapshot_date is None else pd.Timestamp(snapshot_date)
+    if snapshot_date != today:
+        df = _as_of(df, snapshot_date)
+    path = partition_path(snapshot_date, root)
+    os.makedirs(path, exist_ok=True)
+    aggregates_path = os.path.join(path, AGGREGATES_FILE)
+    if os.path.exists(aggregates_path):
+        os.unlink(aggregates_path)
+    _write_parquet(pa.Table.from_pandas(df, preserve_index=False), os.path.join(path, DATA_FILE))
+    _write_parquet(pa.Table.from_pandas(snapshot_aggregates(df), preserve_index=False), aggregates_path)
+    return path
+
+
+def list_snapshots(root=SNAPSHOT_DIR):
+    """Dates of the complete snapshots under `root`, oldest first."""
+    try:
+        names = os.listdir(root)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    dates = [match.group(1) for match in map(_PARTITION_RE.match, names)
+             if match and os.path.exists(os.path.join(root, match.group(0), AGGREGATES_FILE))]
+    return [pd.Timestamp(d) for d in sorted(dates)]
+
+
+def snapshot_partition(path, snapshot_date=None):
+    """`snapshot_date`'s (default the latest) partition if `path` is a snapshot store, else `path`."""
+    dates = list_snapshots(path)
+    if not dates:
+        return path
+    return partition_path(dates[-1] if snapshot_date is None else snapshot_date, path)
+
+
+def load_snapshot(snapshot_date, columns=None, root=SNAPSHOT_DIR):
+    """The rows of one snapshot, optionally only `columns`."""
+    return pq.read_table(os.path.join(partition_path(snapshot_date, root), DATA_FILE), columns=columns).to_pandas()
+
+
+@functools.lru_cache(maxsize=256)
+def _read_aggregates(path, mtime_ns):
+    """One partition's aggregates, memoized on (path, mtime)."""
+    return pq.read_table(path).to_pandas()
+
+
+@instrumented('snapshots.trends')
+def quarterly_trends(quarters=DEFAULT_TREND_QUARTERS, root=SNAPSHOT_DIR):
+    """SUMMARY_COLUMNS per department and in total for the last `quarters` quarters, from each one's latest snapshot."""
+    latest = {}
+    for snapshot_date in list_snapshots(root):
+        latest[snapshot_date.to_period('Q')] = snapshot_date
+    selected = sorted(latest)[-quarters:] if quarters else sorted(latest)
+
+    parts = []
+    for quarter in selected:
+        path = os.path.join(partition_path(latest[quarter], root), AGGREGATES_FILE)
+        part = _read_aggregates(path, os.stat(path).st_mtime_ns)
+        total = part.drop(columns=TREND_DIMENSION).sum().to_frame().T.assign(**{TREND_DIMENSION: ALL_DEPARTMENTS})
+        parts.append(pd.concat([part, total], ignore_index=True).assign(Quarter=str(quarter),
+                                                                        SnapshotDate=latest[quarter]))
+    if not parts:
+        return pd.DataFrame(columns=['Quarter', 'SnapshotDate', TREND_DIMENSION, *SUMMARY_COLUMNS])
+
+    stats = pd.concat(parts, ignore_index=True)
+    trends = stats[['Quarter', 'SnapshotDate', TREND_DIMENSION]].assign(Headcount=stats['Headcount'].astype(np.int64))
+    for m in MEASURES:
+        n = stats[f'n_{m}']
+        trends[measure_name(m)] = stats[f'sum_{m}'] / n.where(n > 0)
+    return trends
@@ -0,0 +1,92 @@
+import base64
+import io
+import os
+import threading
+
+from PIL import Image
+
+LOGO_PATH = "Images/logo.jpg"
+HERO_IMAGE_PATH = "Images/heroimage.png"
+# Display sizes in CSS pixels; variants are rendered at 2x so they stay sharp on high-DPI screens.
+HEADER_LOGO_WIDTH = 100
+FOOTER_LOGO_HEIGHT = 30
+PAGE_ICON_SIZE = 32
+HERO_IMAGE_WIDTH = 640
+PIXEL_RATIO = 2
+
+_MIME_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png'}
+
+# (path, width, height) -> [file signature, encoded bytes, format, data URI]; replaced when the file changes
+_variants = {}
+_variants_lock = threading.Lock()
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _encode_variant(path, width, height):
+    """Resizes (never enlarges) an image to fit `width` x `height`, as JPEG if opaque."""
+    with Image.open(path) as image:
+        image.load()
+        if width or height:
+            scale = min(width / image.width if width else 1.0, height / image.height if height else 1.0, 1.0)
+            if scale < 1.0:
+                image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                     Image.LANCZOS)
+        buffer = io.BytesIO()
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image.save(buffer, format='PNG', optimize=True)
+            return buffer.getvalue(), 'PNG'
+        image.convert('RGB').save(buffer, format='JPEG', quality=88, optimize=True)
+        return buffer.getvalue(), 'JPEG'
+
+
+def _get_variant(path, width, height):
+    """The cache entry [signature, bytes, format, data URI or None] for a variant, or None if the file is missing."""
+    try:
+        signature = _file_signature(path)
+    except OSError:
+        return None
+    key = (path, width, height)
+    with _variants_lock:
+        entry = _variants.get(key)
+    if entry is None or entry[0] != signature:
+        data, image_format = _encode_variant(path, width, height)
+        entry = [signature, data, image_format, None]
+        with _variants_lock:
+            _variants[key] = entry
+    return entry
+
+
+def get_asset(path, width=None, height=None):
+    """Encoded bytes of an image resized to fit `width` x `height`, cached per file version, or None if missing."""
+    entry = _get_variant(path, width, height)
+    return entry[1] if entry else None
+
+
+def get_asset_data_uri(path, width=None, height=None):
+    """A `data:` URI for embedding a variant in HTML, or None if the file is missing."""
+    entry = _get_variant(path, width, height)
+    if entry is None:
+        return None
+    if entry[3] is None:
+        entry[3] = f"data:{_MIME_TYPES[entry[2]]};base64,{base64.b64encode(entry[1]).decode()}"
+    return entry[3]
+
+
+def header_logo():
+    return get_asset(LOGO_PATH, width=HEADER_LOGO_WIDTH * PIXEL_RATIO)
+
+
+def footer_logo_data_uri():
+    return get_asset_data_uri(LOGO_PATH, height=FOOTER_LOGO_HEIGHT * PIXEL_RATIO)
+
+
+def page_icon():
+    return get_asset(LOGO_PATH, width=PAGE_ICON_SIZE * PIXEL_RATIO)
+
+
+def hero_image():
+    return get_asset(HERO_IMAGE_PATH, width=HERO_IMAGE_WIDTH * PIXEL_RATIO)
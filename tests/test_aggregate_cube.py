@@ -0,0 +1,99 @@
+"""Cube roll-ups and histograms must equal the same aggregations done with pandas on the rows."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregate_cube import DIMENSIONS, TENURE_BANDS, AggregateCube, _dimension_labels  # noqa: E402
+from schema import HISTOGRAMS, MEASURES, UNKNOWN, measure_name  # noqa: E402
+
+
+def employees(n=3_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'EmployeeID': np.arange(n),
+        'Department': pd.Categorical(rng.choice(['Engineering', 'Sales', 'HR'], n)),
+        'Role': pd.Categorical(rng.choice(['Manager', 'Analyst'], n)),
+        'Gender': pd.Categorical(rng.choice(['Male', 'Female'], n)),
+        'Salary': rng.integers(40_000, 150_000, n).astype(float),
+        'EngagementScore': rng.integers(50, 100, n).astype(float),
+        'TenureYears': np.round(rng.random(n) * 15, 1),
+        'Attrition': rng.choice([0.0, 1.0], n, p=[0.85, 0.15]),
+    })
+    # Missing values in a dimension and in the measures
+    df.loc[rng.random(n) < 0.05, 'Department'] = np.nan
+    df.loc[rng.random(n) < 0.05, 'Salary'] = np.nan
+    df.loc[rng.random(n) < 0.05, 'TenureYears'] = np.nan
+    return df
+
+
+def with_bands(df):
+    bands = pd.cut(df['TenureYears'], [-np.inf, *[lower for lower, _ in TENURE_BANDS[1:]], np.inf],
+                   right=False, labels=[label for _, label in TENURE_BANDS])
+    return df.assign(TenureBand=bands.astype(object).fillna(UNKNOWN),
+                     **{dim: df[dim].astype(object).fillna(UNKNOWN) for dim in ['Department', 'Role', 'Gender']})
+
+
+def reference(df, by):
+    grouped = with_bands(df).groupby(by, sort=True)
+    expected = pd.DataFrame({'Headcount': grouped.size()})
+    for m in MEASURES:
+        expected[measure_name(m)] = grouped[m].mean()
+    return expected
+
+
+@pytest.fixture(scope="module")
+def df():
+    return employees()
+
+
+@pytest.fixture(scope="module")
+def cube(df):
+    return AggregateCube.build(df)
+
+
+def test_total(df, cube):
+    totals = cube.rollup()
+    assert totals['Headcount'] == len(df)
+    for m in MEASURES:
+        assert totals[measure_name(m)] == pytest.approx(df[m].mean())
+
+
+@pytest.mark.parametrize("by", [['Department'], ['TenureBand'], ['Role', 'Gender'], ['Gender', 'Department']])
+def test_rollup_matches_groupby(df, cube, by):
+    result = cube.rollup(by=by).sort_index()
+    expected = reference(df, by).sort_index()
+    assert list(result.index) == list(expected.index)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_names=False, check_index_type=False)
+
+
+def test_slice(df, cube):
+    result = cube.rollup(by='Role', filters={'Department': 'Engineering', 'Gender': ['Female']})
+    part = df[(df['Department'] == 'Engineering') & (df['Gender'] == 'Female')]
+    expected = reference(part, ['Role'])
+    pd.testing.assert_frame_equal(result.sort_index(), expected.sort_index(),
+                                  check_dtype=False, check_names=False, check_index_type=False)
+
+
+def test_histograms(df, cube):
+    for measure, (start, width, n_bins) in HISTOGRAMS.items():
+        edges, counts = cube.histogram(measure, by='Department')
+        np.testing.assert_allclose(edges, start + width * np.arange(n_bins + 1))
+        for department, part in with_bands(df).groupby('Department'):
+            values = part[measure].dropna().to_numpy()
+            bins = np.clip(np.floor((values - start) / width), 0, n_bins - 1).astype(int)
+            np.testing.assert_array_equal(counts[department], np.bincount(bins, minlength=n_bins))
+
+
+def test_from_batches_equals_build(df, cube):
+    labels = {dim: _dimension_labels(df, dim) for dim in DIMENSIONS}
+    batched = AggregateCube.from_batches([df.iloc[:1000], df.iloc[1000:2500], df.iloc[2500:]], labels)
+    np.testing.assert_array_equal(batched.count, cube.count)
+    for m in MEASURES:
+        np.testing.assert_allclose(batched.sums[m], cube.sums[m])
+        np.testing.assert_array_equal(batched.nonnull[m], cube.nonnull[m])
+    pd.testing.assert_frame_equal(batched.rollup(by='Department'), cube.rollup(by='Department'))
@@ -0,0 +1,92 @@
+"""Incremental folds must leave the store exactly as a single fold of the final rows would."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregate_store import SKETCH_ALPHA, AggregateStore  # noqa: E402
+from schema import HISTOGRAMS, MEASURES, measure_name  # noqa: E402
+from test_aggregate_cube import employees  # noqa: E402
+
+
+def assert_same(store, expected):
+    for by in [None, 'Department', ['Role', 'Gender']]:
+        a, b = store.summary(by=by), expected.summary(by=by)
+        if by is None:
+            pd.testing.assert_series_equal(a, b, rtol=1e-9)
+        else:
+            pd.testing.assert_frame_equal(a, b, rtol=1e-9)
+    for measure in HISTOGRAMS:
+        np.testing.assert_array_equal(store.histogram(measure)[1], expected.histogram(measure)[1])
+    assert store.quantile('Salary', 0.5) == expected.quantile('Salary', 0.5)
+
+
+def fresh(df):
+    store = AggregateStore()
+    store.fold(df)
+    return store
+
+
+@pytest.fixture
+def df():
+    return employees(2_000)
+
+
+def test_summary_matches_pandas(df):
+    totals = fresh(df).summary()
+    assert totals['Headcount'] == len(df)
+    for m in MEASURES:
+        # Rows are kept at float32 precision
+        assert totals[measure_name(m)] == pytest.approx(df[m].astype(np.float32).mean(), rel=1e-6)
+    by_role = fresh(df).summary(by='Role')
+    assert by_role['Headcount'].to_dict() == df.groupby('Role', observed=True).size().to_dict()
+
+
+def test_appended_batches(df):
+    store = AggregateStore()
+    assert store.fold(df.iloc[:1200]) == 1200
+    assert store.fold(df.iloc[1200:]) == 800
+    # Folding rows already seen is a no-op
+    assert store.fold(df.iloc[:500]) == 0
+    assert_same(store, fresh(df))
+
+
+def test_changed_rows_replace_their_old_contribution(df):
+    store = fresh(df)
+    changed = df.iloc[:100].assign(Salary=df['Salary'].iloc[:100].fillna(50_000) + 1000,
+                                   Department=pd.Categorical(['Sales'] * 100))
+    assert store.fold(changed) == 100
+    final = pd.concat([changed, df.iloc[100:]])
+    assert_same(store, fresh(final))
+
+
+def test_full_snapshot_retracts_missing_rows(df):
+    store = fresh(df)
+    kept = df.iloc[300:]
+    assert store.fold(kept, full_snapshot=True) == 300
+    assert_same(store, fresh(kept))
+    assert store.summary()['Headcount'] == len(kept)
+
+
+def test_watermark_skips_old_rows(df):
+    df = df.assign(UpdatedAt=np.arange(len(df)))
+    store = AggregateStore(watermark_column='UpdatedAt')
+    store.fold(df.iloc[:1000])
+    assert store.watermark == 999
+    # Changes at or below the watermark are not looked at
+    assert store.fold(df.iloc[:10].assign(Salary=1.0)) == 0
+    assert store.fold(df.iloc[900:]) == 1000
+
+
+def test_salary_quantiles_within_alpha(df):
+    store = fresh(df)
+    salaries = df['Salary'].dropna()
+    for q in [0.1, 0.5, 0.9]:
+        assert store.quantile('Salary', q) == pytest.approx(salaries.quantile(q), rel=2 * SKETCH_ALPHA)
+    engineering = salaries[df['Department'] == 'Engineering']
+    assert (store.quantile('Salary', 0.5, filters={'Department': 'Engineering'})
+            == pytest.approx(engineering.median(), rel=2 * SKETCH_ALPHA))
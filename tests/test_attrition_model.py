@@ -0,0 +1,84 @@
+"""Attrition model persistence, its label guard, and training out of core on the same rows as in memory."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import attrition_model  # noqa: E402
+import out_of_core  # noqa: E402
+from attrition_model import (get_attrition_model, has_attrition_labels, load_model, model_path,  # noqa: E402
+                             save_model, score_attrition_risk, train_attrition_model)
+from data_cleaning import clean_employee_data  # noqa: E402
+from data_utils import generate_synthetic_data, write_synthetic_parquet  # noqa: E402
+from enrichment import enrich_employee_data  # noqa: E402
+from out_of_core import ParquetDataset, read_parquet_frame  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def df():
+    return generate_synthetic_data(5_000, seed=3)
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(attrition_model, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(attrition_model, '_models', {})
+    return tmp_path
+
+
+def test_save_load_round_trip(df, tmp_path):
+    model = train_attrition_model(df)
+    path = str(tmp_path / 'model.json')
+    save_model(model, path)
+    loaded = load_model(path)
+    assert loaded == model
+    np.testing.assert_array_equal(score_attrition_risk(loaded, df), score_attrition_risk(model, df))
+    assert os.listdir(tmp_path) == ['model.json']
+
+
+def test_scores_are_probabilities(df):
+    scores = score_attrition_risk(train_attrition_model(df), df, chunk_size=700)
+    assert scores.dtype == np.float32 and len(scores) == len(df)
+    assert ((scores > 0) & (scores < 100)).all()
+
+
+def test_get_attrition_model_persists(df, model_dir, monkeypatch):
+    model = get_attrition_model(df)
+    assert os.path.exists(model_path(df))
+    assert get_attrition_model(df) is model
+
+    # A new process finds the saved model rather than retraining
+    monkeypatch.setattr(attrition_model, '_models', {})
+    monkeypatch.setattr(attrition_model, 'train_attrition_model', lambda *args, **kwargs: pytest.fail('retrained'))
+    assert get_attrition_model(df) == model
+
+
+def test_unlabelled_data_is_not_modelled(df, model_dir):
+    imputed = enrich_employee_data(df.drop(columns=['Attrition']), seed=0)
+    assert 'Attrition' in imputed.columns
+    assert not has_attrition_labels(imputed)
+    assert not has_attrition_labels(df.drop(columns=['Attrition']))
+    assert has_attrition_labels(df)
+    with pytest.raises(ValueError):
+        get_attrition_model(imputed)
+    assert os.listdir(model_dir) == []
+
+
+@pytest.mark.parametrize("max_rows", [2_000, 100_000])
+def test_out_of_core_training_matches_in_memory(tmp_path, monkeypatch, max_rows):
+    path = str(tmp_path / 'employees.parquet')
+    write_synthetic_parquet(path, 6_000, seed=5, chunk_size=1_500)
+    monkeypatch.setattr(out_of_core, 'BATCH_ROWS', 1_000)
+    monkeypatch.setattr(attrition_model, 'MAX_TRAINING_ROWS', max_rows)
+    dataset = ParquetDataset(path)
+    frame = enrich_employee_data(clean_employee_data(read_parquet_frame(path))[0], as_of=dataset.as_of)
+
+    in_memory = train_attrition_model(frame)
+    out_of_core_model = train_attrition_model(dataset.training_sample(max_rows))
+    assert out_of_core_model['categories'] == in_memory['categories']
+    np.testing.assert_allclose(out_of_core_model['weights'], in_memory['weights'], rtol=1e-9)
+    np.testing.assert_allclose(out_of_core_model['means'], in_memory['means'], rtol=1e-9)
+    assert out_of_core_model['numeric'] == in_memory['numeric']
@@ -0,0 +1,94 @@
+"""Server-side chart aggregation must reproduce plotly's own binning and box statistics.
+
+Reference bins come from plotly.js itself (via kaleido's `full_figure_for_development`), on the
+bundled sample CSV, so a change to either side of the port shows up here.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chart_utils import box_summary, histogram_summary  # noqa: E402
+
+pytest.importorskip("kaleido")
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return pd.read_csv(os.path.join(ROOT, "Data", "employee_data.csv"))
+
+
+def _plotly_bins(fig):
+    """(start, size) of every histogram trace, as computed by plotly.js."""
+    full = fig.full_figure_for_development(warn=False)
+    return [(trace.xbins.start, trace.xbins.size) for trace in full.data]
+
+
+def _reference_counts(values, start, size, count):
+    """Rows per bin, bins closed on the left like plotly's."""
+    values = pd.Series(values, dtype=float).dropna()
+    index = np.floor((values - start) / size + 1e-9).astype(int)
+    return np.bincount(index[(index >= 0) & (index < count)], minlength=count)
+
+
+@pytest.mark.parametrize("x,nbins", [("TenureYears", 15), ("Salary", None), ("EngagementScore", None)])
+def test_histogram_matches_plotly(sample, x, nbins):
+    summary = histogram_summary(sample, x, nbins=nbins)
+    (start, size), = _plotly_bins(px.histogram(sample, x=x, nbins=nbins))
+    count = len(summary["edges"]) - 1
+
+    assert summary["edges"][0] == pytest.approx(start)
+    assert summary["size"] == pytest.approx(size)
+    np.testing.assert_array_equal(summary["counts"][None], _reference_counts(sample[x], start, size, count))
+    assert summary["counts"][None].sum() == sample[x].notna().sum()
+
+
+def test_grouped_histogram_matches_plotly(sample):
+    summary = histogram_summary(sample, "EngagementScore", color="Department")
+    fig = px.histogram(sample, x="EngagementScore", color="Department")
+    # Grouped traces share one bin group; plotly reports its bins on the first trace
+    start, size = _plotly_bins(fig)[0]
+    count = len(summary["edges"]) - 1
+
+    assert summary["edges"][0] == pytest.approx(start)
+    assert summary["size"] == pytest.approx(size)
+    assert list(summary["counts"]) == [trace.name for trace in fig.data]
+    for name, counts in summary["counts"].items():
+        group = sample.loc[sample["Department"] == name, "EngagementScore"]
+        np.testing.assert_array_equal(counts, _reference_counts(group, start, size, count))
+
+
+def _linear_quartile(values, p):
+    """plotly.js 'linear' quartile method: linear interpolation at rank n*p - 0.5."""
+    rank = min(max(len(values) * p - 0.5, 0), len(values) - 1)
+    lower = int(np.floor(rank))
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (rank - lower) * (values[upper] - values[lower])
+
+
+def test_box_matches_plotly(sample):
+    summary = box_summary(sample, "Department", "Salary")
+    fig = px.box(sample, x="Department", y="Salary")
+    assert fig.full_figure_for_development(warn=False).data[0].quartilemethod == "linear"
+
+    assert list(summary) == list(pd.unique(sample["Department"].dropna()))
+    for name, stats in summary.items():
+        values = np.sort(sample.loc[sample["Department"] == name, "Salary"].dropna().to_numpy(dtype=float))
+        q1, median, q3 = (_linear_quartile(values, p) for p in (0.25, 0.5, 0.75))
+        assert stats["q1"] == pytest.approx(q1)
+        assert stats["median"] == pytest.approx(median)
+        assert stats["q3"] == pytest.approx(q3)
+
+        # Whiskers reach the most extreme points within 1.5 IQR of the box
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        assert stats["lowerfence"] == pytest.approx(min(q1, inside.min()))
+        assert stats["upperfence"] == pytest.approx(max(q3, inside.max()))
+        outliers = values[(values < stats["lowerfence"]) | (values > stats["upperfence"])]
+        np.testing.assert_array_equal(np.sort(stats["outliers"]), outliers)
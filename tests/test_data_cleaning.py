@@ -0,0 +1,84 @@
+"""Cleaning rules, pinned on small frames and on the bundled sample CSV."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_cleaning import REPORT_COLUMNS, clean_employee_data  # noqa: E402
+from ingestion import read_employee_csv  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def sample():
+    raw = read_employee_csv(os.path.join(ROOT, "Data", "employee_data.csv"), use_cache=False)
+    return raw, *clean_employee_data(raw)
+
+
+def test_bundled_csv_report(sample):
+    _, _, report = sample
+    assert list(report.columns) == REPORT_COLUMNS
+    assert list(report.itertuples(index=False, name=None)) == [
+        ('labels', 'Role', 500, 'case-folded / mapped to canonical labels'),
+        ('labels', 'Gender', 500, 'case-folded / mapped to canonical labels'),
+        ('range', 'PerformanceRating', 500, 'rescaled from [1, 100] to [1, 5]'),
+    ]
+
+
+def test_bundled_csv_labels(sample):
+    raw, clean, _ = sample
+    assert set(clean['Role'].cat.categories) == {'Manager', 'Associate', 'Executive'}
+    assert set(clean['Gender'].cat.categories) == {'Male', 'Female'}
+    # Departments were already canonical, IT included
+    assert clean['Department'].value_counts().to_dict() == raw['Department'].value_counts().to_dict()
+    assert (clean['Department'] == 'IT').sum() == 60
+
+
+def test_bundled_csv_ratings_rescaled(sample):
+    raw, clean, _ = sample
+    expected = np.round(1 + (raw['PerformanceRating'].to_numpy(dtype=float) - 1) * 4 / 99)
+    np.testing.assert_array_equal(clean['PerformanceRating'].to_numpy(dtype=float), expected)
+    assert clean['PerformanceRating'].between(1, 5).all()
+
+
+def test_labels_aliases_and_missing_tokens():
+    df = pd.DataFrame({'Department': ['information technology', ' eng ', 'HR', 'n/a', 'customer service'],
+                       'Gender': ['f', 'M', 'nonbinary', 'Female', None]})
+    clean, report = clean_employee_data(df)
+    assert clean['Department'].tolist()[:3] == ['IT', 'Engineering', 'HR']
+    assert pd.isna(clean['Department'][3])
+    assert clean['Department'][4] == 'Customer Service'
+    assert clean['Gender'].tolist()[:4] == ['Female', 'Male', 'Non-binary', 'Female']
+    assert dict(zip(report['column'], report['rows'])) == {'Department': 4, 'Gender': 3}
+
+
+def test_ranges():
+    df = pd.DataFrame({'EngagementScore': [150, -3, 50], 'Salary': [-5, 0, 1000],
+                       'TenureYears': [70, 2.5, np.nan], 'PerformanceRating': [1, 3, 5]})
+    clean, report = clean_employee_data(df)
+    assert clean['EngagementScore'].tolist() == [100, 0, 50]
+    assert clean['Salary'].isna().tolist() == [True, True, False]
+    assert clean['TenureYears'].isna().tolist() == [True, False, True]
+    # Already on the 1-5 scale: left alone and not reported
+    assert clean['PerformanceRating'].tolist() == [1, 3, 5]
+    assert set(report['column']) == {'EngagementScore', 'Salary', 'TenureYears'}
+
+
+def test_unknown_rating_scale_is_blanked():
+    clean, report = clean_employee_data(pd.DataFrame({'PerformanceRating': [1, 3, 250]}))
+    assert clean['PerformanceRating'].isna().tolist() == [False, False, True]
+    assert report['action'].tolist() == ['blanked outside [1, 5]']
+
+
+def test_dates_and_duplicates():
+    df = pd.DataFrame({'EmployeeID': [1, 2, 2, 3],
+                       'HireDate': ['2020-01-15', '03/04/2021', '2021-03-04', '1900-01-01']})
+    clean, report = clean_employee_data(df)
+    assert clean['EmployeeID'].tolist() == [1, 2, 3]
+    assert clean['HireDate'].tolist()[:2] == [pd.Timestamp('2020-01-15'), pd.Timestamp('2021-03-04')]
+    assert pd.isna(clean['HireDate'][2])
+    assert dict(zip(report['check'], report['rows'])) == {'dates': 1, 'duplicates': 1}
@@ -0,0 +1,138 @@
+"""A Parquet dataset scanned in batches must give what the same data gives loaded, cleaned and enriched in memory."""
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import out_of_core  # noqa: E402
+from aggregate_cube import AggregateCube  # noqa: E402
+from attrition_model import score_attrition_risk, train_attrition_model  # noqa: E402
+from chart_utils import box_summary, histogram_summary  # noqa: E402
+from data_cleaning import clean_employee_data  # noqa: E402
+from data_utils import generate_synthetic_data  # noqa: E402
+from enrichment import enrich_employee_data  # noqa: E402
+from out_of_core import ParquetDataset, read_parquet_frame  # noqa: E402
+from top_k import top_k_indices, top_k_per_group  # noqa: E402
+
+N = 6_000
+
+
+@pytest.fixture(scope="module")
+def path(tmp_path_factory):
+    df = generate_synthetic_data(N, seed=7)
+    # Labels and ratings the cleaning rules have to fix, spread over every batch
+    rows = np.arange(N)
+    df['Role'] = df['Role'].astype(str).str.lower().where(rows % 3 == 0, df['Role'].astype(str))
+    df['Department'] = df['Department'].astype(str).str.upper().where(rows % 5 == 0, df['Department'].astype(str))
+    df['PerformanceRating'] = (df['PerformanceRating'] * 20).astype('int16')
+    df['Salary'] = df['Salary'].where(rows % 97 != 0, -5)
+    path = str(tmp_path_factory.mktemp('ooc') / 'employees.parquet')
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=1_500)
+    return path
+
+
+@pytest.fixture
+def dataset(path, monkeypatch):
+    monkeypatch.setattr(out_of_core, 'BATCH_ROWS', 1_000)
+    return ParquetDataset(path)
+
+
+@pytest.fixture
+def cleaned(path):
+    return clean_employee_data(read_parquet_frame(path))
+
+
+@pytest.fixture
+def frame(cleaned, dataset):
+    return enrich_employee_data(cleaned[0], as_of=dataset.as_of)
+
+
+def test_shape(dataset, frame):
+    assert len(dataset) == len(frame) == N
+    assert sorted(dataset.columns) == sorted(frame.columns)
+    assert dataset.attrs['imputed_columns'] == []
+
+
+def test_quality_report(dataset, cleaned):
+    expected = cleaned[1]
+    assert {'Role', 'Department', 'PerformanceRating', 'Salary'} <= set(expected['column'])
+    pd.testing.assert_frame_equal(dataset.quality_report(), expected, check_dtype=False)
+
+
+def test_cube(dataset, frame):
+    in_memory, scanned = AggregateCube.build(frame), dataset.build_cube()
+    pd.testing.assert_series_equal(scanned.rollup(), in_memory.rollup())
+    for by in ['Department', ['Role', 'TenureBand']]:
+        pd.testing.assert_frame_equal(scanned.rollup(by=by), in_memory.rollup(by=by))
+    edges, counts = scanned.histogram('EngagementScore', by='Department')
+    expected_edges, expected_counts = in_memory.histogram('EngagementScore', by='Department')
+    np.testing.assert_array_equal(edges, expected_edges)
+    assert list(counts) == list(expected_counts)
+    for name in counts:
+        np.testing.assert_array_equal(counts[name], expected_counts[name])
+
+
+def test_value_counts(dataset, frame):
+    values, counts = dataset.value_counts('EngagementScore', by='Department')
+    # Groups in order of first appearance, as a frame's groupby(sort=False) gives them
+    groups = frame.groupby('Department', sort=False, observed=True)['EngagementScore']
+    assert list(counts) == list(groups.groups)
+    for name, part in groups:
+        expected = part.dropna().value_counts().reindex(values, fill_value=0)
+        np.testing.assert_array_equal(counts[name], expected.to_numpy())
+
+    values, counts = dataset.value_counts('Salary', filters={'Department': 'Sales', 'Role': ['Manager']})
+    part = frame[(frame['Department'] == 'Sales') & (frame['Role'] == 'Manager')]['Salary'].dropna()
+    np.testing.assert_array_equal(values, np.unique(part))
+    np.testing.assert_array_equal(counts[None], part.value_counts().reindex(values).to_numpy())
+
+
+def same(a, b):
+    if isinstance(a, dict):
+        assert list(a) == list(b)
+        for key in a:
+            same(a[key], b[key])
+    else:
+        np.testing.assert_allclose(np.asarray(a, float), np.asarray(b, float), equal_nan=True)
+
+
+def test_chart_summaries(dataset, frame):
+    for column, color in [('TenureYears', None), ('EngagementScore', 'Department'), ('Salary', 'Gender')]:
+        same(histogram_summary(dataset, column, nbins=15, color=color),
+             histogram_summary(frame, column, nbins=15, color=color))
+    same(box_summary(dataset, 'Department', 'Salary'), box_summary(frame, 'Department', 'Salary'))
+
+
+def test_top_risks(dataset, frame):
+    model = train_attrition_model(frame)
+    scores = score_attrition_risk(model, frame)
+    columns = ['Name', 'Department', 'Role', 'EngagementScore']
+
+    top = dataset.top_risks(model, 25, columns)
+    expected = top_k_indices(scores, 25)
+    np.testing.assert_array_equal(top.index, expected)
+    np.testing.assert_allclose(top['AttritionRiskScore'], scores[expected], rtol=1e-6)
+    assert top['Name'].tolist() == frame['Name'].iloc[expected].tolist()
+    assert top['Role'].astype(str).tolist() == frame['Role'].iloc[expected].astype(str).tolist()
+
+    by_department = dataset.top_risks(model, 5, columns, by='Department')
+    departments = frame['Department'].astype('category').cat
+    per_department = top_k_per_group(scores, departments.codes.to_numpy(), 5, len(departments.categories))
+    expected = {str(name): positions for name, positions in zip(departments.categories, per_department)
+                if positions.size}
+    assert sorted(by_department) == sorted(expected)
+    for name, positions in expected.items():
+        np.testing.assert_array_equal(by_department[name].index, positions)
+
+
+def test_pickles_by_path(dataset):
+    restored = pickle.loads(pickle.dumps(dataset))
+    assert restored.path == dataset.path and len(restored) == len(dataset)
+    assert len(pickle.dumps(dataset)) < 1_000
@@ -0,0 +1,100 @@
+"""Snapshots as of past dates, partition discovery and the quarterly trends read from their aggregates."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema import SUMMARY_COLUMNS  # noqa: E402
+from snapshot_store import (AGGREGATES_FILE, ALL_DEPARTMENTS, DATA_FILE, list_snapshots, load_snapshot,  # noqa: E402
+                            partition_path, quarterly_trends, save_snapshot, snapshot_partition)
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 500
+    hire_date = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 6 * 365, n), unit='D')
+    return pd.DataFrame({
+        'EmployeeID': np.arange(n),
+        'Department': pd.Categorical(rng.choice(['Engineering', 'Sales', 'HR'], n)),
+        'Role': pd.Categorical(rng.choice(['Manager', 'Analyst'], n)),
+        'Gender': pd.Categorical(rng.choice(['Male', 'Female'], n)),
+        'Salary': rng.integers(40_000, 150_000, n).astype(float),
+        'EngagementScore': rng.integers(50, 100, n).astype(float),
+        'HireDate': hire_date,
+        'TenureYears': ((pd.Timestamp('2026-01-01') - hire_date).days / 365.25).astype('float32'),
+        'Attrition': rng.choice([0.0, 1.0], n, p=[0.85, 0.15]),
+    })
+
+
+def test_backdated_snapshot(df, tmp_path):
+    snapshot_date = pd.Timestamp('2023-06-30')
+    save_snapshot(df, snapshot_date, root=tmp_path)
+    rows = load_snapshot(snapshot_date, root=tmp_path)
+    hired = df[df['HireDate'] <= snapshot_date]
+    assert 0 < len(rows) < len(df)
+    assert rows['EmployeeID'].tolist() == hired['EmployeeID'].tolist()
+    expected = ((snapshot_date - hired['HireDate']).dt.days / 365.25).astype('float32')
+    np.testing.assert_array_equal(rows['TenureYears'].to_numpy(), expected.to_numpy())
+
+
+def test_todays_snapshot_is_stored_as_is(df, tmp_path):
+    save_snapshot(df, root=tmp_path)
+    rows = load_snapshot(pd.Timestamp.today(), root=tmp_path)
+    pd.testing.assert_frame_equal(rows, df, check_dtype=False, check_categorical=False)
+
+
+def test_list_snapshots(df, tmp_path):
+    for snapshot_date in ['2025-04-15', '2024-01-15']:
+        save_snapshot(df, snapshot_date, root=tmp_path)
+    # A partition whose aggregates were never written is incomplete
+    os.makedirs(partition_path('2025-07-01', tmp_path))
+    (tmp_path / 'notes.txt').write_text('')
+    assert list_snapshots(tmp_path) == [pd.Timestamp('2024-01-15'), pd.Timestamp('2025-04-15')]
+    assert list_snapshots(tmp_path / 'missing') == []
+    assert list_snapshots(tmp_path / 'notes.txt') == []
+
+
+def test_snapshot_partition(df, tmp_path):
+    for snapshot_date in ['2024-01-15', '2025-04-15']:
+        save_snapshot(df, snapshot_date, root=tmp_path)
+    assert snapshot_partition(str(tmp_path)) == partition_path('2025-04-15', str(tmp_path))
+    assert snapshot_partition(str(tmp_path), '2024-01-15') == partition_path('2024-01-15', str(tmp_path))
+    # A single data file, or any other path, is loaded as it is
+    data_file = os.path.join(partition_path('2024-01-15', str(tmp_path)), DATA_FILE)
+    assert snapshot_partition(data_file) == data_file
+
+
+def test_resaving_replaces_the_partition(df, tmp_path):
+    save_snapshot(df, '2024-01-15', root=tmp_path)
+    save_snapshot(df.iloc[:10], '2024-01-15', root=tmp_path)
+    hired = df.iloc[:10]['HireDate'] <= pd.Timestamp('2024-01-15')
+    assert len(load_snapshot('2024-01-15', root=tmp_path)) == hired.sum()
+    assert os.path.exists(os.path.join(partition_path('2024-01-15', tmp_path), AGGREGATES_FILE))
+
+
+def test_quarterly_trends(df, tmp_path):
+    for snapshot_date in ['2024-01-15', '2024-03-20', '2024-05-01', '2025-02-01']:
+        save_snapshot(df, snapshot_date, root=tmp_path)
+    trends = quarterly_trends(root=tmp_path)
+    assert list(trends.columns) == ['Quarter', 'SnapshotDate', 'Department', *SUMMARY_COLUMNS]
+    # Each quarter is represented by its latest snapshot
+    assert trends.groupby('Quarter')['SnapshotDate'].first().to_dict() == {
+        '2024Q1': pd.Timestamp('2024-03-20'), '2024Q2': pd.Timestamp('2024-05-01'), '2025Q1': pd.Timestamp('2025-02-01')}
+
+    rows = load_snapshot('2024-03-20', root=tmp_path)
+    quarter = trends[trends['Quarter'] == '2024Q1'].set_index('Department')
+    total = quarter.loc[ALL_DEPARTMENTS]
+    assert total['Headcount'] == len(rows)
+    assert total['AvgSalary'] == pytest.approx(rows['Salary'].mean())
+    assert total['AttritionRate'] == pytest.approx(rows['Attrition'].mean())
+    for department, part in rows.groupby('Department', observed=True):
+        assert quarter.loc[department, 'Headcount'] == len(part)
+        assert quarter.loc[department, 'AvgTenureYears'] == pytest.approx(part['TenureYears'].mean(), rel=1e-6)
+
+    assert quarterly_trends(quarters=1, root=tmp_path)['Quarter'].unique().tolist() == ['2025Q1']
+    assert quarterly_trends(root=tmp_path / 'missing').empty
@@ -0,0 +1,48 @@
+"""Top-K selection must match a stable full sort, ties and NaNs included."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from top_k import top_k_indices, top_k_per_group  # noqa: E402
+
+
+def _reference(scores, k):
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    return np.lexsort((np.arange(scores.size), -scores))[:max(k, 0)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_stable_sort_with_ties(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(200):
+        n = int(rng.integers(1, 80))
+        scores = rng.integers(0, 6, n).astype(float)
+        scores[rng.random(n) < 0.1] = np.nan
+        k = int(rng.integers(-1, n + 3))
+        np.testing.assert_array_equal(top_k_indices(scores, k), _reference(scores, k))
+
+
+def test_distinct_scores():
+    scores = np.random.default_rng(0).random(10_000).astype(np.float32)
+    np.testing.assert_array_equal(top_k_indices(scores, 20), np.argsort(-scores, kind='stable')[:20])
+
+
+def test_empty():
+    assert top_k_indices(np.array([]), 5).size == 0
+    assert top_k_indices(np.array([1.0, 2.0]), 0).size == 0
+
+
+def test_per_group_matches_per_group_sort():
+    rng = np.random.default_rng(1)
+    scores = rng.integers(0, 20, 5_000).astype(float)
+    codes = rng.integers(-1, 7, 5_000)
+    result = top_k_per_group(scores, codes, 5, n_groups=8)
+    assert len(result) == 8
+    for g in range(8):
+        members = np.flatnonzero(codes == g)
+        np.testing.assert_array_equal(result[g], members[_reference(scores[members], 5)])
+    assert result[7].size == 0
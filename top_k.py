@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def _ranked(scores, candidates):
+    """Orders candidate positions by descending score; tied candidates keep their row order."""
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def top_k_indices(scores, k):
+    """Positions of the `k` highest scores, highest first, without a full sort; NaNs last, ties by row."""
+    scores = np.asarray(scores, dtype=float)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    n = scores.size
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return _ranked(scores, np.arange(n))
+    # argpartition picks arbitrary rows among those tied with the k-th score; take them all
+    cutoff = scores[np.argpartition(scores, n - k)[n - k]]
+    return _ranked(scores, np.flatnonzero(scores >= cutoff))[:k]
+
+
+def top_k_per_group(scores, codes, k, n_groups=None):
+    """Positions of the top `k` scores within each group, as a list indexed by group code (negative codes skipped)."""
+    scores = np.asarray(scores, dtype=float)
+    codes = np.asarray(codes)
+    n_groups = int(codes.max()) + 1 if n_groups is None and codes.size else (n_groups or 0)
+    valid = np.flatnonzero(codes >= 0)
+    order = valid[np.argsort(codes[valid], kind='stable')]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[valid], minlength=n_groups))])
+    return [
+        order[bounds[g]:bounds[g + 1]][top_k_indices(scores[order[bounds[g]:bounds[g + 1]]], k)]
+        for g in range(n_groups)
+    ]
@@ -0,0 +1,46 @@
+import streamlit as st
+import plotly.express as px
+
+from chart_utils import compact_figure
+from instrumentation import instrumented
+from snapshot_store import ALL_DEPARTMENTS, DEFAULT_TREND_QUARTERS, TREND_DIMENSION, list_snapshots, quarterly_trends
+
+# metric column -> (chart title, axis label, multiplier for display)
+TREND_METRICS = {
+    'Headcount': ('Headcount by Department', 'Employees', 1),
+    'AttritionRate': ('Attrition Rate by Department', 'Attrition Rate (%)', 100),
+    'AvgEngagementScore': ('Average Engagement Score by Department', 'Engagement Score', 1),
+    'AvgSalary': ('Average Salary by Department', 'Salary', 1),
+}
+
+
+def get_trend_figures(trends, departments=None):
+    """One quarter-over-quarter line chart per metric, with a line per department and the company total."""
+    if departments:
+        trends = trends[trends[TREND_DIMENSION].isin([*departments, ALL_DEPARTMENTS])]
+    figures = {}
+    for metric, (title, label, scale) in TREND_METRICS.items():
+        fig = px.line(trends.assign(**{metric: trends[metric] * scale}), x='Quarter', y=metric,
+                      color=TREND_DIMENSION, markers=True, title=title, labels={metric: label},
+                      color_discrete_map={ALL_DEPARTMENTS: 'black'},
+                      color_discrete_sequence=px.colors.qualitative.Pastel)
+        figures[title] = fig
+    return figures
+
+
+@instrumented('page.trends')
+def display_quarterly_trends():
+    """Quarter-over-quarter trends from the snapshot store's precomputed aggregates."""
+    st.subheader("Quarter-over-Quarter Trends")
+    snapshots = list_snapshots()
+    if not snapshots:
+        st.info("No snapshots saved yet. Save one from the Data Ingestion page to start building history.")
+        return
+    quarters = st.slider("Quarters", min_value=2, max_value=20, value=DEFAULT_TREND_QUARTERS, key="trend_quarters")
+    trends = quarterly_trends(quarters)
+    departments = [d for d in trends[TREND_DIMENSION].unique() if d != ALL_DEPARTMENTS]
+    selected = st.multiselect("Departments", departments, key="trend_departments")
+    st.caption(f"{trends['Quarter'].nunique()} quarter(s) from {len(snapshots)} snapshot(s); "
+               "each quarter uses its latest snapshot.")
+    for title, fig in get_trend_figures(trends, selected).items():
+        st.plotly_chart(compact_figure(fig), use_container_width=True)
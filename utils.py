@@ -1,24 +1,19 @@
-import streamlit as st
-import base64
+import contextlib
+import os
+import threading
 
-def get_image_base64(image_path):
-    """Encodes an image to base64 for embedding in HTML."""
-    try:
-        with open(image_path, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode()
-        return encoded_string
-    except FileNotFoundError:
-        st.warning(f"Image not found at '{image_path}'.")
-        return None
+import streamlit as st
+from static_assets import LOGO_PATH, FOOTER_LOGO_HEIGHT, footer_logo_data_uri
 
 def display_footer():
     st.markdown("---")  # Separator line
-    footer_logo_path = "Images/logo.jpg"
-    encoded_string = get_image_base64(footer_logo_path)
+    # Pre-resized and pre-encoded once per process, not re-read on every rerun
+    logo_uri = footer_logo_data_uri()
 
-    if encoded_string:
-        footer_logo_html = f'<img src="data:image/jpeg;base64,{encoded_string}" style="height: 30px; vertical-align: middle; margin-right: 10px;">'  # Adjust height as needed
+    if logo_uri:
+        footer_logo_html = f'<img src="{logo_uri}" style="height: {FOOTER_LOGO_HEIGHT}px; vertical-align: middle; margin-right: 10px;">'  # Adjust height as needed
     else:
+        st.warning(f"Image not found at '{LOGO_PATH}'.")
         footer_logo_html = "<span style='font-size: 1.1em; font-weight: bold; vertical-align: middle;'>Apexon Pulse</span>"
 
     # Using flexbox for robust alignment
@@ -31,4 +26,21 @@ def display_footer():
         <p style='text-align: right; font-size: 1.1em; margin: 0;'>Built by The Mavericks</p>
     </div>
     """
-    st.markdown(footer_html, unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown(footer_html, unsafe_allow_html=True)
+
+def display_notes(notes):
+    """Shows (level, message) notes from the analytics functions as st.warning / st.info boxes."""
+    for level, message in notes:
+        (st.warning if level == 'warning' else st.info)(message)
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """Yields a temporary path that is renamed over `path` when the block completes, and removed if it raises."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)